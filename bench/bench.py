@@ -0,0 +1,263 @@
+"""Benchmarks for mrequests against the local test server in bench/server.py.
+
+Runs with CPython and the MicroPython unix port:
+
+    python bench/bench.py [-n <iterations>] [-s <download size>] [-t <filter>] [<base url>]
+    micropython bench/bench.py [...]
+
+The base URL defaults to http://127.0.0.1:8080. Set it to an https:// URL to benchmark TLS
+connections (the server's certificate is not validated by the MicroPython unix port and a
+non-validating context is used with CPython).
+
+For each benchmark, the number of requests per second, the average time to the first byte
+(i.e. until request() returned with the response head parsed, or for pipelined requests, until
+the next response was received), the download throughput and the memory allocated per
+request is printed. The latter is measured for a single request (a whole batch for pipelined
+requests) and is the number of bytes allocated on the heap with the garbage collector disabled
+on MicroPython (-1 if the heap was exhausted) and the peak traced memory reported by
+tracemalloc on CPython.
+
+"""
+
+import gc
+import sys
+
+try:
+    from time import ticks_diff, ticks_us
+except ImportError:
+    from time import perf_counter
+
+    def ticks_us():
+        return int(perf_counter() * 1000000)
+
+    def ticks_diff(a, b):
+        return a - b
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import mrequests
+from mrequests.session import Session
+
+MICROPY = sys.implementation.name == "micropython"
+
+
+class NullWriter:
+    def write(self, data):
+        return len(data)
+
+
+class Stats:
+    def __init__(self):
+        self.requests = 0
+        self.ttfb = 0
+        self.bytes = 0
+
+
+def ssl_context(url):
+    if not url.startswith("https:") or MICROPY:
+        return None
+
+    import ssl
+
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+def timed_request(stats, method, url, **kw):
+    start = ticks_us()
+    resp = mrequests.request(method, url, **kw)
+    stats.ttfb += ticks_diff(ticks_us(), start)
+    stats.requests += 1
+    return resp
+
+
+def bench_get(stats, url, **kw):
+    resp = timed_request(stats, "GET", url, **kw)
+    stats.bytes += len(resp.content)
+    resp.close()
+
+
+def bench_read(stats, url, **kw):
+    resp = timed_request(stats, "GET", url, **kw)
+
+    while True:
+        data = resp.read(mrequests.MAX_READ_SIZE)
+
+        if not data:
+            break
+
+        stats.bytes += len(data)
+
+    resp.close()
+
+
+def bench_readinto(stats, url, buf=None, **kw):
+    resp = timed_request(stats, "GET", url, **kw)
+
+    while True:
+        num_read = resp.readinto(buf)
+
+        if not num_read:
+            break
+
+        stats.bytes += num_read
+
+    resp.close()
+
+
+def bench_saveinto(stats, url, buf=None, **kw):
+    resp = timed_request(stats, "GET", url, **kw)
+    resp.saveinto(NullWriter(), buf)
+    stats.bytes += resp._content_size
+    resp.close()
+
+
+def bench_post(stats, url, data=None, **kw):
+    resp = timed_request(stats, "POST", url, data=data, **kw)
+    stats.bytes += len(resp.content)
+    resp.close()
+
+
+def measure_alloc(func, *args, **kw):
+    # Return memory allocated by one call of func (see module docstring)
+    gc.collect()
+
+    if MICROPY:
+        gc.disable()
+        start = gc.mem_alloc()
+
+        try:
+            func(Stats(), *args, **kw)
+            return gc.mem_alloc() - start
+        except MemoryError:
+            return -1
+        finally:
+            gc.enable()
+    elif tracemalloc:
+        tracemalloc.start()
+
+        try:
+            func(Stats(), *args, **kw)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return 0
+
+
+def run(name, func, iterations, *args, **kw):
+    stats = Stats()
+    # warm up, e.g. to create the default SSL context and import modules
+    func(Stats(), *args, **kw)
+    gc.collect()
+    start = ticks_us()
+
+    for _ in range(iterations):
+        func(stats, *args, **kw)
+
+    seconds = ticks_diff(ticks_us(), start) / 1000000
+    print(
+        "%-28s %6i %9.1f %9.2f %9.2f %10i"
+        % (
+            name,
+            stats.requests,
+            stats.requests / seconds,
+            stats.ttfb / stats.requests / 1000,
+            stats.bytes / seconds / (1024 * 1024),
+            measure_alloc(func, *args, **kw),
+        )
+    )
+
+
+def run_session(name, func, iterations, *args, **kw):
+    with Session() as session:
+        run(name, func, iterations, *args, session=session, **kw)
+
+
+def bench_pipeline(stats, url, session=None, depth=8, count=10, **kw):
+    # Each response is timed from when the previous one was received, so ttfb is per request
+    start = ticks_us()
+
+    for resp in session.pipeline([url] * count, depth=depth, **kw):
+        stats.ttfb += ticks_diff(ticks_us(), start)
+        stats.requests += 1
+        stats.bytes += len(resp.content)
+        start = ticks_us()
+
+
+def main(args=None):
+    args = sys.argv[1:] if args is None else args
+    iterations = 100
+    size = 1024 * 1024
+    only = None
+    base = "http://127.0.0.1:8080"
+
+    while args:
+        arg = args.pop(0)
+
+        if arg == "-n":
+            iterations = int(args.pop(0))
+        elif arg == "-s":
+            size = int(args.pop(0))
+        elif arg == "-t":
+            only = args.pop(0)
+        elif arg in ("-h", "--help"):
+            print(__doc__)
+            return
+        else:
+            base = arg.rstrip("/")
+
+    kw = {"ssl_context": ssl_context(base)}
+    downloads = max(1, iterations // 10)
+    buf = bytearray(mrequests.MAX_READ_SIZE)
+    body = b"x" * 1024
+
+    benchmarks = [
+        ("GET small", run, bench_get, iterations, base + "/small"),
+        ("GET small (session)", run_session, bench_get, iterations, base + "/small"),
+        ("GET small (pipelined x10)", run_session, bench_pipeline, downloads, base + "/small"),
+        ("GET 50 headers", run, bench_get, iterations, base + "/headers?n=50"),
+        ("GET 50 headers (saved)", run, bench_get, iterations, base + "/headers?n=50"),
+        ("POST 1 KB", run, bench_post, iterations, base + "/echo"),
+        ("download read", run, bench_read, downloads, base + "/bytes?n=%i" % size),
+        ("download readinto", run, bench_readinto, downloads, base + "/bytes?n=%i" % size),
+        ("download saveinto", run, bench_saveinto, downloads, base + "/bytes?n=%i" % size),
+        ("chunked read", run, bench_read, downloads, base + "/chunked?n=%i" % size),
+        ("chunked readinto", run, bench_readinto, downloads, base + "/chunked?n=%i" % size),
+        ("gzip readinto (decompress)", run, bench_readinto, downloads, base + "/gzip?n=%i" % size),
+    ]
+    extra = {
+        "GET 50 headers (saved)": {"save_headers": True},
+        "POST 1 KB": {"data": body},
+        "download readinto": {"buf": buf},
+        "download saveinto": {"buf": buf},
+        "chunked readinto": {"buf": buf},
+        "gzip readinto (decompress)": {"buf": buf, "decompress": True},
+    }
+
+    print("%s %s, %s" % (sys.implementation.name, ".".join(map(str, sys.version_info[:3])), base))
+    print(
+        "%-28s %6s %9s %9s %9s %10s"
+        % ("benchmark", "n", "req/s", "ttfb ms", "MB/s", "alloc/req")
+    )
+
+    for name, runner, func, n, url in benchmarks:
+        if only and only not in name:
+            continue
+
+        bkw = kw.copy()
+        bkw.update(extra.get(name, {}))
+
+        try:
+            runner(name, func, n, url, **bkw)
+        except Exception as exc:
+            print("%-28s failed: %r" % (name, exc))
+
+
+if __name__ == "__main__":
+    main()
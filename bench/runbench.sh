@@ -0,0 +1,33 @@
+#!/bin/bash
+#
+# Start the local benchmark server and run the benchmarks with the MicroPython
+# unix port or CPython (set PYTHON=python3). Set HTTPS=1 to benchmark TLS
+# connections using a self-signed certificate.
+#
+# Any arguments are passed to bench.py.
+#
+
+cd "$(dirname "$0")/.."
+
+PORT="${PORT:-8080}"
+SERVER_PYTHON="${SERVER_PYTHON:-python3}"
+
+if [[ -n "$HTTPS" ]]; then
+    "$SERVER_PYTHON" bench/server.py -p "$PORT" --https &
+    BASE="https://127.0.0.1:$PORT"
+else
+    "$SERVER_PYTHON" bench/server.py -p "$PORT" &
+    BASE="http://127.0.0.1:$PORT"
+fi
+
+SERVER_PID=$!
+trap 'kill $SERVER_PID' EXIT
+sleep "${STARTUP_DELAY:-2}"
+
+if [[ -n "$PYTHON" ]]; then
+    export PYTHONPATH="$(pwd)"
+    "$PYTHON" bench/bench.py "$@" "$BASE"
+else
+    export MICROPYPATH="$(pwd):$MICROPYPATH"
+    micropython bench/bench.py "$@" "$BASE"
+fi
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Local HTTP/1.1 test server for the mrequests benchmarks (CPython only).
+
+Endpoints:
+
+/small              short plain text response
+/bytes?n=<size>     response body of the given size with Content-Length
+/chunked?n=<size>&chunk=<chunk size>
+                    response body of the given size with chunked transfer encoding
+/gzip?n=<size>      gzip-compressed JSON lines of (about) the given uncompressed size
+/headers?n=<count>  short response with the given number of additional headers
+/echo               echoes the body of POST and PUT requests
+
+"""
+
+import argparse
+import gzip
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_PATTERN = bytes(range(256)) * 256
+_cache = {}
+
+
+def payload(size):
+    data = _cache.get(("bytes", size))
+
+    if data is None:
+        data = _cache[("bytes", size)] = (_PATTERN * (size // len(_PATTERN) + 1))[:size]
+
+    return data
+
+
+def gzip_payload(size):
+    data = _cache.get(("gzip", size))
+
+    if data is None:
+        lines = []
+        total = i = 0
+
+        while total < size:
+            line = b'{"seq": %d, "value": %d, "name": "sensor%d"}\n' % (i, i * 7 % 1000, i % 16)
+            lines.append(line)
+            total += len(line)
+            i += 1
+
+        data = _cache[("gzip", size)] = gzip.compress(b"".join(lines))
+
+    return data
+
+
+class BenchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # head and body are written separately, don't let Nagle's algorithm delay the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, body, headers=(), chunk=0):
+        self.send_response(200)
+
+        for name, value in headers:
+            self.send_header(name, value)
+
+        if chunk:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            if self.command != "HEAD":
+                for i in range(0, len(body), chunk):
+                    part = body[i:i + chunk]
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+
+                self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        n = int(query.get("n", ["0"])[0])
+
+        if url.path == "/small":
+            self.send_body(b"Hello, World!\n", [("Content-Type", "text/plain")])
+        elif url.path == "/bytes":
+            self.send_body(payload(n), [("Content-Type", "application/octet-stream")])
+        elif url.path == "/chunked":
+            chunk = int(query.get("chunk", ["4096"])[0])
+            self.send_body(payload(n), [("Content-Type", "application/octet-stream")], chunk)
+        elif url.path == "/gzip":
+            self.send_body(
+                gzip_payload(n),
+                [("Content-Type", "application/x-ndjson"), ("Content-Encoding", "gzip")],
+            )
+        elif url.path == "/headers":
+            headers = [("X-Header-%03d" % i, "value-%d" % i * 4) for i in range(n)]
+            self.send_body(b"ok\n", headers)
+        else:
+            self.send_error(404)
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        size = int(self.headers.get("Content-Length", 0))
+        self.send_body(self.rfile.read(size))
+
+    do_PUT = do_POST
+
+
+def self_signed_cert(directory):
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-subj", "/CN=localhost", "-keyout", keyfile, "-out", certfile,
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return certfile, keyfile
+
+
+def main(args=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("-b", "--bind", default="127.0.0.1", help="Address to bind to")
+    ap.add_argument("-p", "--port", type=int, default=8080, help="Port to listen on")
+    ap.add_argument("--https", action="store_true", help="Serve HTTPS")
+    ap.add_argument("--cert", help="Certificate file (generated with openssl, if not given)")
+    ap.add_argument("--key", help="Private key file")
+    args = ap.parse_args(args)
+
+    server = ThreadingHTTPServer((args.bind, args.port), BenchHandler)
+    server.daemon_threads = True
+
+    if args.https:
+        certfile, keyfile = args.cert, args.key
+
+        if not certfile:
+            certfile, keyfile = self_signed_cert(tempfile.mkdtemp())
+
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(certfile, keyfile)
+        server.socket = ctx.wrap_socket(server.socket, server_side=True)
+
+    print("Serving %s on %s:%i" % ("HTTPS" if args.https else "HTTP", args.bind, args.port))
+    sys.stdout.flush()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -41,3 +41,11 @@ if __name__ == "__main__":
         print(" ".join(res))
     else:
         print("Could not resolve host name '{}'.".format(name), file=sys.stderr)
+
+    # Use DoH lookups for requests via a caching resolver
+    from mrequests.resolver import Resolver
+
+    resolver = Resolver(resolve=gethostbyname)
+    r = mrequests.get("http://{}/get".format(name), resolver=resolver)
+    print("Status code via DoH resolver:", r.status_code)
+    r.close()
@@ -1,8 +1,7 @@
 """Upload a file via a POST request with a multipart/form-data encoded request body.
 
-This reads the whole file and builds the request body in memory, so this isn't
-the most efficient way to do this and will quickly lead to out-of-memory errors
-on microcontrollers with restrained memory.
+The request body is streamed from the file to the socket block by block by the
+MultipartEncoder, so memory usage does not depend on the file size.
 
 """
 
@@ -13,39 +12,17 @@ except ImportError:
     from ubinascii import hexlify
 
 import mrequests
-
-
-def create_multipart_request(file=None, filename=None, data=None):
-    boundary = hexlify(os.urandom(16))
-    lines = []
-
-    if data:
-        for name in data:
-            lines.append(b"--" + boundary)
-            lines.append(b'Content-Disposition: form-data; name="%s"' % name)
-            lines.append(b"")
-            lines.append(data[name])
-
-    if file is not None:
-        lines.append(b"--" + boundary)
-        lines.append(b'Content-Disposition: form-data; name="file"; filename="%s"' % (filename))
-        lines.append(b"")
-        lines.append(file.read())
-
-    lines.append(b"--" + boundary + b"--")
-    lines.append(b"")
-
-    return {b"content-type": b"multipart/form-data; boundary=" + boundary}, b"\r\n".join(lines)
+from mrequests.multipart import MultipartEncoder
 
 
 def upload_file(url, filename, **kw):
-    with open(filename, "rb") as fp:
-        if "/" in filename:
-            filename = filename.rsplit("/", 1)[1]
+    encoder = MultipartEncoder()
 
-        headers, data = create_multipart_request(fp, filename.encode("ascii"), data=kw)
+    for name in kw:
+        encoder.add_field(name, kw[name])
 
-    return mrequests.post(url, headers=headers, data=data)
+    encoder.add_file("file", filename)
+    return mrequests.post(url, data=encoder)
 
 
 if __name__ == "__main__":
@@ -3,7 +3,7 @@
 # Install mrequests to a MicroPython board using mpremote
 
 PKG="mrequests"
-MODULES=('__init__.py' 'mrequests.py' 'urlencode.py' 'urlparseqs.py' 'urlunquote.py')
+MODULES=('__init__.py' 'aio.py' 'cache.py' 'download.py' 'jsonstream.py' 'memprof.py' 'mrequests.py' 'multi.py' 'multipart.py' 'pollclient.py' 'resolver.py' 'retry.py' 'session.py' 'trace.py' 'urlencode.py' 'urlparseqs.py' 'urlunquote.py')
 MPYDIR="build/$PKG"
 DESTDIR="${DESTDIR:-:/lib}"
 
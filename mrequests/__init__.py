@@ -1,6 +1,8 @@
 from .mrequests import (
     MAX_READ_SIZE,
+    HeaderMap,
     RequestContext,
+    RequestTemplate,
     Response,
     delete,
     encode_basic_auth,
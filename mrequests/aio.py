@@ -0,0 +1,488 @@
+"""An asyncio-based HTTP client with an API similar to mrequests, using async functions."""
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+from .mrequests import (
+    MAX_READ_SIZE,
+    RequestContext,
+    Response as _Response,
+    _add_params,
+    _default_ssl_context,
+    _LineBuffer,
+    _encode_request,
+    _parse_head,
+    _prepare_data,
+    encode_basic_auth,
+)
+
+
+async def _wait(coro, timeout):
+    if timeout is None:
+        return await coro
+
+    return await asyncio.wait_for(coro, timeout)
+
+
+async def _read_head(reader):
+    # Read the response head up to and including the terminating empty line
+    readuntil = getattr(reader, "readuntil", None)
+
+    if readuntil is not None:
+        return await readuntil(b"\r\n\r\n")
+
+    lines = []
+
+    while True:
+        l = await reader.readline()
+
+        if not l:
+            raise OSError("Connection closed by server.")
+
+        lines.append(l)
+
+        if l == b"\r\n" and len(lines) > 1:
+            return b"".join(lines)
+
+
+class _ContentIterator:
+    # Async iterator over the body in chunks (MicroPython has no async generators)
+
+    def __init__(self, resp, chunk_size, buf):
+        self.resp = resp
+        self.chunk_size = chunk_size
+        self.buf = buf
+
+        if buf is not None:
+            self.mv = memoryview(buf)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        buf = self.buf
+
+        if buf is None:
+            chunk = await self.resp.read(self.chunk_size)
+        else:
+            num_read = await self.resp.readinto(buf, min(self.chunk_size or len(buf), len(buf)))
+            chunk = self.mv[:num_read] if num_read else None
+
+        if not chunk:
+            raise StopAsyncIteration
+
+        return chunk
+
+
+class _LineIterator:
+    # Async iterator over the lines of the body
+
+    def __init__(self, resp, buf, keepends):
+        self.resp = resp
+        self.lines = _LineBuffer(buf, keepends)
+        self.eof = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        lines = self.lines
+
+        while True:
+            line = lines.next_line(self.eof)
+
+            if line is not None:
+                return line
+
+            if self.eof:
+                raise StopAsyncIteration
+
+            num_read = await self.resp.readinto(lines.space())
+
+            if num_read:
+                lines.end += num_read
+            else:
+                self.eof = True
+
+
+class _JSONIterator:
+    # Async iterator over the values at a path in the JSON body
+
+    def __init__(self, resp, path, buf):
+        from .jsonstream import JSONStreamParser
+
+        self.resp = resp
+        self.buf = bytearray(MAX_READ_SIZE) if buf is None else buf
+        self.parser = JSONStreamParser(path)
+        self.values = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            if self.values is not None:
+                for value in self.values:
+                    return value
+
+                self.values = None
+
+            parser = self.parser
+
+            if parser is None:
+                raise StopAsyncIteration
+
+            num_read = await self.resp.readinto(self.buf)
+
+            if num_read:
+                self.values = parser.feed(memoryview(self.buf)[:num_read])
+            else:
+                self.parser = None
+
+                if parser._capture:
+                    return parser.finish()
+
+
+class Response(_Response):
+    """Response with async methods for reading the body.
+
+    The content and text properties return awaitables, json() is a coroutine method.
+    iter_content(), iter_lines() and iter_json() return async iterators, to be used with
+    'async for'.
+
+    """
+
+    def __init__(self, reader, writer, save_headers=False, timeout=None):
+        super().__init__(writer, reader, save_headers=save_headers)
+        self._timeout = timeout
+
+    async def _read_raw(self, size=None):
+        data = self._pending
+
+        if data:
+            if size is not None and size < len(data):
+                self._pending = data[size:]
+                return data[:size]
+
+            self._pending = b""
+            return data
+
+        return await _wait(self._sf.read(-1 if size is None else size), self._timeout)
+
+    async def _read_exactly(self, size):
+        data = await self._read_raw(size)
+
+        while len(data) < size:
+            more = await self._read_raw(size - len(data))
+
+            if not more:
+                break
+
+            data += more
+
+        return data
+
+    async def _readinto_raw(self, buf, size=0):
+        size = size or len(buf)
+        data = self._pending
+
+        if not data:
+            readinto = getattr(self._sf, "readinto", None)
+
+            if readinto is not None:
+                return await _wait(readinto(memoryview(buf)[:size]), self._timeout)
+
+            data = await _wait(self._sf.read(size), self._timeout)
+
+        n = min(len(data), size)
+        buf[:n] = data[:n]
+        self._pending = data[n:]
+        return n
+
+    async def _readline_raw(self):
+        data = self._pending
+
+        if data:
+            idx = data.find(b"\n")
+
+            if idx >= 0:
+                self._pending = data[idx + 1:]
+                return data[:idx + 1]
+
+            self._pending = b""
+            return data + await _wait(self._sf.readline(), self._timeout)
+
+        return await _wait(self._sf.readline(), self._timeout)
+
+    async def _next_chunk(self):
+        l = await self._readline_raw()
+
+        if not l:
+            return 0
+
+        # ignore chunk extensions
+        self._chunk_size = max(0, int(l.split(b";", 1)[0].strip(), 16))
+
+        if self._chunk_size == 0:
+            # End of message, skip trailer
+            while l not in (b"\r\n", b"\n"):
+                l = await self._readline_raw()
+
+                if not l:
+                    raise ValueError("Expected final chunk separator, read end of stream instead.")
+
+            self._body_done()
+
+        return self._chunk_size
+
+    async def _chunk_read(self, num_read):
+        self._chunk_size -= num_read
+
+        if self._chunk_size == 0:
+            sep = await self._read_exactly(2)
+
+            if sep != b"\r\n":
+                raise ValueError("Expected chunk separator, read %r instead." % sep)
+
+    async def read(self, size=MAX_READ_SIZE):
+        if self._remain == 0:
+            return b""
+
+        if not size:
+            # read complete body
+            data = []
+
+            while True:
+                chunk = await self.read(MAX_READ_SIZE)
+
+                if not chunk:
+                    return b"".join(data)
+
+                data.append(chunk)
+
+        if self.chunked:
+            if self._chunk_size == 0 and not await self._next_chunk():
+                return b""
+
+            data = await self._read_raw(min(size, self._chunk_size))
+
+            if data:
+                await self._chunk_read(len(data))
+
+            return data
+        elif self._remain is None:
+            data = await self._read_raw(size)
+
+            if not data:
+                self._body_done()
+
+            return data
+        else:
+            data = await self._read_raw(min(size, self._remain))
+            self._remain -= len(data)
+
+            if not data or self._remain <= 0:
+                self._body_done()
+
+            return data
+
+    async def readinto(self, buf, size=0):
+        remain = self._remain
+
+        if remain == 0:
+            return 0
+
+        if self.chunked:
+            if self._chunk_size == 0 and not await self._next_chunk():
+                return 0
+
+            num_read = await self._readinto_raw(buf, min(size or len(buf), self._chunk_size))
+
+            if num_read:
+                await self._chunk_read(num_read)
+
+            return num_read
+
+        if remain is not None and remain < (size or len(buf)):
+            size = remain
+
+        num_read = await self._readinto_raw(buf, size)
+
+        if remain is None:
+            if not num_read:
+                self._body_done()
+        else:
+            self._remain -= num_read
+
+            if not num_read or self._remain <= 0:
+                self._body_done()
+
+        return num_read
+
+    async def save(self, fn, buf=None, chunk_size=0):
+        with open(fn, "wb") as fobj:
+            return await self.saveinto(fobj, buf, chunk_size)
+
+    async def saveinto(self, fobj, buf=None, chunk_size=0):
+        if buf:
+            mv = memoryview(buf)
+
+        while True:
+            if buf:
+                num_read = await self.readinto(buf, chunk_size)
+
+                if not num_read:
+                    break
+
+                fobj.write(mv[:num_read])
+            else:
+                chunk = await self.read(chunk_size or MAX_READ_SIZE)
+
+                if not chunk:
+                    break
+
+                fobj.write(chunk)
+
+    def iter_content(self, chunk_size=MAX_READ_SIZE, buf=None):
+        return _ContentIterator(self, chunk_size, buf)
+
+    def iter_lines(self, buf=None, keepends=False):
+        return _LineIterator(self, buf, keepends)
+
+    def iter_json(self, path="item", buf=None):
+        return _JSONIterator(self, path, buf)
+
+    def _release(self):
+        if self._sock:
+            self._sock.close()
+
+        self._sf = None
+        self._sock = None
+
+    async def _content(self):
+        if self._cached is None:
+            try:
+                self._cached = await self.read(size=None)
+            finally:
+                self._release()
+        return self._cached
+
+    @property
+    def content(self):
+        return self._content()
+
+    async def _text(self):
+        return str(await self._content(), self.encoding)
+
+    @property
+    def text(self):
+        return self._text()
+
+    async def json(self):
+        try:
+            import json
+        except ImportError:
+            import ujson as json
+
+        return json.loads(await self._content())
+
+
+async def _open_connection(ctx, ssl_context=None):
+    if ctx.scheme == "https":
+        if ssl_context is None:
+            ssl_context = _default_ssl_context()
+
+        return await asyncio.open_connection(
+            ctx.host, ctx.port, ssl=ssl_context, server_hostname=ctx.host
+        )
+
+    return await asyncio.open_connection(ctx.host, ctx.port)
+
+
+async def head(url, **kw):
+    return await request("HEAD", url, **kw)
+
+
+async def get(url, **kw):
+    return await request("GET", url, **kw)
+
+
+async def post(url, **kw):
+    return await request("POST", url, **kw)
+
+
+async def put(url, **kw):
+    return await request("PUT", url, **kw)
+
+
+async def patch(url, **kw):
+    return await request("PATCH", url, **kw)
+
+
+async def delete(url, **kw):
+    return await request("DELETE", url, **kw)
+
+
+async def request(
+    method,
+    url,
+    data=None,
+    json=None,
+    headers={},
+    auth=None,
+    encoding=None,
+    response_class=Response,
+    save_headers=False,
+    max_redirects=1,
+    timeout=None,
+    ssl_context=None,
+    params=None
+):
+    if auth:
+        headers.update(auth if callable(auth) else encode_basic_auth(auth[0], auth[1]))
+
+    data, content_type = _prepare_data(data, json, encoding)
+    ctx = RequestContext(_add_params(url, params), method)
+
+    while True:
+        if ctx.scheme not in ("http", "https"):
+            raise ValueError("Protocol scheme %s not supported." % ctx.scheme)
+
+        ctx.redirect = False
+        reader, writer = await _wait(_open_connection(ctx, ssl_context), timeout)
+
+        try:
+            parts, body, size = _encode_request(ctx, headers, data, content_type)
+
+            if body is not None:
+                if not isinstance(body, (bytes, bytearray)):
+                    raise TypeError("Only bytes or str request body data supported.")
+
+                parts.append(body)
+
+            writer.write(b"".join(parts))
+            await _wait(writer.drain(), timeout)
+            resp = response_class(reader, writer, save_headers=save_headers, timeout=timeout)
+            location = _parse_head(resp, await _wait(_read_head(reader), timeout))
+
+            if location is not None:
+                ctx.set_location(resp.status_code, location)
+        except:
+            writer.close()
+            raise
+
+        resp._init_body(ctx.method)
+
+        if ctx.redirect:
+            # print("Redirect to: %s" % ctx.url)
+            resp.close()
+            max_redirects -= 1
+
+            if max_redirects < 0:
+                raise ValueError("Maximum redirection count exceeded.")
+        else:
+            break
+
+    return resp
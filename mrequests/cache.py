@@ -0,0 +1,309 @@
+"""HTTP response cache with ETag / Last-Modified revalidation for mrequests."""
+
+try:
+    import json
+except ImportError:
+    import ujson as json
+
+try:
+    from io import BytesIO
+except ImportError:
+    from uio import BytesIO
+
+import os
+from time import time
+
+from .mrequests import MAX_READ_SIZE, Response, _add_params, request
+
+
+class CacheResponse(Response):
+    """Response class, which stores the headers needed for caching as attributes.
+
+    Responses returned from the cache have their from_cache attribute set to True.
+
+    """
+
+    def __init__(self, sock, sockfile, save_headers=False):
+        super().__init__(sock, sockfile, save_headers)
+        self.etag = None
+        self.last_modified = None
+        self.max_age = None
+        self.no_store = False
+        self.from_cache = False
+
+    def add_header(self, data):
+        super().add_header(data)
+        name = data[:14].lower()
+
+        if name.startswith(b"etag:"):
+            self.etag = data[5:].strip().decode()
+        elif name == b"last-modified:":
+            self.last_modified = data[14:].strip().decode()
+        elif name == b"cache-control:":
+            for directive in data[14:].lower().split(b","):
+                directive = directive.strip()
+
+                if directive.startswith(b"max-age="):
+                    try:
+                        self.max_age = int(directive[8:])
+                    except ValueError:
+                        pass
+                elif directive == b"no-cache":
+                    self.max_age = 0
+                elif directive in (b"no-store", b"private"):
+                    self.no_store = True
+
+
+def _cached_response(fobj, meta):
+    # Return a response, which reads the cached body from fobj
+    resp = CacheResponse(fobj, fobj)
+    resp.status_code = 200
+    resp.reason = b"OK"
+    resp.from_cache = True
+    resp.encoding = meta["encoding"]
+    resp.content_encoding = meta["content_encoding"]
+    resp.etag = meta["etag"]
+    resp.last_modified = meta["last_modified"]
+    resp._content_size = resp._remain = meta["size"]
+    return resp
+
+
+class _Cache:
+    # Base class of caches implementing the request logic. Sub-classes implement lookup(),
+    # open(), store(), update() and remove().
+
+    def __init__(self, max_item_size=None):
+        self.max_item_size = max_item_size
+
+    def request(self, method, url, headers={}, **kw):
+        """Perform a request via request(), using the cache for GET requests.
+
+        If a fresh entry for the URL is in the cache, it is returned without sending a request.
+        Otherwise the request is sent with If-None-Match and / or If-Modified-Since headers, if
+        the URL is cached, and the cached body is returned, if the server answers with 304 Not
+        Modified. The response_class keyword argument is ignored for GET requests.
+
+        """
+        # the cache key is the URL with the query parameters
+        url = _add_params(url, kw.pop("params", None))
+
+        if method != "GET":
+            resp = request(method, url, headers=headers, **kw)
+
+            if method != "HEAD":
+                self.remove(url)
+
+            return resp
+
+        meta = self.lookup(url)
+
+        if meta is not None:
+            if meta["expires"] is not None and time() < meta["expires"]:
+                return self.open(url, meta)
+
+            headers = headers.copy()
+
+            if meta["etag"]:
+                headers[b"If-None-Match"] = meta["etag"].encode()
+
+            if meta["last_modified"]:
+                headers[b"If-Modified-Since"] = meta["last_modified"].encode()
+
+        kw["response_class"] = CacheResponse
+        resp = request(method, url, headers=headers, **kw)
+
+        if resp.status_code == 304 and meta is not None:
+            resp.close()
+
+            if resp.max_age is not None:
+                meta["expires"] = time() + resp.max_age
+                self.update(url, meta)
+
+            return self.open(url, meta)
+
+        if resp.status_code != 200 or resp.no_store or resp._remain == 0:
+            return resp
+
+        if not (resp.etag or resp.last_modified or resp.max_age):
+            return resp
+
+        size = resp._remain
+
+        if size is not None and self.max_item_size is not None and size > self.max_item_size:
+            return resp
+
+        meta = {
+            "etag": resp.etag,
+            "last_modified": resp.last_modified,
+            "expires": None if resp.max_age is None else time() + resp.max_age,
+            "encoding": resp.encoding,
+            "content_encoding": None if resp._decoder else resp.content_encoding,
+            "size": size,
+        }
+        return self.store(url, meta, resp)
+
+    def head(self, url, **kw):
+        return self.request("HEAD", url, **kw)
+
+    def get(self, url, **kw):
+        return self.request("GET", url, **kw)
+
+    def post(self, url, **kw):
+        return self.request("POST", url, **kw)
+
+    def put(self, url, **kw):
+        return self.request("PUT", url, **kw)
+
+    def patch(self, url, **kw):
+        return self.request("PATCH", url, **kw)
+
+    def delete(self, url, **kw):
+        return self.request("DELETE", url, **kw)
+
+
+class MemoryCache(_Cache):
+    """Cache response bodies in memory.
+
+    max_size: maximum total size of all cached bodies in bytes. If exceeded, the least recently
+        used entries are evicted.
+
+    max_item_size: maximum size of a single cached body. Defaults to max_size.
+
+    """
+
+    def __init__(self, max_size=16 * 1024, max_item_size=None):
+        super().__init__(max_size if max_item_size is None else max_item_size)
+        self.max_size = max_size
+        self.size = 0
+        # list of [url, meta, body], least recently used first
+        self._entries = []
+
+    def _find(self, url):
+        entries = self._entries
+
+        for i in range(len(entries)):
+            if entries[i][0] == url:
+                return i
+
+    def lookup(self, url):
+        idx = self._find(url)
+
+        if idx is not None:
+            entry = self._entries.pop(idx)
+            self._entries.append(entry)
+            return entry[1]
+
+    def open(self, url, meta):
+        return _cached_response(BytesIO(self._entries[self._find(url)][2]), meta)
+
+    def store(self, url, meta, resp):
+        body = resp.content
+
+        if len(body) <= self.max_item_size:
+            self.remove(url)
+            meta["size"] = len(body)
+            self._entries.append([url, meta, body])
+            self.size += len(body)
+
+            while self.size > self.max_size:
+                self.size -= len(self._entries.pop(0)[2])
+
+        return resp
+
+    def update(self, url, meta):
+        pass
+
+    def remove(self, url):
+        idx = self._find(url)
+
+        if idx is not None:
+            self.size -= len(self._entries.pop(idx)[2])
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        self._entries = []
+        self.size = 0
+
+
+class FileCache(_Cache):
+    """Cache response bodies in files in the given directory, e.g. on flash.
+
+    Each entry is stored in two files, one containing the body and one the JSON-encoded
+    metadata. Bodies are streamed to and from the files, so even large bodies need only
+    little memory.
+
+    max_item_size: maximum size of a single cached body. Defaults to unlimited.
+
+    """
+
+    def __init__(self, directory, max_item_size=None):
+        super().__init__(max_item_size)
+        self.directory = directory
+
+        try:
+            os.mkdir(directory)
+        except OSError:
+            pass
+
+    def _filename(self, url):
+        try:
+            from hashlib import sha256
+        except ImportError:
+            from uhashlib import sha256
+
+        try:
+            from binascii import hexlify
+        except ImportError:
+            from ubinascii import hexlify
+
+        return "%s/%s" % (self.directory, hexlify(sha256(url.encode()).digest()[:12]).decode())
+
+    def lookup(self, url):
+        try:
+            with open(self._filename(url) + ".meta") as fobj:
+                meta = json.loads(fobj.read())
+        except (OSError, ValueError):
+            return
+
+        if meta.get("url") == url:
+            return meta
+
+    def open(self, url, meta):
+        return _cached_response(open(self._filename(url) + ".body", "rb"), meta)
+
+    def store(self, url, meta, resp):
+        fn = self._filename(url)
+        meta["url"] = url
+
+        try:
+            with open(fn + ".tmp", "wb") as fobj:
+                resp.saveinto(fobj, bytearray(MAX_READ_SIZE))
+                meta["size"] = fobj.tell()
+        except:
+            self._remove(fn + ".tmp")
+            raise
+        finally:
+            resp.close()
+
+        self.remove(url)
+        os.rename(fn + ".tmp", fn + ".body")
+        self.update(url, meta)
+        cached = self.open(url, meta)
+        cached.from_cache = False
+        cached.headers = resp.headers
+        return cached
+
+    def update(self, url, meta):
+        with open(self._filename(url) + ".meta", "w") as fobj:
+            fobj.write(json.dumps(meta))
+
+    def remove(self, url):
+        fn = self._filename(url)
+        self._remove(fn + ".meta")
+        self._remove(fn + ".body")
+
+    def _remove(self, fn):
+        try:
+            os.remove(fn)
+        except OSError:
+            pass
@@ -0,0 +1,273 @@
+"""Resumable and parallel downloads of large files using HTTP range requests."""
+
+import os
+
+try:
+    import json
+except ImportError:
+    import ujson as json
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+from .mrequests import MAX_READ_SIZE, Response, _add_params, request
+
+# Minimum size of the byte ranges downloaded in parallel
+MIN_RANGE_SIZE = 64 * 1024
+
+
+def _parse_content_range(value):
+    # Parse 'bytes <first>-<last>/<length>' into a (first, last, length) tuple.
+    # first and last are None for 'bytes */<length>', length is None for an unknown length.
+    try:
+        unit, spec = value.strip().split(None, 1)
+        spec, length = spec.split(b"/", 1)
+        length = None if length.strip() == b"*" else int(length)
+
+        if spec.strip() == b"*":
+            return None, None, length
+
+        first, last = spec.split(b"-", 1)
+        return int(first), int(last), length
+    except ValueError:
+        pass
+
+
+class DownloadResponse(Response):
+    """Response class, which stores the headers needed for range requests as attributes."""
+
+    def __init__(self, sock, sockfile, save_headers=False):
+        super().__init__(sock, sockfile, save_headers)
+        self.accept_ranges = False
+        self.content_range = None
+        self.etag = None
+        self.last_modified = None
+
+    def add_header(self, data):
+        super().add_header(data)
+        name = data[:14].lower()
+
+        if name.startswith(b"etag:"):
+            etag = data[5:].strip()
+
+            # weak entity tags must not be used with If-Range
+            if not etag.startswith(b"W/"):
+                self.etag = etag.decode()
+        elif name == b"last-modified:":
+            self.last_modified = data[14:].strip().decode()
+        elif name == b"content-range:":
+            self.content_range = _parse_content_range(data[14:])
+        elif name == b"accept-ranges:":
+            self.accept_ranges = b"bytes" in data[14:]
+
+    @property
+    def validator(self):
+        """The value for an If-Range header, i.e. the strong ETag or last modification date."""
+        return self.etag or self.last_modified
+
+
+def _load_meta(fn):
+    try:
+        with open(fn) as fobj:
+            return json.loads(fobj.read())
+    except (OSError, ValueError):
+        pass
+
+
+def _save_meta(fn, url, length, validator):
+    with open(fn, "w") as fobj:
+        fobj.write(json.dumps({"url": url, "length": length, "validator": validator}))
+
+
+def _remove(fn):
+    try:
+        os.remove(fn)
+    except OSError:
+        pass
+
+
+def _size(fn):
+    try:
+        return os.stat(fn)[6]
+    except OSError:
+        return 0
+
+
+def _finish(filename, part_fn, meta_fn):
+    _remove(filename)
+    os.rename(part_fn, filename)
+    _remove(meta_fn)
+
+
+def _check_status(resp):
+    if resp.status_code not in (200, 206):
+        resp.close()
+        raise OSError("Download failed: %i %s" % (resp.status_code, str(resp.reason, "utf-8")))
+
+
+def download(url, filename, buf=None, resume=True, parts=1, headers={}, **kw):
+    """Download url to a file with given name and return the size of the file.
+
+    The data is saved to a file named filename + '.part' first, which is renamed when the
+    download is complete. If the server sent a Content-Length and an ETag or Last-Modified
+    header, these are stored in a file named filename + '.meta'. If resume is true and the
+    download was interrupted before, the next call only requests the missing data with a
+    Range request. The server only sends the range (206 Partial Content), if the file on the
+    server is unchanged according to the If-Range header, otherwise the whole file is
+    downloaded again.
+
+    buf is an optional bytearray used to read the response body (see Response.saveinto).
+
+    If parts is greater than 1, ThreadPoolExecutor is available (i.e. on CPython) and the server
+    supports range requests, the file is split into (at most) parts byte ranges, which are
+    downloaded in parallel. These downloads can not be resumed.
+
+    Additional keyword arguments are passed to request(). Do not pass a session, when
+    downloading in parallel.
+
+    """
+    # the URL stored in the meta data file includes the query parameters
+    url = _add_params(url, kw.pop("params", None))
+    part_fn = filename + ".part"
+    meta_fn = filename + ".meta"
+
+    if parts > 1 and ThreadPoolExecutor is not None:
+        size = _download_parallel(url, part_fn, parts, buf, headers, kw)
+
+        if size is not None:
+            _finish(filename, part_fn, meta_fn)
+            return size
+
+    meta = _load_meta(meta_fn) if resume else None
+    offset = 0
+
+    if meta and meta.get("url") == url and meta.get("validator"):
+        offset = _size(part_fn)
+
+        if offset > meta["length"]:
+            offset = 0
+
+    if offset:
+        headers = headers.copy()
+        headers[b"Range"] = b"bytes=%d-" % offset
+        headers[b"If-Range"] = meta["validator"].encode()
+
+    resp = request("GET", url, headers=headers, response_class=DownloadResponse, **kw)
+
+    if offset and resp.status_code == 416:
+        # Requested range is past the end of the file, maybe it's already complete
+        crange = resp.content_range
+        resp.close()
+
+        if crange and crange[2] == offset == meta["length"]:
+            _finish(filename, part_fn, meta_fn)
+            return offset
+
+        _remove(meta_fn)
+        raise OSError("Server rejected range request for partial file.")
+
+    _check_status(resp)
+
+    try:
+        if resp.status_code == 206 and offset:
+            crange = resp.content_range
+
+            if crange is None or crange[0] != offset or crange[2] != meta["length"]:
+                _remove(meta_fn)
+                raise OSError("Server sent unexpected content range %r." % (crange,))
+
+            length = meta["length"]
+            mode = "ab"
+        elif resp.status_code == 200:
+            # Not resuming or the file on the server has changed
+            length = resp._remain
+
+            if length is not None and resp.validator:
+                _save_meta(meta_fn, url, length, resp.validator)
+            else:
+                _remove(meta_fn)
+
+            mode = "wb"
+        else:
+            raise OSError("Unexpected partial content response.")
+
+        with open(part_fn, mode) as fobj:
+            resp.saveinto(fobj, buf)
+    finally:
+        resp.close()
+
+    size = _size(part_fn)
+
+    if length is not None and size != length:
+        raise OSError("Download incomplete: got %i of %i bytes." % (size, length))
+
+    _finish(filename, part_fn, meta_fn)
+    return size
+
+
+def _fetch_range(url, fn, first, last, validator, bufsize, headers, kw):
+    headers = headers.copy()
+    headers[b"Range"] = b"bytes=%d-%d" % (first, last)
+
+    if validator:
+        headers[b"If-Range"] = validator.encode()
+
+    resp = request("GET", url, headers=headers, response_class=DownloadResponse, **kw)
+
+    try:
+        _check_status(resp)
+        crange = resp.content_range
+
+        if resp.status_code != 206 or crange is None or crange[:2] != (first, last):
+            raise OSError("Server did not send requested range %i-%i." % (first, last))
+
+        with open(fn, "r+b") as fobj:
+            fobj.seek(first)
+            resp.saveinto(fobj, bytearray(bufsize))
+
+            if fobj.tell() != last + 1:
+                raise OSError("Download of range %i-%i incomplete." % (first, last))
+    finally:
+        resp.close()
+
+
+def _download_parallel(url, fn, parts, buf, headers, kw):
+    # Download byte ranges in parallel into a pre-allocated file. Returns the file size or
+    # None, if the server doesn't support range requests or the file is too small.
+    resp = request("HEAD", url, headers=headers, response_class=DownloadResponse, **kw)
+    resp.close()
+    _check_status(resp)
+    length = resp._content_size
+
+    if not resp.accept_ranges or length < 2 * MIN_RANGE_SIZE:
+        return
+
+    parts = min(parts, length // MIN_RANGE_SIZE)
+    range_size = (length + parts - 1) // parts
+    bufsize = len(buf) if buf else MAX_READ_SIZE
+
+    with open(fn, "wb") as fobj:
+        fobj.truncate(length)
+
+    with ThreadPoolExecutor(parts) as executor:
+        futures = [
+            executor.submit(
+                _fetch_range,
+                url,
+                fn,
+                first,
+                min(first + range_size, length) - 1,
+                resp.validator,
+                bufsize,
+                headers,
+                kw,
+            )
+            for first in range(0, length, range_size)
+        ]
+
+        for future in futures:
+            future.result()
+
+    return length
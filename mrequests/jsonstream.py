@@ -0,0 +1,210 @@
+"""Incremental streaming JSON parser yielding selected items from large JSON documents."""
+
+try:
+    from json import loads
+except ImportError:
+    from ujson import loads
+
+from .mrequests import MAX_READ_SIZE
+
+_WS = b" \t\r\n"
+_SCALAR_END = b" \t\r\n,]}"
+_QUOTE = ord('"')
+_BACKSLASH = ord("\\")
+_COLON = ord(":")
+_COMMA = ord(",")
+_LBRACE = ord("{")
+_RBRACE = ord("}")
+_LBRACKET = ord("[")
+_RBRACKET = ord("]")
+
+
+class JSONStreamParser:
+    """Parse a JSON document fed in chunks and return values at the given path.
+
+    The path selects the values to return using the same notation as ijson's prefixes:
+    object keys and 'item' for elements of arrays, separated by dots. For example, 'item'
+    selects the elements of a top-level array, 'data.item.name' the 'name' member of all
+    objects in the array, which is the value of the 'data' member of the top-level object,
+    and '' selects the whole document.
+
+    Only the bytes of the selected values are collected and decoded with json.loads, everything
+    else is just scanned, so memory usage depends on the size of the selected values only.
+
+    """
+
+    def __init__(self, path="item"):
+        self.target = path.split(".") if path else []
+        # list of [opening bracket, expecting key] lists for all open containers
+        self._stack = []
+        self._path = []
+        self._capture = None
+        self._depth = 0
+        self._string = False
+        self._escape = False
+        self._scalar = False
+        self._key = None
+
+    def _start_value(self, c):
+        # Called at the first byte of a value. Returns True, if the value is captured.
+        if self._path == self.target:
+            self._capture = bytearray()
+            self._depth = 0
+            return True
+
+        if c == _LBRACE:
+            self._stack.append([_LBRACE, True])
+            self._path.append(None)
+        elif c == _LBRACKET:
+            self._stack.append([_LBRACKET, False])
+            self._path.append("item")
+        elif c == _QUOTE:
+            self._string = True
+        else:
+            self._scalar = True
+
+        return False
+
+    def _end_container(self):
+        self._stack.pop()
+        self._path.pop()
+
+    def feed(self, data):
+        """Parse the next chunk of the document and yield the selected values completed by it."""
+        stack = self._stack
+
+        for c in data:
+            capture = self._capture
+
+            if capture is not None:
+                if self._string:
+                    capture.append(c)
+
+                    if self._escape:
+                        self._escape = False
+                    elif c == _BACKSLASH:
+                        self._escape = True
+                    elif c == _QUOTE:
+                        self._string = False
+
+                        if not self._depth:
+                            yield self._finish()
+
+                    continue
+
+                if self._scalar and not self._depth:
+                    if c not in _SCALAR_END:
+                        capture.append(c)
+                        continue
+
+                    self._scalar = False
+                    yield self._finish()
+                    # process delimiter below
+                else:
+                    capture.append(c)
+
+                    if c == _QUOTE:
+                        self._string = True
+                    elif c in (_LBRACE, _LBRACKET):
+                        self._depth += 1
+                    elif c in (_RBRACE, _RBRACKET):
+                        self._depth -= 1
+
+                        if not self._depth:
+                            yield self._finish()
+
+                    continue
+
+            if self._string:
+                key = self._key
+
+                if self._escape:
+                    self._escape = False
+                elif c == _BACKSLASH:
+                    self._escape = True
+                elif c == _QUOTE:
+                    self._string = False
+
+                    if key is not None:
+                        self._path[-1] = str(key, "utf-8") if _BACKSLASH not in key else loads(
+                            b'"' + key + b'"'
+                        )
+                        self._key = None
+
+                    continue
+
+                if key is not None:
+                    key.append(c)
+
+                continue
+
+            if self._scalar:
+                if c not in _SCALAR_END:
+                    continue
+
+                self._scalar = False
+
+            if c in _WS:
+                continue
+
+            top = stack[-1] if stack else None
+
+            if c == _COMMA:
+                if top is not None and top[0] == _LBRACE:
+                    top[1] = True
+            elif c == _COLON:
+                top[1] = False
+            elif c in (_RBRACE, _RBRACKET):
+                self._end_container()
+            elif top is not None and top[0] == _LBRACE and top[1]:
+                if c == _QUOTE:
+                    self._string = True
+                    self._key = bytearray()
+            elif self._start_value(c):
+                # first byte of captured value
+                self._capture.append(c)
+
+                if c == _QUOTE:
+                    self._string = True
+                elif c in (_LBRACE, _LBRACKET):
+                    self._depth = 1
+                else:
+                    self._scalar = True
+
+    def finish(self):
+        """Return the selected value at the end of the document, if any (e.g. a number)."""
+        if self._capture:
+            self._scalar = False
+            return self._finish()
+
+    def _finish(self):
+        value = loads(bytes(self._capture))
+        self._capture = None
+        return value
+
+
+def iter_json(stream, path="item", buf=None):
+    """Yield the values at the given path from a JSON document read from stream.
+
+    stream is an object with a readinto method, e.g. a Response instance or a file object.
+    The document is read in chunks into buf, a bytearray (or memoryview), which is allocated
+    with a size of MAX_READ_SIZE, if not given. See JSONStreamParser for the path syntax.
+
+    """
+    if buf is None:
+        buf = bytearray(MAX_READ_SIZE)
+
+    mv = memoryview(buf)
+    parser = JSONStreamParser(path)
+
+    while True:
+        num_read = stream.readinto(buf)
+
+        if not num_read:
+            break
+
+        for value in parser.feed(mv[:num_read]):
+            yield value
+
+    if parser._capture:
+        yield parser.finish()
@@ -0,0 +1,170 @@
+"""Profiling of memory allocation in the phases of requests and response body reads."""
+
+import gc
+
+from .mrequests import MICROPY
+from .trace import Tracer
+
+if not MICROPY:
+    import tracemalloc
+
+# Phases recorded when the event, which ends them, is emitted
+_PHASES = {
+    "resolve_start": "prepare",
+    "connection_reused": "prepare",
+    "resolve_end": "resolve",
+    "connect_end": "connect",
+    "tls_end": "tls",
+    "headers_sent": "serialize",
+    "request_sent": "send",
+    "status_received": "read head",
+    "headers_parsed": "parse head",
+}
+
+
+class MemoryProfiler(Tracer):
+    """Record the memory allocated in each phase of requests, when passed as hooks to request().
+
+    Profiling has to be started with start() (or by using the profiler as a context manager)
+    before sending the requests. This disables the garbage collector on MicroPython, so that
+    the bytes allocated can be calculated from gc.mem_alloc(), and starts tracemalloc on CPython.
+
+    Each phase is measured from the end of the previous one (or the start of profiling):
+    prepare (until a connection is opened or re-used), resolve, connect, tls, serialize (until
+    the request head is written), send (the request body), read head and parse head. Calls of
+    the read, readinto and saveinto methods of responses passed to track() are recorded
+    as phases with these names.
+
+    For each phase, a (name, allocated, high water mark) tuple is appended to the records list.
+    On MicroPython, allocated is the number of bytes allocated during the phase and the high
+    water mark the total size of the used heap at its end. On CPython, allocated is the peak
+    of the memory traced by tracemalloc during the phase minus the traced memory at its start
+    (since freed memory is re-used immediately) and the high water mark is that peak.
+
+    """
+
+    def __init__(self):
+        self.records = []
+        self._mark = None
+        self._depth = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        gc.collect()
+
+        if MICROPY:
+            gc.disable()
+        else:
+            tracemalloc.start()
+
+        self._mark = self._usage()
+
+    def stop(self):
+        if MICROPY:
+            gc.enable()
+        else:
+            tracemalloc.stop()
+
+        self._mark = None
+
+    def _usage(self):
+        if MICROPY:
+            return gc.mem_alloc()
+
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def _record(self, phase):
+        if MICROPY:
+            high = gc.mem_alloc()
+            allocated = high - self._mark
+        else:
+            high = tracemalloc.get_traced_memory()[1]
+            allocated = high - self._mark
+
+        self.records.append((phase, allocated, high))
+        # exclude the memory allocated for the record from the next phase
+        self._mark = self._usage()
+
+    def event(self, name, ctx, ts):
+        phase = _PHASES.get(name)
+
+        if phase is not None and self._mark is not None and not self._depth:
+            self._record(phase)
+
+    def _wrap(self, name, func):
+        def wrapper(*args, **kw):
+            if self._mark is None or self._depth:
+                return func(*args, **kw)
+
+            self._mark = self._usage()
+            self._depth += 1
+
+            try:
+                return func(*args, **kw)
+            finally:
+                self._depth -= 1
+                self._record(name)
+
+        return wrapper
+
+    def track(self, resp):
+        """Record each call of the read, readinto and saveinto methods of the response.
+
+        Reading the content property is recorded as a call of read. Returns the response.
+
+        """
+        for name in ("read", "readinto", "saveinto"):
+            setattr(resp, name, self._wrap(name, getattr(resp, name)))
+
+        return resp
+
+    def summary(self):
+        """Return a list of (phase, count, total, maximum allocated, high water mark) tuples.
+
+        The phases are listed in the order they were first recorded.
+
+        """
+        phases = {}
+        result = []
+
+        for name, allocated, high in self.records:
+            entry = phases.get(name)
+
+            if entry is None:
+                entry = phases[name] = [name, 0, 0, 0, 0]
+                result.append(entry)
+
+            entry[1] += 1
+            entry[2] += allocated
+            entry[3] = max(entry[3], allocated)
+            entry[4] = max(entry[4], high)
+
+        return [tuple(entry) for entry in result]
+
+    def report(self, verbose=False):
+        """Print a table of the allocations per phase.
+
+        If verbose is true, also print the heap information from micropython.mem_info(1) on
+        MicroPython.
+
+        """
+        print("%-12s %6s %10s %10s %10s" % ("phase", "count", "avg", "max", "high"))
+
+        for name, count, total, maximum, high in self.summary():
+            print("%-12s %6i %10i %10i %10i" % (name, count, total // count, maximum, high))
+
+        if verbose and MICROPY:
+            import micropython
+
+            micropython.mem_info(1)
+
+    def clear(self):
+        """Remove all records."""
+        self.records = []
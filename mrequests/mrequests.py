@@ -2,14 +2,47 @@
 
 import sys
 
+try:
+    import errno
+except ImportError:
+    import uerrno as errno
+
 try:
     import socket
 except ImportError:
     import usocket as socket
 
 
+try:
+    from time import ticks_diff, ticks_ms, ticks_us
+except ImportError:
+    from time import monotonic, perf_counter_ns
+
+    def ticks_ms():
+        return int(monotonic() * 1000)
+
+    def ticks_us():
+        return perf_counter_ns() // 1000
+
+    def ticks_diff(a, b):
+        return a - b
+
+
 MICROPY = sys.implementation.name == "micropython"
 MAX_READ_SIZE = 4 * 1024
+HEAD_BUF_SIZE = 1024
+MAX_HEAD_SIZE = 16 * 1024
+MAX_TLS_SESSIONS = 8
+ACCEPT_ENCODING = b"gzip, deflate"
+# Requests with these methods may be sent again without changing the outcome
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE")
+# Lengths of the names of the response headers parsed by Response and _parse_head, so other
+# headers can be skipped without lower-casing their names
+_FIELD_LENGTHS = (8, 10, 12, 14, 16, 17)
+
+_ssl_context = None
+# (ssl_context, host, port) -> TLS session
+_tls_sessions = {}
 
 
 def encode_basic_auth(user, password):
@@ -130,6 +163,231 @@ class RequestContext:
                 self.path = self.path.rsplit("/", 1)[0] + "/" + path
 
 
+def _find_newline(buf, start, end):
+    # bytearray has no find method on MicroPython
+    find = getattr(buf, "find", None)
+
+    if find is not None:
+        return find(b"\n", start, end)
+
+    for i in range(start, end):
+        if buf[i] == 10:
+            return i
+
+    return -1
+
+
+def _decoder(resp):
+    # Return an object with read() and readinto() methods, which decompresses the response body
+    try:
+        import deflate
+    except ImportError:
+        return _ZlibDecoder(resp)
+
+    import io
+
+    class _BodyStream(io.IOBase):
+        def readinto(self, buf):
+            return resp._readinto_body(buf)
+
+    return deflate.DeflateIO(_BodyStream(), deflate.AUTO)
+
+
+class _ZlibDecoder:
+    # Incremental gzip / zlib decompression of the response body using zlib.decompressobj
+
+    def __init__(self, resp):
+        import zlib
+
+        self._resp = resp
+        # auto-detect gzip or zlib header
+        self._zobj = zlib.decompressobj(47)
+        self._tail = b""
+
+    def read(self, size):
+        zobj = self._zobj
+
+        while not zobj.eof:
+            data = self._tail or self._resp._read_body(MAX_READ_SIZE)
+
+            if not data:
+                return zobj.flush()
+
+            data = zobj.decompress(data, size)
+            self._tail = zobj.unconsumed_tail
+
+            if data:
+                return data
+
+        return b""
+
+    def readinto(self, buf):
+        data = self.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+
+class HeaderMap:
+    """Response headers as a case-insensitive mapping of header names to values.
+
+    Keeps a reference to the raw response head and the offsets of the header lines in it
+    instead of a copy of each line. Values are only decoded, when they are looked up. If names
+    is a list of header names, only these headers are retained and the rest of the head is
+    discarded after parsing.
+
+    Iterating over a HeaderMap yields the header lines as bytes (without the line ending).
+
+    """
+
+    def __init__(self, names=None):
+        self._head = b""
+        # flat list of (line start, colon, line end) offsets into the head
+        self._index = []
+        self._names = None if names is None else [_lower_name(name) for name in names]
+        # lower-cased name -> list of values, for headers already looked up
+        self._values = {}
+
+    def _add(self, start, colon, end):
+        names = self._names
+
+        if names is not None:
+            size = colon - start
+
+            for name in names:
+                if len(name) == size and self._head[start:colon].lower() == name:
+                    break
+            else:
+                return
+
+        self._index += (start, colon, end)
+
+    def _compact(self):
+        # Copy only the retained header lines, so the complete head can be freed
+        head = self._head
+        index = self._index
+        parts = []
+        pos = 0
+
+        for i in range(0, len(index), 3):
+            start = index[i]
+            parts.append(head[start:index[i + 2]])
+            index[i] = pos
+            index[i + 1] += pos - start
+            pos += index[i + 2] - start
+            index[i + 2] = pos
+
+        self._head = b"".join(parts)
+
+    def __len__(self):
+        return len(self._index) // 3
+
+    def __iter__(self):
+        head = self._head
+        index = self._index
+
+        for i in range(0, len(index), 3):
+            yield head[index[i]:index[i + 2]]
+
+    def __contains__(self, name):
+        return bool(self.get_all(name))
+
+    def get_all(self, name):
+        """Return a list of the values of all headers with the given name (str or bytes)."""
+        name = _lower_name(name)
+        values = self._values.get(name)
+
+        if values is None:
+            head = self._head
+            index = self._index
+            size = len(name)
+            values = []
+
+            for i in range(0, len(index), 3):
+                start = index[i]
+                colon = index[i + 1]
+
+                if colon - start == size and head[start:colon].lower() == name:
+                    values.append(head[colon + 1:index[i + 2]].strip().decode())
+
+            self._values[name] = values
+
+        return values
+
+    def get(self, name, default=None):
+        """Return the value of the first header with the given name or default."""
+        values = self.get_all(name)
+        return values[0] if values else default
+
+    def items(self):
+        """Yield (name, value) tuples of all header lines in the order received."""
+        head = self._head
+        index = self._index
+
+        for i in range(0, len(index), 3):
+            colon = index[i + 1]
+            yield (
+                head[index[i]:colon].decode(),
+                head[colon + 1:index[i + 2]].strip().decode(),
+            )
+
+
+def _lower_name(name):
+    return (name.encode() if isinstance(name, str) else name).lower()
+
+
+class _LineBuffer:
+    # Buffer for splitting the response body into lines, shared by the iter_lines methods of
+    # the blocking and the asyncio response classes
+
+    def __init__(self, buf, keepends):
+        self.copy = buf is None
+        self.buf = bytearray(HEAD_BUF_SIZE) if buf is None else buf
+        self.mv = memoryview(self.buf)
+        self.keepends = keepends
+        self.start = self.end = 0
+
+    def next_line(self, eof):
+        # Return the next complete line (or the rest of the data at EOF) or None, if more data
+        # has to be read
+        buf = self.buf
+        start = self.start
+        idx = _find_newline(buf, start, self.end)
+
+        if idx < 0:
+            if not eof or start == self.end:
+                return None
+
+            line = self.mv[start:self.end]
+            self.start = self.end
+        else:
+            if self.keepends:
+                line = self.mv[start:idx + 1]
+            elif idx > start and buf[idx - 1] == 13:
+                line = self.mv[start:idx - 1]
+            else:
+                line = self.mv[start:idx]
+
+            self.start = idx + 1
+
+        return bytes(line) if self.copy else line
+
+    def space(self):
+        # Move the incomplete line to the start of the buffer (growing it, if it is full) and
+        # return a memoryview of the free space after it to read more data into
+        mv = self.mv
+        size = self.end - self.start
+        mv[:size] = mv[self.start:self.end]
+        self.start = 0
+        self.end = size
+
+        if size == len(self.buf):
+            self.buf = bytearray(size * 2)
+            self.buf[:size] = mv[:size]
+            self.mv = mv = memoryview(self.buf)
+
+        return mv[size:]
+
+
 class Response:
     def __init__(self, sock, sockfile, save_headers=False):
         self._cached = None
@@ -137,119 +395,375 @@ class Response:
         self._content_size = 0
         self._sf = sockfile
         self._sock = sock
+        # decompressor for the response body, if decompression was requested
+        self._decoder = None
         self.chunked = False
+        self.content_encoding = None
         self.encoding = "utf-8"
-        self.headers = [] if save_headers else None
+        if save_headers:
+            self.headers = HeaderMap(None if save_headers is True else save_headers)
+        else:
+            self.headers = None
         self.reason = ""
         self.status_code = None
+        # connection pool (session) the connection is handed back to
+        self._pool = None
+        self._conn_key = None
+        self._keep_alive = True
+        # remaining body size, None if unknown (i.e. read until EOF)
+        self._remain = None
+        # body data already read together with the response head
+        self._pending = b""
+        # (hooks, request context), if the request is traced
+        self._trace = None
+
+    def _read_raw(self, size=None):
+        # Read from body data already received with the response head first
+        data = self._pending
+
+        if data:
+            if size is not None and size < len(data):
+                self._pending = data[size:]
+                return data[:size]
+
+            self._pending = b""
+
+            if size is None:
+                return data + self._sf.read()
+
+            size -= len(data)
+            return data + self._sf.read(size) if size else data
+
+        return self._sf.read() if size is None else self._sf.read(size)
+
+    def _readinto_raw(self, buf, size=0):
+        data = self._pending
+
+        if data:
+            n = min(len(data), size or len(buf))
+            buf[:n] = data[:n]
+            self._pending = data[n:]
+            return n
+
+        if size:
+            if MICROPY:
+                return self._sf.readinto(buf, size)
+
+            return self._sf.readinto(memoryview(buf)[:size])
+
+        return self._sf.readinto(buf)
+
+    def _readline_raw(self):
+        data = self._pending
+
+        if data:
+            idx = data.find(b"\n")
+
+            if idx >= 0:
+                self._pending = data[idx + 1:]
+                return data[:idx + 1]
+
+            self._pending = b""
+            return data + self._sf.readline()
+
+        return self._sf.readline()
+
+    def _next_chunk(self):
+        # Read the next chunk size line and, after the last chunk, the trailer.
+        # Returns the chunk size or 0 at the end of the body.
+        l = self._readline_raw()
+
+        if not l:
+            return 0
+
+        # ignore chunk extensions
+        self._chunk_size = max(0, int(l.split(b";", 1)[0].strip(), 16))
+
+        if self._chunk_size == 0:
+            # End of message, skip trailer
+            while l not in (b"\r\n", b"\n"):
+                l = self._readline_raw()
+
+                if not l:
+                    raise ValueError("Expected final chunk separator, read end of stream instead.")
+
+            self._body_done()
+
+        return self._chunk_size
+
+    def _chunk_read(self, num_read):
+        self._chunk_size -= num_read
+
+        if self._chunk_size == 0:
+            sep = self._read_raw(2)
+
+            if sep != b"\r\n":
+                raise ValueError("Expected chunk separator, read %r instead." % sep)
 
     def read(self, size=MAX_READ_SIZE):
-        sf = self._sf
+        if self._decoder is None:
+            return self._read_body(size)
+
+        if not size:
+            # read complete body
+            data = []
+
+            while True:
+                chunk = self.read(MAX_READ_SIZE)
+
+                if not chunk:
+                    return b"".join(data)
+
+                data.append(chunk)
+
+        data = self._decoder.read(size)
+
+        if not data:
+            self._skip_body()
+
+        return data
+
+    def readinto(self, buf, size=0):
+        if self._decoder is None:
+            return self._readinto_body(buf, size)
+
+        num_read = self._decoder.readinto(memoryview(buf)[:size] if size else buf)
+
+        if not num_read:
+            self._skip_body()
+
+        return num_read
+
+    def _skip_body(self):
+        # Discard any body data after the end of the compressed stream
+        while self._read_body(MAX_READ_SIZE):
+            pass
+
+    def _read_body(self, size=MAX_READ_SIZE):
+        if self._remain == 0:
+            return b""
 
         if self.chunked:
-            if self._chunk_size == 0:
-                l = sf.readline().strip()
+            if not size:
+                # read all remaining chunks
+                data = []
 
-                if not l:
-                    return b''
+                while True:
+                    chunk = self._read_body(MAX_READ_SIZE)
+
+                    if not chunk:
+                        return b"".join(data)
 
-                # ignore chunk extensions
-                l = l.split(b";", 1)[0]
-                self._chunk_size = max(0, int(l, 16))
+                    data.append(chunk)
 
-                if self._chunk_size == 0:
-                    # End of message
-                    sep = sf.read(2)
+            if self._chunk_size == 0 and not self._next_chunk():
+                return b""
 
-                    if sep != b"\r\n":
-                        raise ValueError("Expected final chunk separator, read %r instead." % sep)
+            data = self._read_raw(min(size, self._chunk_size))
 
-                    return b""
+            if data:
+                self._chunk_read(len(data))
 
-            data = sf.read(min(size or MAX_READ_SIZE, self._chunk_size))
-            self._chunk_size = max(0, self._chunk_size - len(data))
+            return data
+        elif self._remain is None:
+            data = self._read_raw(size or None)
 
-            if self._chunk_size == 0:
-                sep = sf.read(2)
-                if sep != b"\r\n":
-                    raise ValueError("Expected chunk separator, read %r instead." % sep)
+            if not data or not size:
+                self._body_done()
 
             return data
         else:
-            return sf.read(size if size else self._content_size)
+            data = self._read_raw(min(size, self._remain) if size else self._remain)
+            self._remain -= len(data)
 
-    def readinto(self, buf, size=0):
-        if size:
-            return self._sf.readinto(buf, size)
+            if not data or self._remain <= 0:
+                self._body_done()
+
+            return data
+
+    def _readinto_body(self, buf, size=0):
+        remain = self._remain
+
+        if remain == 0:
+            return 0
+
+        if self.chunked:
+            if self._chunk_size == 0 and not self._next_chunk():
+                return 0
+
+            num_read = self._readinto_raw(buf, min(size or len(buf), self._chunk_size))
+
+            if num_read:
+                self._chunk_read(num_read)
+
+            return num_read
+
+        if remain is not None and remain < (size or len(buf)):
+            size = remain
+
+        num_read = self._readinto_raw(buf, size)
+
+        if remain is None:
+            if not num_read:
+                self._body_done()
         else:
-            return self._sf.readinto(buf)
+            self._remain -= num_read
+
+            if not num_read or self._remain <= 0:
+                self._body_done()
+
+        return num_read
+
+    def iter_content(self, chunk_size=MAX_READ_SIZE, buf=None):
+        """Yield the body in chunks of at most chunk_size bytes.
+
+        If buf is given, the chunks are read into it and memoryviews of it are yielded,
+        which are only valid until the next chunk is read.
+
+        """
+        if buf is None:
+            while True:
+                chunk = self.read(chunk_size)
+
+                if not chunk:
+                    return
+
+                yield chunk
+
+        mv = memoryview(buf)
+
+        while True:
+            num_read = self.readinto(buf, min(chunk_size or len(buf), len(buf)))
+
+            if not num_read:
+                return
+
+            yield mv[:num_read]
+
+    def iter_lines(self, buf=None, keepends=False):
+        """Yield the body line by line, without line endings, unless keepends is true.
+
+        If buf is given, lines are read into it and memoryviews of it are yielded, which are
+        only valid until the next line is read. Otherwise lines are yielded as bytes. If a line
+        is longer than the buffer, a larger buffer is allocated.
+
+        """
+        lines = _LineBuffer(buf, keepends)
+        eof = False
+
+        while True:
+            line = lines.next_line(eof)
+
+            if line is None:
+                if eof:
+                    return
+
+                num_read = self.readinto(lines.space())
+
+                if num_read:
+                    lines.end += num_read
+                else:
+                    eof = True
+
+                continue
+
+            yield line
 
     def save(self, fn, buf=None, chunk_size=0):
         with open(fn, "wb") as fobj:
             return self.saveinto(fobj, buf, chunk_size)
 
     def saveinto(self, fobj, buf=None, chunk_size=0):
-        num_read_total = 0
-
         if buf:
-            if self.chunked:
-                raise NotImplementedError("Cannot use a buffer when saving a chunked response.")
-            if chunk_size and not MICROPY:
-                raise NotImplementedError("Cannot set chunk_size when using a buffer with CPython."
-                    " Use a buffer or memoryview of appropriate size instead.")
-
-        remain = self._content_size
+            mv = memoryview(buf)
 
         while True:
             if buf:
-                num_read_chunk = self.readinto(buf, chunk_size)
+                num_read = self.readinto(buf, chunk_size)
 
-                if not num_read_chunk:
+                if not num_read:
                     break
 
-                num_read_total += num_read_chunk
-                fobj.write(buf[:num_read_chunk])
+                fobj.write(mv[:num_read])
             else:
                 # Read a chunk of data
-                chunk = self.read(size=None if self.chunked
-                                  else min(chunk_size or MAX_READ_SIZE, remain))
-                num_read_total += len(chunk)
+                chunk = self.read(chunk_size or MAX_READ_SIZE)
 
                 if not chunk:
                     break
 
                 fobj.write(chunk)
 
-            if not self.chunked:
-                remain = self._content_size - num_read_total
-
-                if remain <= 0:
-                    break
-
     def _parse_header(self, data):
-        if data[:18].lower() == b"transfer-encoding:" and b"chunked" in data[18:]:
-            self.chunked = True
-            # print("Chunked response detected.")
-        elif data[:15].lower() == b"content-length:":
-            self._content_size = int(data[15:])
+        colon = data.find(b":")
+
+        if colon in _FIELD_LENGTHS:
+            self._parse_field(data[:colon].lower(), data[colon + 1:])
+
+    def _parse_field(self, name, value):
+        # name is the lower-cased header name, value the unstripped header value
+        if name == b"transfer-encoding":
+            if b"chunked" in value:
+                self.chunked = True
+                # print("Chunked response detected.")
+        elif name == b"content-length":
+            self._content_size = self._remain = int(value)
             # print("Content length: %i" % self._content_size)
-        elif data[:17].lower() == b"content-encoding:":
-            self.encoding = data[17:].decode().strip()
+        elif name == b"content-encoding":
+            self.content_encoding = value.decode().strip()
+        elif name == b"content-type":
+            idx = value.lower().find(b"charset=")
+
+            if idx >= 0:
+                self.encoding = value[idx + 8:].split(b";", 1)[0].strip().strip(b'"').decode()
+        elif name == b"connection" and b"close" in value.lower():
+            self._keep_alive = False
 
     # overwrite this method, if you want to process/store headers differently
     def add_header(self, data):
         self._parse_header(data)
 
-        if self.headers is not None:
-            self.headers.append(data.rstrip(b"\r\n"))
+    def _init_body(self, method):
+        if method == "HEAD" or self.status_code in (204, 304):
+            self._body_done()
+        elif self.chunked:
+            self._remain = None
+        elif self._remain is None:
+            # Body is delimited by the server closing the connection
+            self._keep_alive = False
+
+    def _init_decoder(self):
+        # Decompress the body transparently, if it is gzip or deflate encoded
+        if self._remain != 0 and self.content_encoding in ("gzip", "deflate"):
+            self._decoder = _decoder(self)
+
+    def _body_done(self):
+        self._remain = 0
+
+        if self._trace is not None:
+            hooks, ctx = self._trace
+            self._trace = None
+            hooks.body_complete(ctx, ticks_us())
+
+        if self._pool is not None:
+            self._release()
+
+    def _release(self):
+        # Hand the connection back to the pool, if the response body was read completely
+        # and the server allows to keep the connection open. Otherwise close it.
+        if self._sock and self._pool is not None and self._keep_alive and self._remain == 0:
+            self._pool.release(self._conn_key, self._sock, self._sf)
+        else:
+            if self._sf and not MICROPY:
+                self._sf.close()
+            if self._sock:
+                self._sock.close()
+
+        self._sf = None
+        self._sock = None
 
     def close(self):
-        if self._sf and not MICROPY:
-            self._sf.close()
-            self._sf = None
-        if self._sock:
-            self._sock.close()
-            self._sock = None
+        self._release()
         self._cached = None
 
     @property
@@ -258,8 +772,7 @@ class Response:
             try:
                 self._cached = self.read(size=None)
             finally:
-                self._sock.close()
-                self._sock = None
+                self._release()
         return self._cached
 
     @property
@@ -274,6 +787,508 @@ class Response:
 
         return json.loads(self.content)
 
+    def iter_json(self, path="item", buf=None):
+        """Parse the body as JSON incrementally and yield the values at the given path.
+
+        See mrequests.jsonstream.JSONStreamParser for the path syntax.
+
+        """
+        from .jsonstream import iter_json
+
+        return iter_json(self, path, buf)
+
+
+def _encode_head(ctx, headers):
+    # Return request line and headers (without the terminating empty line) as a list of parts
+    parts = [
+        b"%s %s HTTP/1.1\r\nHost: %s\r\n" % (
+            ctx.method.encode("ascii"),
+            ctx.path.encode("ascii"),
+            headers.get(b"Host", ctx.host.encode()),
+        )
+    ]
+
+    for k, val in headers.items():
+        if not isinstance(k, bytes):
+            k = k.encode("ascii")
+
+        if k.lower() == b"host":
+            continue
+
+        parts.append(k)
+        parts.append(b": ")
+        parts.append(val if isinstance(val, bytes) else val.encode("ascii"))
+        parts.append(b"\r\n")
+
+    return parts
+
+
+def _normalize(item, defaults):
+    # Return (method, url, kwargs) for an URL, (method, url) or (method, url, kwargs) tuple
+    if isinstance(item, str):
+        method, url, kw = "GET", item, {}
+    elif len(item) == 2:
+        method, url, kw = item[0], item[1], {}
+    else:
+        method, url, kw = item
+
+    kw = kw.copy()
+
+    for name in defaults:
+        kw.setdefault(name, defaults[name])
+
+    return method, url, kw
+
+
+def _accept_encoding(headers):
+    # Return a copy of the headers with an Accept-Encoding header added, if there is none
+    for name in headers:
+        if name.lower() in (b"accept-encoding", "accept-encoding"):
+            return headers
+
+    headers = headers.copy()
+    headers[b"Accept-Encoding"] = ACCEPT_ENCODING
+    return headers
+
+
+def _prepare_data(data, json=None, encoding=None):
+    # Return request body data as bytes and the content type to send with it, if any
+    content_type = None
+
+    if json is not None:
+        assert data is None
+        try:
+            from json import dumps
+        except ImportError:
+            from ujson import dumps
+
+        data = dumps(json)
+        content_type = b"application/json"
+
+        if encoding:
+            content_type += b"; charset=%s" % encoding.encode()
+
+    if isinstance(data, str):
+        data = data.encode(encoding or "utf-8")
+    elif isinstance(data, dict):
+        from .urlencode import urlencode_bytes
+
+        data = urlencode_bytes(data, True, encoding=encoding)
+        content_type = b"application/x-www-form-urlencoded"
+    elif content_type is None:
+        # e.g. a multipart.MultipartEncoder
+        content_type = getattr(data, "content_type", None)
+
+    return data, content_type
+
+
+def _add_params(url, params):
+    # Append query parameters given as a dict or sequence of pairs to the URL. Sequence values
+    # add a parameter for each element.
+    if not params:
+        return url
+
+    from .urlencode import urlencode
+
+    return "%s%s%s" % (url, "&" if "?" in url else "?", urlencode(params, True))
+
+
+def _body_size(data):
+    # Return the size of the request body data or None, if it is unknown
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return len(data)
+
+    if hasattr(data, "readinto") or hasattr(data, "read"):
+        try:
+            return len(data)
+        except TypeError:
+            pass
+
+        try:
+            pos = data.tell()
+            size = data.seek(0, 2)
+            data.seek(pos)
+            return size - pos
+        except (AttributeError, OSError, ValueError):
+            pass
+
+
+def _tell(data):
+    # Return the current position of seekable request body data, otherwise None
+    try:
+        return data.tell()
+    except (AttributeError, OSError, ValueError):
+        pass
+
+
+def _rewind(data, pos):
+    # Rewind request body data to given position to send it again, return False if impossible
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return True
+
+    if pos is None:
+        return False
+
+    data.seek(pos)
+    return True
+
+
+def _encode_request(ctx, headers, data, content_type=None, close=True, template=None):
+    # Return request head as a list of parts, the request body to send (or None) and its size.
+    # A size of None means that the body is sent with chunked transfer encoding.
+    parts = _encode_head(ctx, headers) if template is None else [template.head]
+    body = size = None
+
+    if data and ctx.method not in ("GET", "HEAD"):
+        if content_type:
+            parts.append(b"Content-Type: %s\r\n" % content_type)
+
+        size = _body_size(data)
+
+        if size is None:
+            parts.append(b"Transfer-Encoding: chunked\r\n")
+        else:
+            parts.append(b"Content-Length: %d\r\n" % size)
+
+        body = data
+
+    parts.append(b"Connection: close\r\n\r\n" if close else b"\r\n")
+    return parts, body, size
+
+
+def _readinto_block(data, mv):
+    readinto = getattr(data, "readinto", None)
+
+    if readinto is not None:
+        return readinto(mv) or 0
+
+    chunk = data.read(len(mv))
+    mv[:len(chunk)] = chunk
+    return len(chunk)
+
+
+def _write_body(sf, data, size, buf):
+    # Send request body data. File-like objects are read in blocks into buf, if size is None,
+    # blocks or items from other iterables are sent using chunked transfer encoding.
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        sf.write(data)
+        return
+
+    mv = memoryview(buf)
+
+    if not hasattr(data, "readinto") and not hasattr(data, "read"):
+        for chunk in data:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+
+            if len(chunk) + 12 > len(buf):
+                # don't copy large chunks
+                sf.write(b"%x\r\n" % len(chunk))
+                sf.write(chunk)
+                sf.write(b"\r\n")
+            elif chunk:
+                sf.write(_join_into(buf, [b"%x\r\n" % len(chunk), chunk, b"\r\n"]))
+    elif size is not None:
+        while size > 0:
+            num_read = _readinto_block(data, mv[:min(size, len(buf))])
+
+            if not num_read:
+                raise ValueError("Request body data ended %i bytes early." % size)
+
+            sf.write(mv[:num_read])
+            size -= num_read
+
+        return
+    else:
+        while True:
+            # Leave room for chunk size line before and separator after chunk data
+            num_read = _readinto_block(data, mv[8:-2])
+
+            if not num_read:
+                break
+
+            l = b"%x\r\n" % num_read
+            mv[8 - len(l):8] = l
+            mv[8 + num_read:10 + num_read] = b"\r\n"
+            sf.write(mv[8 - len(l):10 + num_read])
+
+    sf.write(b"0\r\n\r\n")
+
+
+def _parts_size(parts):
+    size = 0
+
+    for part in parts:
+        size += len(part)
+
+    return size
+
+
+def _join_into(buf, parts):
+    # Copy parts into buf (or a new, larger buffer, if it is too small) and return a
+    # memoryview of the result, so it can be sent with a single write.
+    size = _parts_size(parts)
+
+    if size > len(buf):
+        buf = bytearray(size)
+
+    mv = memoryview(buf)
+    pos = 0
+
+    for part in parts:
+        mv[pos:pos + len(part)] = part
+        pos += len(part)
+
+    return mv[:size]
+
+
+class RequestTemplate:
+    """Pre-compiled request line and headers for repeatedly sending requests to the same URL.
+
+    Takes the same arguments as request() (except data and json). Use the send() method to
+    send a request with the given body data (and optionally additional keyword arguments
+    for request(), e.g. session).
+
+    """
+
+    def __init__(self, method, url, headers={}, auth=None, **kw):
+        if auth:
+            headers = headers.copy()
+            headers.update(auth if callable(auth) else encode_basic_auth(auth[0], auth[1]))
+
+        if kw.get("decompress"):
+            headers = _accept_encoding(headers)
+
+        self.method = method
+        self.url = _add_params(url, kw.pop("params", None))
+        self.headers = headers
+        self.kw = kw
+        self.head = b"".join(_encode_head(RequestContext(self.url, method), headers))
+
+    def send(self, data=None, **kw):
+        for name in self.kw:
+            kw.setdefault(name, self.kw[name])
+
+        return request(self.method, self.url, data=data, headers=self.headers, template=self, **kw)
+
+
+class _NoResponse(OSError):
+    # Raised, when the server closed the connection before sending any data of the response
+    pass
+
+
+def _is_timeout(exc):
+    # socket.timeout on CPython, OSError(ETIMEDOUT) on MicroPython
+    timeout = getattr(socket, "timeout", None)
+    return (timeout is not None and isinstance(exc, timeout)) or (
+        bool(exc.args) and exc.args[0] == errno.ETIMEDOUT
+    )
+
+
+def _read_head(sf, buf, pending=b""):
+    # Read the response head into buf in as few reads as possible and return it as a bytes
+    # object (including the terminating empty line) together with any body data already read.
+    # pending is data already received, which belongs to this response (when pipelining).
+    if pending:
+        end = pending.find(b"\r\n\r\n")
+
+        if end >= 0:
+            return pending[:end + 4], pending[end + 4:]
+
+        if len(pending) >= len(buf):
+            buf = bytearray(len(pending) * 2)
+
+        buf[:len(pending)] = pending
+
+    readinto = getattr(sf, "readinto1", None)
+
+    if readinto is None:
+        # Plain MicroPython sockets have recv(), TLS sockets may only have readline(),
+        # which never reads past the end of the head.
+        recv = getattr(sf, "recv", None) or sf.readline
+
+    mv = memoryview(buf)
+    pos = len(pending)
+
+    while True:
+        if pos == len(buf):
+            if pos >= MAX_HEAD_SIZE:
+                raise ValueError("Response head exceeds %i bytes." % MAX_HEAD_SIZE)
+
+            buf = bytearray(pos * 2)
+            buf[:pos] = mv
+            mv = memoryview(buf)
+
+        if readinto is None:
+            data = recv(len(buf) - pos)
+            num_read = len(data)
+            mv[pos:pos + num_read] = data
+        else:
+            num_read = readinto(mv[pos:])
+
+        if not num_read:
+            raise (_NoResponse if pos == 0 else OSError)("Connection closed by server.")
+
+        start = pos - 3 if pos > 3 else 0
+        pos += num_read
+        end = bytes(mv[start:pos]).find(b"\r\n\r\n")
+
+        if end >= 0:
+            end += start + 4
+            return bytes(mv[:end]), bytes(mv[end:pos])
+
+
+def _parse_head(resp, head):
+    # Parse status line and headers from the response head and return the value of the
+    # Location header, if present. Each header line is passed to resp.add_header(), if a
+    # sub-class overrides it, otherwise only the headers Response handles are parsed.
+    end = head.find(b"\r\n")
+    # print("Response: %s" % head[:end].decode("ascii"))
+    l = head[:end].split(None, 2)
+    resp.status_code = int(l[1])
+
+    if len(l) > 2:
+        resp.reason = l[2].rstrip()
+
+    if l[0] == b"HTTP/1.0":
+        resp._keep_alive = False
+
+    location = None
+    last = len(head) - 4
+    store = resp.headers if isinstance(resp.headers, HeaderMap) else None
+    add_header = None if type(resp).add_header is Response.add_header else resp.add_header
+
+    if store is not None:
+        store._head = head
+
+    while end < last:
+        start = end + 2
+        end = head.find(b"\r\n", start)
+        colon = head.find(b":", start, end)
+
+        if colon - start in _FIELD_LENGTHS:
+            name = head[start:colon].lower()
+
+            if name == b"location":
+                location = head[colon + 1:end].strip().decode("ascii")
+            elif add_header is None:
+                resp._parse_field(name, head[colon + 1:end])
+
+        # print("Header: %r" % head[start:end])
+        if add_header is not None:
+            add_header(head[start:end + 2])
+
+        if store is not None and colon > 0:
+            store._add(start, colon, end)
+
+    if store is not None and store._names is not None:
+        store._compact()
+
+    return location
+
+
+def _default_ssl_context():
+    # Create the default SSL context only once and share it between requests
+    global _ssl_context
+
+    if _ssl_context is None:
+        try:
+            import tls as ssl
+        except ImportError:
+            try:
+                import ssl
+            except ImportError:
+                import ussl as ssl
+
+        if hasattr(ssl, "create_default_context"):
+            _ssl_context = ssl.create_default_context()
+        else:
+            _ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+
+            if hasattr(ssl, "CERT_OPTIONAL"):
+                _ssl_context.verify_mode = ssl.CERT_OPTIONAL
+
+    return _ssl_context
+
+
+def _wrap_socket(sock, ctx, ssl_context):
+    # Resume a previous TLS session with the server, if the platform supports it
+    tls_session = _tls_sessions.get((ssl_context, ctx.host, ctx.port)) if _tls_sessions else None
+
+    if tls_session is not None:
+        return ssl_context.wrap_socket(sock, server_hostname=ctx.host, session=tls_session)
+
+    return ssl_context.wrap_socket(sock, server_hostname=ctx.host)
+
+
+def _save_tls_session(sock, ctx):
+    # Only CPython's ssl module exposes TLS sessions. Save them after the response head has
+    # been received, since with TLS 1.3 session tickets are only sent after the handshake.
+    tls_session = getattr(sock, "session", None)
+
+    if tls_session is not None:
+        key = (sock.context, ctx.host, ctx.port)
+
+        if key not in _tls_sessions and len(_tls_sessions) >= MAX_TLS_SESSIONS:
+            del _tls_sessions[next(iter(_tls_sessions))]
+
+        _tls_sessions[key] = tls_session
+
+
+def _getaddrinfo(host, port):
+    return socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)[0]
+
+
+def _connect(ctx, timeout=None, ssl_context=None, resolver=None, hooks=None):
+    # print("Resolving host address...")
+    if hooks is not None:
+        hooks.resolve_start(ctx, ticks_us())
+
+    ai = (resolver or _getaddrinfo)(ctx.host, ctx.port)
+
+    if hooks is not None:
+        hooks.resolve_end(ctx, ticks_us())
+
+    # print("Creating socket...")
+    sock = socket.socket(ai[0], ai[1], ai[2])
+    sock.settimeout(timeout)
+    try:
+        # print("Connecting to %s:%i..." % (ctx.host, ctx.port))
+        if hooks is not None:
+            hooks.connect_start(ctx, ticks_us())
+
+        sock.connect(ai[-1])
+
+        if hooks is not None:
+            hooks.connect_end(ctx, ticks_us())
+
+        if ctx.scheme == "https":
+            # print("Wrapping socket with TLS")
+            if ssl_context is None:
+                ssl_context = _default_ssl_context()
+
+            if hooks is not None:
+                hooks.tls_start(ctx, ticks_us())
+
+            sock = _wrap_socket(sock, ctx, ssl_context)
+
+            if hooks is not None:
+                hooks.tls_end(ctx, ticks_us())
+    except:
+        sock.close()
+        raise
+
+    return sock
+
+
+def _close_conn(sock, sf):
+    if not MICROPY:
+        try:
+            sf.close()
+        except:
+            pass
+    sock.close()
+
 
 def request(
     method,
@@ -287,137 +1302,154 @@ def request(
     save_headers=False,
     max_redirects=1,
     timeout=None,
-    ssl_context=None
+    ssl_context=None,
+    session=None,
+    template=None,
+    resolver=None,
+    decompress=False,
+    hooks=None,
+    params=None,
+    retry=None
 ):
+    if retry is not None:
+        return retry.call(
+            request,
+            method,
+            url,
+            data=data,
+            json=json,
+            headers=headers,
+            auth=auth,
+            encoding=encoding,
+            response_class=response_class,
+            save_headers=save_headers,
+            max_redirects=max_redirects,
+            timeout=timeout,
+            ssl_context=ssl_context,
+            session=session,
+            template=template,
+            resolver=resolver,
+            decompress=decompress,
+            hooks=hooks,
+            params=params,
+        )
+
     if auth:
         headers.update(auth if callable(auth) else encode_basic_auth(auth[0], auth[1]))
 
-    if json is not None:
-        assert data is None
-        try:
-            import json
-        except ImportError:
-            import ujson as json
-
-        data = json.dumps(json)
+    if decompress:
+        headers = _accept_encoding(headers)
 
-    ctx = RequestContext(url, method)
+    data, content_type = _prepare_data(data, json, encoding)
+    data_pos = _tell(data)
+    data_sent = False
+    ctx = RequestContext(_add_params(url, params), method)
+    buf = session.buf if session is not None else bytearray(HEAD_BUF_SIZE)
 
     while True:
         if ctx.scheme not in ("http", "https"):
             raise ValueError("Protocol scheme %s not supported." % ctx.scheme)
 
-        ctx.redirect = False
+        key = (ctx.scheme, ctx.host, ctx.port)
 
-        # print("Resolving host address...")
-        ai = socket.getaddrinfo(ctx.host, ctx.port, 0, socket.SOCK_STREAM)[0]
+        while True:
+            if data_sent and ctx.method not in ("GET", "HEAD") and not _rewind(data, data_pos):
+                raise ValueError("Can not send non-seekable request body data again.")
 
-        # print("Creating socket...")
-        sock = socket.socket(ai[0], ai[1], ai[2])
-        sock.settimeout(timeout)
-        try:
-            # print("Connecting to %s:%i..." % (ctx.host, ctx.port))
-            sock.connect(ai[-1])
-            if ctx.scheme == "https":
-                try:
-                    import tls as ssl
-                except ImportError:
-                    try:
-                        import ssl
-                    except ImportError:
-                        import ussl as ssl
-
-
-                # print("Wrapping socket with TLS")
-                if ssl_context is None:
-                    if hasattr(ssl, "create_default_context"):
-                        ssl_context = ssl.create_default_context()
-                    else:
-                        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-                        if hasattr(ssl, "CERT_OPTIONAL"):
-                            ssl_context.verify_mode = ssl.CERT_OPTIONAL
-
-                sock = ssl_context.wrap_socket(sock, server_hostname=ctx.host)
-
-            sf = sock if MICROPY else sock.makefile("rwb")
-            sf.write(b"%s %s HTTP/1.1\r\n" % (ctx.method.encode("ascii"), ctx.path.encode("ascii")))
-            sf.write(b"Host: %s\r\n" % headers.get(b"Host", ctx.host.encode()))
-
-            for k, val in headers.items():
-                if not isinstance(k, bytes):
-                    k = k.encode("ascii")
-
-                if k.lower() == b"host":
-                    continue
+            ctx.redirect = False
+            conn = session.acquire(key) if session is not None else None
 
-                sf.write(k)
-                sf.write(b": ")
-                sf.write(val if isinstance(val, bytes) else val.encode("ascii"))
-                sf.write(b"\r\n")
+            if conn:
+                sock, sf = conn
+                if hasattr(sock, "settimeout"):
+                    sock.settimeout(timeout)
+
+                if hooks is not None:
+                    hooks.connection_reused(ctx, ticks_us())
+            else:
+                sock = _connect(ctx, timeout, ssl_context, resolver, hooks)
+                sf = sock if MICROPY else sock.makefile("rwb")
 
-            if data and ctx.method not in ("GET", "HEAD"):
-                if json is not None:
-                    sf.write(b"Content-Type: application/json")
-                    if encoding:
-                        sf.write(b"; charset=%s" % encoding.encode())
-                    sf.write(b"\r\n")
+            # whether the request is still being sent and whether any body data was sent
+            sending = True
+            body_sent = False
 
-                sf.write(b"Content-Length: %d\r\n" % len(data))
+            try:
+                parts, body, size = _encode_request(ctx, headers, data, content_type,
+                                                    session is None, template)
 
-            sf.write(b"Connection: close\r\n\r\n")
+                if (body is not None and isinstance(body, (bytes, bytearray))
+                        and _parts_size(parts) + size <= len(buf)):
+                    # Send small request bodies together with the request head
+                    parts.append(body)
+                    body = None
+                    body_sent = True
 
-            if data and ctx.method not in ("GET", "HEAD"):
-                sf.write(data if isinstance(data, bytes) else data.encode(encoding or "utf-8"))
+                sf.write(_join_into(buf, parts))
 
-            if not MICROPY:
-                sf.flush()
+                if hooks is not None:
+                    hooks.headers_sent(ctx, ticks_us())
 
-            resp = response_class(sock, sf, save_headers=save_headers)
-            l = b""
-            while True:
-                l += sf.read(1)
+                if body is not None:
+                    data_sent = body_sent = True
+                    _write_body(sf, body, size, buf)
 
-                if l.endswith(b"\r\n") or len(l) > MAX_READ_SIZE:
-                    break
+                if not MICROPY:
+                    sf.flush()
 
-            # print("Response: %s" % l.decode("ascii"))
-            l = l.split(None, 2)
-            resp.status_code = int(l[1])
+                sending = False
 
-            if len(l) > 2:
-                resp.reason = l[2].rstrip()
+                if hooks is not None:
+                    hooks.request_sent(ctx, ticks_us())
 
-            while True:
-                l = sf.readline()
-                if not l or l == b"\r\n":
-                    break
+                resp = response_class(sock, sf, save_headers=save_headers)
+                head, resp._pending = _read_head(sf, buf)
+
+                if hooks is not None:
+                    hooks.status_received(ctx, ticks_us())
 
-                if l.startswith(b"Location:"):
-                    ctx.set_location(resp.status_code, l[9:].strip().decode("ascii"))
-
-                # print("Header: %r" % l)
-                resp.add_header(l)
-        except OSError:
-            if not MICROPY:
-                try:
-                    sf.close()
-                    del sf
-                except:
-                    pass
-            sock.close()
-            del sock
-            raise
+                location = _parse_head(resp, head)
+                del head
+
+                if hooks is not None:
+                    hooks.headers_parsed(ctx, ticks_us())
+                    resp._trace = (hooks, ctx)
+
+                # before set_location changes the host, so the session is saved for this one
+                if ctx.scheme == "https" and not conn:
+                    _save_tls_session(sock, ctx)
+
+                if location is not None:
+                    ctx.set_location(resp.status_code, location)
+            except OSError as exc:
+                _close_conn(sock, sf)
+                del sock, sf
+
+                # A pooled connection may have been closed by the server in the meantime. Then
+                # sending fails or the server closes it without a response and the request can
+                # be sent again on a new connection, unless the server may have processed it.
+                if (
+                    conn
+                    and (not _is_timeout(exc) if sending else isinstance(exc, _NoResponse))
+                    and (ctx.method in IDEMPOTENT_METHODS or (sending and not body_sent))
+                    and (not body_sent or _rewind(data, data_pos))
+                ):
+                    continue
+
+                raise
+
+            break
+
+        if session is not None:
+            resp._pool = session
+            resp._conn_key = key
+
+        resp._init_body(ctx.method)
 
         if ctx.redirect:
             # print("Redirect to: %s" % ctx.url)
-            if not MICROPY:
-                try:
-                    sf.close()
-                    del sf
-                except:
-                    pass
-            sock.close()
-            del sock
+            resp.close()
+            template = None
             max_redirects -= 1
 
             if max_redirects < 0:
@@ -425,4 +1457,7 @@ def request(
         else:
             break
 
+    if decompress:
+        resp._init_decoder()
+
     return resp
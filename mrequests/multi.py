@@ -0,0 +1,104 @@
+"""Fetch many URLs concurrently with bounded parallelism."""
+
+try:
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+except ImportError:
+    ThreadPoolExecutor = None
+
+from .mrequests import _normalize, request
+from .pollclient import PollClient
+
+
+def _fetch_poll(requests, concurrency, defaults):
+    client = PollClient()
+    requests = iter(requests)
+    # PollRequest -> item from requests
+    items = {}
+    exhausted = False
+
+    while True:
+        while not exhausted and len(client) < concurrency:
+            try:
+                item = next(requests)
+            except StopIteration:
+                exhausted = True
+                break
+
+            try:
+                method, url, kw = _normalize(item, defaults)
+                items[client.add(method, url, **kw)] = item
+            except Exception as exc:
+                yield item, exc
+
+        if not len(client):
+            return
+
+        for req in client.poll(0.1):
+            item = items.pop(req)
+
+            if req.error is not None:
+                yield item, req.error
+            else:
+                yield item, req.response
+
+
+def _fetch_threaded(requests, concurrency, defaults):
+    def fetch(item):
+        method, url, kw = _normalize(item, defaults)
+        resp = request(method, url, **kw)
+        # read body and close connection
+        resp.content
+        return resp
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        requests = iter(requests)
+        # future -> item from requests
+        futures = {}
+        exhausted = False
+
+        while True:
+            # only take the next items from requests, when there is a free worker for them
+            while not exhausted and len(futures) < concurrency:
+                try:
+                    item = next(requests)
+                except StopIteration:
+                    exhausted = True
+                    break
+
+                futures[executor.submit(fetch, item)] = item
+
+            if not futures:
+                return
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                item = futures.pop(future)
+
+                try:
+                    yield item, future.result()
+                except Exception as exc:
+                    yield item, exc
+
+
+def fetch_many(requests, concurrency=4, **kw):
+    """Perform many requests concurrently and yield results in the order they complete.
+
+    requests is an iterable of URLs, (method, url) or (method, url, kwargs) tuples, where kwargs
+    is a dict of keyword arguments for request(). Any additional keyword arguments are used as
+    defaults for these.
+
+    At most concurrency requests are performed at the same time. Yields (request, result)
+    tuples, where request is the item from requests and result is either a Response instance,
+    whose body has already been read completely (use its content, text or json attributes),
+    or the exception raised while performing the request.
+
+    On CPython, requests are performed by a thread pool using request(). On MicroPython,
+    non-blocking sockets and select.poll are used instead. There the timeout applies to the
+    request as a whole and the keyword arguments session and template are not supported.
+
+    """
+    if ThreadPoolExecutor is not None:
+        return _fetch_threaded(requests, concurrency, kw)
+
+    return _fetch_poll(requests, concurrency, kw)
@@ -0,0 +1,164 @@
+"""Streaming multipart/form-data encoder for request bodies."""
+
+import os
+
+try:
+    from binascii import hexlify
+except ImportError:
+    from ubinascii import hexlify
+
+from .mrequests import _body_size
+
+
+def _encode(s):
+    if isinstance(s, str):
+        s = s.encode("utf-8")
+
+    # quote chars not allowed in quoted header parameter values (as browsers do)
+    return s.replace(b'"', b"%22").replace(b"\r", b"%0D").replace(b"\n", b"%0A")
+
+
+class MultipartEncoder:
+    """Encode form fields and files as a multipart/form-data request body.
+
+    The encoder can be passed as the data argument to request(). The total size of the body is
+    calculated up front, so it is sent with a Content-Length header, and the part headers, field
+    values and file contents are then read into the request's buffer block by block, so uploading
+    a file needs (nearly) constant memory, regardless of its size.
+
+    The content_type attribute holds the value for the Content-Type header, which request() adds
+    automatically.
+
+    """
+
+    def __init__(self, boundary=None):
+        if boundary is None:
+            boundary = hexlify(os.urandom(16))
+        elif isinstance(boundary, str):
+            boundary = boundary.encode()
+
+        self.boundary = boundary
+        self.content_type = b"multipart/form-data; boundary=" + boundary
+        # bytes or [filename or file object, size, start position] lists
+        self._parts = []
+        self._size = 0
+        self._end = b"--%s--\r\n" % boundary
+        self.seek(0)
+
+    def _add(self, part, size):
+        self._parts.append(part)
+        self._size += size
+
+    def _add_head(self, name, filename=None, content_type=None):
+        head = b'--%s\r\nContent-Disposition: form-data; name="%s"' % (self.boundary, _encode(name))
+
+        if filename is not None:
+            head += b'; filename="%s"' % _encode(filename)
+
+        if content_type:
+            if isinstance(content_type, str):
+                content_type = content_type.encode()
+
+            head += b"\r\nContent-Type: %s" % content_type
+
+        head += b"\r\n\r\n"
+        self._add(head, len(head))
+
+    def add_field(self, name, value, content_type=None):
+        """Add a form field with the given value (bytes or str)."""
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+
+        self._add_head(name, content_type=content_type)
+        self._add(value + b"\r\n", len(value) + 2)
+
+    def add_file(self, name, file, filename=None, content_type=b"application/octet-stream"):
+        """Add a file upload field.
+
+        file may be the name of a file on disk, which is opened when its contents are sent, or a
+        file object opened in binary mode, whose size can be determined by seeking. Its contents
+        are sent from its current position.
+
+        """
+        if isinstance(file, str):
+            size = os.stat(file)[6]
+            pos = 0
+
+            if filename is None:
+                filename = file.rsplit("/", 1)[-1]
+        else:
+            size = _body_size(file)
+            pos = file.tell()
+
+            if size is None:
+                raise ValueError("Can not determine size of file object.")
+
+        self._add_head(name, filename or "", content_type)
+        self._add([file, size, pos], size)
+        self._add(b"\r\n", 2)
+
+    def __len__(self):
+        return self._size + len(self._end)
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        """Rewind the encoder, so the body can be sent again. Only seek(0) is supported."""
+        if offset or whence:
+            raise OSError("MultipartEncoder can only be rewound to the start.")
+
+        self.close()
+        self._index = 0
+        self._offset = 0
+        self._pos = 0
+        return 0
+
+    def close(self):
+        """Close the file opened for the part currently being sent, if any."""
+        fobj = getattr(self, "_fobj", None)
+
+        if fobj is not None and isinstance(self._parts[self._index][0], str):
+            fobj.close()
+
+        self._fobj = None
+
+    def readinto(self, buf):
+        """Read the next block of the encoded body into buf and return the number of bytes read."""
+        mv = memoryview(buf)
+        parts = self._parts
+        num_read = 0
+
+        while num_read < len(buf) and self._index <= len(parts):
+            part = parts[self._index] if self._index < len(parts) else self._end
+
+            if isinstance(part, bytes):
+                n = min(len(part) - self._offset, len(buf) - num_read)
+                mv[num_read:num_read + n] = part[self._offset:self._offset + n]
+                num_read += n
+                self._offset += n
+                done = self._offset >= len(part)
+            else:
+                if self._fobj is None:
+                    if isinstance(part[0], str):
+                        self._fobj = open(part[0], "rb")
+                    else:
+                        self._fobj = part[0]
+                        self._fobj.seek(part[2])
+
+                n = min(part[1] - self._offset, len(buf) - num_read)
+                n = self._fobj.readinto(mv[num_read:num_read + n]) if n else 0
+                num_read += n
+                self._offset += n
+                done = self._offset >= part[1]
+
+                if not n and not done:
+                    raise ValueError("File for multipart field ended early.")
+
+            if done:
+                self.close()
+                self._index += 1
+                self._offset = 0
+
+        self._pos += num_read
+        return num_read
@@ -0,0 +1,411 @@
+"""Non-blocking HTTP client driven by select.poll from the application's main loop."""
+
+try:
+    import errno
+except ImportError:
+    import uerrno as errno
+
+try:
+    from io import BytesIO
+except ImportError:
+    from uio import BytesIO
+
+try:
+    import select
+except ImportError:
+    import uselect as select
+
+from .mrequests import (
+    MAX_READ_SIZE,
+    MICROPY,
+    RequestContext,
+    Response,
+    _accept_encoding,
+    _add_params,
+    _default_ssl_context,
+    _encode_request,
+    _find_newline,
+    _getaddrinfo,
+    _parse_head,
+    _prepare_data,
+    encode_basic_auth,
+    socket,
+    ticks_diff,
+    ticks_ms,
+)
+
+_WOULD_BLOCK = (errno.EAGAIN, errno.EINPROGRESS, getattr(errno, "EWOULDBLOCK", errno.EAGAIN))
+_CONNECTING = 0
+_SENDING = 1
+_RECEIVING = 2
+
+
+def _would_block(exc):
+    return (exc.args and exc.args[0] in _WOULD_BLOCK) or type(exc).__name__ in (
+        "BlockingIOError",
+        "SSLWantReadError",
+        "SSLWantWriteError",
+    )
+
+
+class PollRequest:
+    """A single request driven by a PollClient through non-blocking socket operations.
+
+    When the request is done, either its response attribute is set to a Response instance,
+    whose body has been received completely (use its read, readinto, content, text or json
+    methods / attributes), or its error attribute to the exception raised while performing
+    the request.
+
+    """
+
+    def __init__(self, method, url, kw):
+        self.ctx = RequestContext(_add_params(url, kw.get("params")), method)
+        self.kw = kw
+        self.headers = kw.get("headers", {})
+        auth = kw.get("auth")
+
+        if auth:
+            self.headers = self.headers.copy()
+            self.headers.update(auth if callable(auth) else encode_basic_auth(auth[0], auth[1]))
+
+        if kw.get("decompress"):
+            self.headers = _accept_encoding(self.headers)
+
+        self.data, self.content_type = _prepare_data(
+            kw.get("data"), kw.get("json"), kw.get("encoding")
+        )
+        self.max_redirects = kw.get("max_redirects", 1)
+        timeout = kw.get("timeout")
+        self.timeout = None if timeout is None else int(timeout * 1000)
+        self.started = ticks_ms()
+        self.sock = None
+        self.response = None
+        self.error = None
+
+    @property
+    def done(self):
+        return self.response is not None or self.error is not None
+
+    @property
+    def key(self):
+        return self.sock if MICROPY else self.sock.fileno()
+
+    def remaining(self, now):
+        # Milliseconds left until the request times out or None, if it has no timeout
+        if self.timeout is not None:
+            return self.timeout - ticks_diff(now, self.started)
+
+    def start(self, poller):
+        ctx = self.ctx
+
+        if ctx.scheme not in ("http", "https"):
+            raise ValueError("Protocol scheme %s not supported." % ctx.scheme)
+
+        ai = (self.kw.get("resolver") or _getaddrinfo)(ctx.host, ctx.port)
+        sock = socket.socket(ai[0], ai[1], ai[2])
+        sock.setblocking(False)
+
+        try:
+            sock.connect(ai[-1])
+        except OSError as exc:
+            if not _would_block(exc):
+                sock.close()
+                raise
+
+        parts, body, size = _encode_request(ctx, self.headers, self.data, self.content_type)
+
+        if body is not None:
+            if not isinstance(body, (bytes, bytearray)):
+                sock.close()
+                raise TypeError("Only bytes or str request body data supported.")
+
+            parts.append(body)
+
+        self.out = memoryview(b"".join(parts))
+        self.pos = 0
+        # response head received so far, body data after the head has been received
+        self.head = b""
+        self.body = None
+        self.resp = None
+        self.state = _CONNECTING
+        self.sock = sock
+        self.poller = poller
+        poller.register(sock, select.POLLOUT)
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.poller.unregister(self.sock)
+            except:
+                pass
+
+            self.sock.close()
+            self.sock = None
+
+    def step(self, event):
+        # Advance the state machine after a poll event. Returns True, when the request is done.
+        if self.state == _CONNECTING:
+            if event & (select.POLLERR | select.POLLHUP):
+                raise OSError("Could not connect to %s:%i." % (self.ctx.host, self.ctx.port))
+
+            if self.ctx.scheme == "https":
+                ssl_context = self.kw.get("ssl_context") or _default_ssl_context()
+                self.poller.unregister(self.sock)
+                self.sock = ssl_context.wrap_socket(
+                    self.sock, server_hostname=self.ctx.host, do_handshake_on_connect=False
+                )
+                self.poller.register(self.sock, select.POLLOUT)
+
+            self.state = _SENDING
+
+        if self.state == _SENDING:
+            write = getattr(self.sock, "write", None) or self.sock.send
+
+            while self.pos < len(self.out):
+                try:
+                    num_written = write(self.out[self.pos:])
+                except OSError as exc:
+                    if _would_block(exc):
+                        # the TLS handshake may have to wait for data from the server
+                        self.poller.modify(
+                            self.sock,
+                            select.POLLIN
+                            if type(exc).__name__ == "SSLWantReadError"
+                            else select.POLLOUT,
+                        )
+                        return False
+
+                    raise
+
+                if num_written is None:
+                    return False
+
+                self.pos += num_written
+
+            self.out = None
+            self.state = _RECEIVING
+            self.poller.modify(self.sock, select.POLLIN)
+            return False
+
+        read = getattr(self.sock, "read", None) or self.sock.recv
+
+        while True:
+            try:
+                data = read(MAX_READ_SIZE)
+            except OSError as exc:
+                if _would_block(exc):
+                    return False
+
+                raise
+
+            if data is None:
+                return False
+
+            if not data:
+                # Server closed the connection
+                self.close()
+
+                if self.resp is None:
+                    raise OSError("Connection closed by server.")
+
+                if self.resp._remain is not None or self.resp.chunked:
+                    raise OSError("Connection closed before response body was complete.")
+
+                return self.finish()
+
+            if self.resp is None:
+                self.receive_head(data)
+            else:
+                self.body += data
+
+            if self.resp is not None and self.body_complete():
+                self.close()
+                return self.finish()
+
+    def receive_head(self, data):
+        start = len(self.head) - 3 if len(self.head) > 3 else 0
+        self.head += data
+        end = self.head.find(b"\r\n\r\n", start)
+
+        if end < 0:
+            return
+
+        head = self.head[:end + 4]
+        self.body = bytearray(self.head[end + 4:])
+        self.head = b""
+        resp = self.kw.get("response_class", Response)(
+            None, None, save_headers=self.kw.get("save_headers", False)
+        )
+        location = _parse_head(resp, head)
+        del head
+        self.ctx.redirect = False
+
+        if location is not None:
+            self.ctx.set_location(resp.status_code, location)
+
+        resp._init_body(self.ctx.method)
+        # position of the next chunk size line in the body
+        self.chunk_pos = 0
+        self.resp = resp
+
+    def body_complete(self):
+        # Check whether the response body has been received completely, as far as the
+        # response headers allow to tell without the server closing the connection
+        resp = self.resp
+
+        if resp.chunked:
+            return self.chunks_complete()
+
+        return resp._remain is not None and len(self.body) >= resp._remain
+
+    def chunks_complete(self):
+        body = self.body
+        size = len(body)
+        pos = self.chunk_pos
+
+        while True:
+            end = _find_newline(body, pos, size)
+
+            if end < 0:
+                return False
+
+            chunk_size = int(bytes(body[pos:end]).split(b";", 1)[0].strip(), 16)
+
+            if chunk_size == 0:
+                # Last chunk, look for the empty line after the (optional) trailer
+                while True:
+                    pos = end + 1
+                    end = _find_newline(body, pos, size)
+
+                    if end < 0:
+                        return False
+
+                    if end - pos <= 1:
+                        return True
+
+            pos = end + 1 + chunk_size + 2
+
+            if pos > size:
+                return False
+
+            self.chunk_pos = pos
+
+    def finish(self):
+        resp = self.resp
+        self.resp = None
+        resp._sf = BytesIO(self.body)
+        self.body = None
+
+        if self.ctx.redirect:
+            resp.close()
+            self.max_redirects -= 1
+
+            if self.max_redirects < 0:
+                raise ValueError("Maximum redirection count exceeded.")
+
+            self.start(self.poller)
+            return False
+
+        if self.kw.get("decompress"):
+            resp._init_decoder()
+
+        self.response = resp
+        return True
+
+
+class PollClient:
+    """Perform many requests at once with non-blocking sockets and select.poll.
+
+    This needs neither threads nor asyncio. Add requests with add() and call poll() repeatedly,
+    e.g. from the application's main loop, until all requests are done.
+
+    Keyword arguments are used as defaults for all requests. They are the same as for
+    request(), except session, template and hooks, which are not supported, and the request
+    data must be bytes or str. The timeout applies to each request as a whole (including
+    following redirects). Host names are resolved with blocking calls (pass a caching resolver
+    to avoid repeated lookups).
+
+    """
+
+    def __init__(self, **defaults):
+        self.defaults = defaults
+        self._poller = select.poll()
+        self._active = []
+
+    def __len__(self):
+        return len(self._active)
+
+    def add(self, method, url, **kw):
+        """Start a request and return a PollRequest instance for it.
+
+        Exceptions raised while preparing the request, resolving the host name or starting
+        to connect are raised immediately.
+
+        """
+        for name in self.defaults:
+            kw.setdefault(name, self.defaults[name])
+
+        req = PollRequest(method, url, kw)
+        req.start(self._poller)
+        self._active.append(req)
+        return req
+
+    def poll(self, timeout=0):
+        """Process socket events and return a list of the requests, which are done.
+
+        Waits at most timeout seconds for events (indefinitely if None, but not beyond the
+        time-out of any request). Requests, which timed out, are done with an OSError as their
+        error.
+
+        """
+        done = []
+        wait = -1 if timeout is None else int(timeout * 1000)
+        now = ticks_ms()
+
+        for req in self._active[:]:
+            left = req.remaining(now)
+
+            if left is None:
+                continue
+
+            if left < 0:
+                self._fail(req, OSError(errno.ETIMEDOUT, "Request timed out."))
+                done.append(req)
+            elif wait < 0 or left < wait:
+                wait = left
+
+        if not self._active:
+            return done
+
+        reqs = {}
+
+        for req in self._active:
+            reqs[req.key] = req
+
+        for obj, event in self._poller.poll(wait):
+            req = reqs.get(obj)
+
+            if req is None or req.sock is None:
+                continue
+
+            try:
+                if req.step(event):
+                    self._active.remove(req)
+                    done.append(req)
+            except Exception as exc:
+                self._fail(req, exc)
+                done.append(req)
+
+        return done
+
+    def _fail(self, req, exc):
+        req.close()
+        req.error = exc
+        self._active.remove(req)
+
+    def close(self):
+        """Abort all active requests."""
+        for req in self._active:
+            req.close()
+
+        self._active = []
@@ -0,0 +1,113 @@
+"""Caching host name resolver for mrequests."""
+
+from .mrequests import _getaddrinfo, ticks_diff, ticks_ms
+
+
+class Resolver:
+    """Resolve host names to address info tuples and cache the results.
+
+    Instances are callables, which can be passed as the resolver argument to request()
+    (or a Session). Calling an instance with a host name and port returns a tuple
+    (family, type, proto, canonname, sockaddr) like one entry of the list returned by
+    socket.getaddrinfo().
+
+    ttl: number of seconds successful lookups are cached.
+
+    negative_ttl: number of seconds failed lookups are cached. The cached exception is raised
+        again for lookups of the same host and port during this time.
+
+    max_entries: maximum number of cached lookups. When exceeded, the entry closest to
+        expiration is evicted. With 0, nothing is cached.
+
+    resolve: an optional function, which takes a host name and returns an IP address as a string
+        (or a list of them, of which the first is used), e.g. a DNS-over-HTTPS lookup. It is used
+        instead of the system resolver.
+
+    """
+
+    def __init__(self, ttl=300, negative_ttl=30, max_entries=16, resolve=None):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.resolve = resolve
+        # (host, port) -> [timestamp, ttl in ms, address info or exception]
+        self._cache = {}
+        # host -> IP address
+        self._static = {}
+
+    def __call__(self, host, port):
+        key = (host, port)
+        entry = self._cache.get(key)
+
+        if entry is not None:
+            if ticks_diff(ticks_ms(), entry[0]) <= entry[1]:
+                if isinstance(entry[2], Exception):
+                    raise entry[2]
+
+                return entry[2]
+
+            del self._cache[key]
+
+        try:
+            ai = self._lookup(host, port)
+        except OSError as exc:
+            self._store(key, self.negative_ttl, exc)
+            raise
+
+        self._store(key, self.ttl, ai)
+        return ai
+
+    def _lookup(self, host, port):
+        address = self._static.get(host)
+
+        if address is None and self.resolve is not None:
+            address = self.resolve(host)
+
+            if not address:
+                raise OSError("Could not resolve host name '%s'." % host)
+
+            if not isinstance(address, str):
+                address = address[0]
+
+        # Looking up a numeric address does not send a DNS query
+        return _getaddrinfo(address or host, port)
+
+    def _store(self, key, ttl, value):
+        cache = self._cache
+
+        if self.max_entries < 1:
+            return
+
+        if len(cache) >= self.max_entries:
+            now = ticks_ms()
+            evict = None
+            evict_left = None
+
+            for k in list(cache):
+                left = cache[k][1] - ticks_diff(now, cache[k][0])
+
+                if left < 0:
+                    del cache[k]
+                elif evict is None or left < evict_left:
+                    evict = k
+                    evict_left = left
+
+            if len(cache) >= self.max_entries:
+                del cache[evict]
+
+        cache[key] = [ticks_ms(), int(ttl * 1000), value]
+
+    def add(self, host, address):
+        """Add a static host table entry mapping host to given IP address string."""
+        self._static[host] = address
+        self.forget(host)
+
+    def forget(self, host):
+        """Remove all cached lookups for given host."""
+        for key in list(self._cache):
+            if key[0] == host:
+                del self._cache[key]
+
+    def clear(self):
+        """Remove all cached lookups (but not static host table entries)."""
+        self._cache.clear()
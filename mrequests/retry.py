@@ -0,0 +1,187 @@
+"""Retry policy for requests with exponential backoff, jitter and support for Retry-After."""
+
+try:
+    from time import sleep
+except ImportError:
+    from utime import sleep
+
+try:
+    from random import getrandbits
+except ImportError:
+    from urandom import getrandbits
+
+from .mrequests import IDEMPOTENT_METHODS, HeaderMap, _rewind, _tell
+
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+# Headers saved for every response, when retrying
+_RETRY_HEADERS = ("Retry-After", "Date")
+
+
+def _days(year, month, day):
+    # Number of days since 1970-01-01 for the given date of the proleptic Gregorian calendar
+    year -= month <= 2
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    return era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 719468
+
+
+def parse_http_date(value):
+    """Return the seconds since the epoch for a date like 'Sun, 06 Nov 1994 08:49:37 GMT'.
+
+    Returns None, if the date can not be parsed. Only the IMF-fixdate format, which servers
+    are required to send, is supported.
+
+    """
+    try:
+        _, day, month, year, hms, _ = value.split()
+        hour, minute, second = hms.split(":")
+        days = _days(int(year), _MONTHS.index(month) + 1, int(day))
+        return days * 86400 + int(hour) * 3600 + int(minute) * 60 + int(second)
+    except ValueError:
+        return None
+
+
+def retry_after(resp):
+    """Return the delay in seconds requested by the response's Retry-After header or None.
+
+    If the header contains a date, the delay is calculated relative to the response's Date
+    header, since the local clock of a microcontroller often is not set.
+
+    """
+    headers = resp.headers
+
+    if headers is None:
+        return None
+
+    value = headers.get("retry-after")
+
+    if value is None:
+        return None
+
+    try:
+        return max(0, int(value))
+    except ValueError:
+        pass
+
+    when = parse_http_date(value)
+    now = parse_http_date(headers.get("date") or "")
+
+    if when is not None and now is not None:
+        return max(0, when - now)
+
+
+class Retry:
+    """Policy for retrying requests on connection errors and certain response status codes.
+
+    Pass an instance as the retry keyword argument to request() or to a Session (it is not
+    modified, so one instance can be shared by any number of requests):
+
+    attempts - maximum number of times a request is sent (including the first).
+    statuses - response status codes, on which a request is retried. If the response has a
+        Retry-After header, the retry is delayed at least as long as requested, unless the
+        delay is longer than max_retry_after, in which case the response is returned.
+    exceptions - exception class or tuple of classes, on which a request is retried.
+    methods - HTTP methods, which are retried. Defaults to the idempotent methods. Pass None
+        to retry requests with any method.
+    backoff - delay in seconds before the first retry. It doubles with each further retry up
+        to max_backoff.
+    jitter - fraction of the delay (0.0 - 1.0), by which it is randomly shortened, so clients
+        which failed at the same time do not all retry at the same time.
+
+    Request body data given as bytes, str, a dict or json is sent again unchanged. File-like
+    body data is rewound to its position at the start of the request. Requests with other
+    (e.g. iterable) body data are not retried.
+
+    """
+
+    def __init__(
+        self,
+        attempts=3,
+        statuses=(429, 502, 503, 504),
+        exceptions=OSError,
+        methods=IDEMPOTENT_METHODS,
+        backoff=0.5,
+        max_backoff=30,
+        jitter=0.5,
+        max_retry_after=60,
+    ):
+        self.attempts = attempts
+        self.statuses = statuses
+        self.exceptions = exceptions
+        self.methods = methods
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.max_retry_after = max_retry_after
+
+    def delay(self, retry):
+        """Return the delay in seconds before the given retry (1 for the first)."""
+        delay = min(self.backoff * (1 << (retry - 1)), self.max_backoff)
+
+        if self.jitter:
+            delay *= 1 - self.jitter * getrandbits(24) / 0x1000000
+
+        return delay
+
+    def wait(self, seconds):
+        sleep(seconds)
+
+    def call(self, func, method, url, **kw):
+        """Call func(method, url, **kw) and call it again according to this policy.
+
+        Returns the response of the last attempt or raises the exception of the last attempt.
+
+        """
+        if self.methods is not None and method not in self.methods:
+            return func(method, url, **kw)
+
+        data = kw.get("data")
+        pos = _tell(data)
+        save_headers = kw.get("save_headers")
+
+        if not save_headers:
+            kw["save_headers"] = _RETRY_HEADERS
+        elif save_headers is not True:
+            kw["save_headers"] = tuple(save_headers) + _RETRY_HEADERS
+
+        attempt = 1
+
+        while True:
+            try:
+                resp = func(method, url, **kw)
+            except self.exceptions:
+                if attempt >= self.attempts or not self._rewind(data, pos):
+                    raise
+
+                delay = self.delay(attempt)
+            else:
+                if resp.status_code not in self.statuses or attempt >= self.attempts:
+                    break
+
+                delay = self.delay(attempt)
+                wanted = retry_after(resp)
+
+                if wanted is not None:
+                    if wanted > self.max_retry_after:
+                        break
+
+                    delay = max(delay, wanted)
+
+                if not self._rewind(data, pos):
+                    break
+
+                resp.close()
+
+            # print("Retry #%i in %.2f s" % (attempt, delay))
+            self.wait(delay)
+            attempt += 1
+
+        if not save_headers and isinstance(resp.headers, HeaderMap):
+            resp.headers = None
+
+        return resp
+
+    def _rewind(self, data, pos):
+        # Return True, if the request body data can be sent again
+        return data is None or isinstance(data, (str, dict)) or _rewind(data, pos)
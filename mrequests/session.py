@@ -0,0 +1,370 @@
+"""Persistent HTTP/1.1 connections for mrequests via a Session object."""
+
+from .mrequests import (
+    HEAD_BUF_SIZE,
+    IDEMPOTENT_METHODS,
+    MICROPY,
+    RequestContext,
+    Response,
+    _accept_encoding,
+    _add_params,
+    _close_conn,
+    _connect,
+    _encode_request,
+    _is_timeout,
+    _join_into,
+    _normalize,
+    _parse_head,
+    _parts_size,
+    _prepare_data,
+    _read_head,
+    _write_body,
+    encode_basic_auth,
+    request,
+    ticks_diff,
+    ticks_ms,
+    ticks_us,
+)
+
+
+class Session:
+    """Keep connections open and re-use them for subsequent requests to the same server.
+
+    Connections are kept per (scheme, host, port) and are handed back to the session's pool
+    once the body of the response received over them has been read completely.
+
+    max_per_host: maximum number of idle connections kept per (scheme, host, port).
+
+    max_connections: maximum number of idle connections kept in total. If exceeded, the least
+        recently used connection is closed.
+
+    idle_timeout: number of seconds after which an idle connection is closed and not re-used
+        anymore.
+
+    Any additional keyword arguments are used as defaults for the keyword arguments passed to
+    ``request`` by the request methods of the session.
+
+    """
+
+    def __init__(self, max_per_host=2, max_connections=4, idle_timeout=30, **defaults):
+        self.max_per_host = max_per_host
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.defaults = defaults
+        # re-usable buffer for reading response heads
+        self.buf = bytearray(HEAD_BUF_SIZE)
+        # list of [key, sock, sockfile, last_used], least recently used first
+        self._pool = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def acquire(self, key):
+        """Return an idle (sock, sockfile) tuple for given key from the pool or None."""
+        self._expire()
+        pool = self._pool
+
+        for i in range(len(pool) - 1, -1, -1):
+            if pool[i][0] == key:
+                entry = pool.pop(i)
+                return entry[1], entry[2]
+
+    def release(self, key, sock, sockfile):
+        """Put the connection for given key back into the pool."""
+        pool = self._pool
+        pool.append([key, sock, sockfile, ticks_ms()])
+        count = 0
+
+        for i in range(len(pool) - 1, -1, -1):
+            if pool[i][0] == key:
+                count += 1
+
+                if count > self.max_per_host:
+                    self._discard(i)
+
+        while len(pool) > self.max_connections:
+            self._discard(0)
+
+    def close(self):
+        """Close all idle connections in the pool."""
+        while self._pool:
+            self._discard(0)
+
+    def _discard(self, index):
+        _, sock, sf, _ = self._pool.pop(index)
+
+        if not MICROPY:
+            sf.close()
+
+        sock.close()
+
+    def _expire(self):
+        now = ticks_ms()
+        timeout = self.idle_timeout * 1000
+        pool = self._pool
+
+        for i in range(len(pool) - 1, -1, -1):
+            if ticks_diff(now, pool[i][3]) > timeout:
+                self._discard(i)
+
+    def request(self, method, url, **kw):
+        for name in self.defaults:
+            kw.setdefault(name, self.defaults[name])
+
+        return request(method, url, session=self, **kw)
+
+    def head(self, url, **kw):
+        return self.request("HEAD", url, **kw)
+
+    def get(self, url, **kw):
+        return self.request("GET", url, **kw)
+
+    def post(self, url, **kw):
+        return self.request("POST", url, **kw)
+
+    def put(self, url, **kw):
+        return self.request("PUT", url, **kw)
+
+    def patch(self, url, **kw):
+        return self.request("PATCH", url, **kw)
+
+    def delete(self, url, **kw):
+        return self.request("DELETE", url, **kw)
+
+    def pipeline(self, requests, depth=4, allow_unsafe=False, **kw):
+        """Send requests pipelined over persistent connections and yield the responses in order.
+
+        requests is an iterable of URLs, (method, url) or (method, url, kwargs) tuples, where
+        kwargs is a dict of keyword arguments for request(). Additional keyword arguments and
+        the session defaults are used as defaults for these.
+
+        Up to depth requests are written to a connection before the response to the first of
+        them is read. The body of each response is read completely before it is yielded, so
+        use its content, text or json attributes to access it.
+
+        Only idempotent requests may be pipelined, because they may have to be sent again, unless
+        allow_unsafe is true. If the server closes the connection before all pipelined requests
+        are answered, the remaining requests are sent again one by one. If it times out, the
+        exception is raised instead. Redirects are followed by a separate request.
+
+        """
+        for name in self.defaults:
+            kw.setdefault(name, self.defaults[name])
+
+        items = iter(requests)
+        # requests, which have to be sent again
+        retry = []
+        # requests sent, but not answered yet
+        queue = []
+        # [key, sock, sockfile, re-used from pool, number of responses received]
+        conn = None
+        pending = b""
+        item = None
+
+        try:
+            while True:
+                try:
+                    while len(queue) < depth:
+                        if item is None:
+                            if retry:
+                                item = retry.pop(0)
+                            else:
+                                try:
+                                    method, url, rkw = _normalize(next(items), kw)
+                                except StopIteration:
+                                    break
+
+                                if method not in IDEMPOTENT_METHODS and not allow_unsafe:
+                                    raise ValueError("Can not pipeline %s requests." % method)
+
+                                item = (
+                                    RequestContext(_add_params(url, rkw.get("params")), method),
+                                    rkw,
+                                )
+
+                        ctx, rkw = item
+                        key = (ctx.scheme, ctx.host, ctx.port)
+
+                        if conn is not None and conn[0] != key:
+                            if queue:
+                                # read responses from the current server first
+                                break
+
+                            self._put_back(conn, pending)
+                            conn = None
+
+                        if conn is None:
+                            conn = self._open(key, ctx, rkw)
+                            pending = b""
+
+                        self._send(conn[2], ctx, rkw)
+                        queue.append(item)
+                        item = None
+
+                    if not queue:
+                        break
+
+                    if not MICROPY:
+                        conn[2].flush()
+
+                    ctx, rkw = queue[0]
+                    resp, pending = self._receive(conn[2], ctx, rkw, pending)
+                except OSError as exc:
+                    if conn is None:
+                        raise
+
+                    if _is_timeout(exc):
+                        # The server may still process the requests, so they are not sent again
+                        _close_conn(conn[1], conn[2])
+                        conn = None
+                        raise
+
+                    # Server closed the connection, send unanswered requests again. If it wasn't
+                    # just a stale connection from the pool, fall back to serial requests.
+                    _close_conn(conn[1], conn[2])
+                    reused, answered = conn[3], conn[4]
+                    conn = None
+
+                    if not reused or answered:
+                        if depth == 1 and not answered:
+                            raise
+
+                        depth = 1
+
+                    if item is not None:
+                        queue.append(item)
+                        item = None
+
+                    retry = queue + retry
+                    queue = []
+                    continue
+
+                queue.pop(0)
+                conn[4] += 1
+
+                if not resp._keep_alive:
+                    # Server closes the connection after this response
+                    _close_conn(conn[1], conn[2])
+                    conn = None
+                    retry = queue + retry
+                    queue = []
+
+                    if retry:
+                        depth = 1
+
+                if ctx.redirect:
+                    resp = self._follow(ctx, rkw)
+
+                yield resp
+        finally:
+            if conn is not None:
+                if queue:
+                    _close_conn(conn[1], conn[2])
+                else:
+                    self._put_back(conn, pending)
+
+    def _open(self, key, ctx, kw):
+        conn = self.acquire(key)
+        timeout = kw.get("timeout")
+
+        if conn:
+            sock, sf = conn
+
+            if hasattr(sock, "settimeout"):
+                sock.settimeout(timeout)
+
+            if kw.get("hooks") is not None:
+                kw["hooks"].connection_reused(ctx, ticks_us())
+        else:
+            sock = _connect(
+                ctx, timeout, kw.get("ssl_context"), kw.get("resolver"), kw.get("hooks")
+            )
+            sf = sock if MICROPY else sock.makefile("rwb")
+
+        return [key, sock, sf, bool(conn), 0]
+
+    def _put_back(self, conn, pending):
+        if pending:
+            # unexpected data from server
+            _close_conn(conn[1], conn[2])
+        else:
+            self.release(conn[0], conn[1], conn[2])
+
+    def _send(self, sf, ctx, kw):
+        headers = kw.get("headers", {})
+        auth = kw.get("auth")
+
+        if auth:
+            headers = headers.copy()
+            headers.update(auth if callable(auth) else encode_basic_auth(auth[0], auth[1]))
+
+        if kw.get("decompress"):
+            headers = _accept_encoding(headers)
+
+        data, content_type = _prepare_data(kw.get("data"), kw.get("json"), kw.get("encoding"))
+        parts, body, size = _encode_request(ctx, headers, data, content_type, False)
+
+        if body is not None and isinstance(body, (bytes, bytearray)) and _parts_size(parts) + size <= len(
+            self.buf
+        ):
+            parts.append(body)
+            body = None
+
+        sf.write(_join_into(self.buf, parts))
+        hooks = kw.get("hooks")
+
+        if hooks is not None:
+            hooks.headers_sent(ctx, ticks_us())
+
+        if body is not None:
+            _write_body(sf, body, size, self.buf)
+
+        if hooks is not None:
+            hooks.request_sent(ctx, ticks_us())
+
+    def _receive(self, sf, ctx, kw, pending):
+        # Read the next response and its complete body. Returns the response and data already
+        # received, which belongs to the following response.
+        resp = kw.get("response_class", Response)(None, sf, save_headers=kw.get("save_headers"))
+        head, resp._pending = _read_head(sf, self.buf, pending)
+        hooks = kw.get("hooks")
+
+        if hooks is not None:
+            hooks.status_received(ctx, ticks_us())
+
+        location = _parse_head(resp, head)
+        del head
+        ctx.redirect = False
+
+        if hooks is not None:
+            hooks.headers_parsed(ctx, ticks_us())
+            resp._trace = (hooks, ctx)
+
+        if location is not None:
+            ctx.set_location(resp.status_code, location)
+
+        resp._init_body(ctx.method)
+
+        if kw.get("decompress"):
+            resp._init_decoder()
+
+        resp._cached = resp.read(size=None)
+        pending = resp._pending
+        resp._pending = b""
+        resp._sf = None
+        return resp, pending
+
+    def _follow(self, ctx, kw):
+        max_redirects = kw.get("max_redirects", 1)
+
+        if max_redirects < 1:
+            raise ValueError("Maximum redirection count exceeded.")
+
+        kw = kw.copy()
+        kw["max_redirects"] = max_redirects - 1
+        resp = self.request(ctx.method, ctx.url, **kw)
+        resp.content
+        return resp
@@ -0,0 +1,137 @@
+"""Tracing hooks for measuring the duration of the phases of requests."""
+
+from .mrequests import ticks_diff
+
+# Phases reported by TimingTracer.breakdown() as (name, start event, end event)
+PHASES = (
+    ("resolve", "resolve_start", "resolve_end"),
+    ("connect", "connect_start", "connect_end"),
+    ("tls", "tls_start", "tls_end"),
+    ("send", None, "request_sent"),
+    ("wait", "request_sent", "status_received"),
+    ("headers", "status_received", "headers_parsed"),
+    ("body", "headers_parsed", "body_complete"),
+)
+
+
+class Tracer:
+    """Base class for objects passed as hooks to request().
+
+    The methods are called with the request context (with the attributes method, scheme, host,
+    port, path and url) and a timestamp in microseconds from time.ticks_us on MicroPython or
+    time.perf_counter_ns on CPython. Use ticks_diff to compute differences. The default
+    implementations pass the name of the event to event(), so either override this or the
+    methods for the events of interest.
+
+    Events are emitted in this order for each request and each redirect:
+
+    resolve_start, resolve_end, connect_start, connect_end, tls_start, tls_end (HTTPS only)
+        when a new connection is opened
+    connection_reused
+        instead of the above, when a connection from a session's pool is used
+    headers_sent
+        request line and headers were written (and the request body, if it's small)
+    request_sent
+        the complete request was written and flushed
+    status_received
+        the response head was received
+    headers_parsed
+        the response headers were passed to the response's add_header method
+    body_complete
+        the response body was read completely (emitted immediately for responses without
+        a body, e.g. to HEAD requests, and not at all, if the response is closed before)
+
+    """
+
+    def event(self, name, ctx, ts):
+        pass
+
+    def resolve_start(self, ctx, ts):
+        self.event("resolve_start", ctx, ts)
+
+    def resolve_end(self, ctx, ts):
+        self.event("resolve_end", ctx, ts)
+
+    def connect_start(self, ctx, ts):
+        self.event("connect_start", ctx, ts)
+
+    def connect_end(self, ctx, ts):
+        self.event("connect_end", ctx, ts)
+
+    def tls_start(self, ctx, ts):
+        self.event("tls_start", ctx, ts)
+
+    def tls_end(self, ctx, ts):
+        self.event("tls_end", ctx, ts)
+
+    def connection_reused(self, ctx, ts):
+        self.event("connection_reused", ctx, ts)
+
+    def headers_sent(self, ctx, ts):
+        self.event("headers_sent", ctx, ts)
+
+    def request_sent(self, ctx, ts):
+        self.event("request_sent", ctx, ts)
+
+    def status_received(self, ctx, ts):
+        self.event("status_received", ctx, ts)
+
+    def headers_parsed(self, ctx, ts):
+        self.event("headers_parsed", ctx, ts)
+
+    def body_complete(self, ctx, ts):
+        self.event("body_complete", ctx, ts)
+
+
+class TimingTracer(Tracer):
+    """Record the timestamps of the events of the last request (or redirect).
+
+    If callback is given, it is called with the request context and the result of breakdown()
+    when the response body is complete, e.g. to collect the timings of many requests.
+
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.reused = False
+        self.timestamps = {}
+        self._last = None
+
+    def event(self, name, ctx, ts):
+        if name in ("resolve_start", "connection_reused"):
+            # start of a new request
+            self.timestamps = {}
+            self.reused = name == "connection_reused"
+
+        self.timestamps[name] = ts
+        self._last = ts
+
+        if name == "body_complete" and self.callback is not None:
+            self.callback(ctx, self.breakdown())
+
+    def breakdown(self):
+        """Return a dict mapping phase names to their duration in microseconds.
+
+        The phases are resolve, connect, tls, send (from the connection being ready until the
+        request was sent), wait (until the response head was received), headers, body and
+        total. Phases, whose events were not (yet) emitted, are omitted.
+
+        """
+        ts = self.timestamps
+        result = {}
+
+        for name, start, end in PHASES:
+            if start is None:
+                for start in ("tls_end", "connect_end", "connection_reused"):
+                    if start in ts:
+                        break
+
+            if start in ts and end in ts:
+                result[name] = ticks_diff(ts[end], ts[start])
+
+        first = ts.get("connection_reused", ts.get("resolve_start"))
+
+        if first is not None:
+            result["total"] = ticks_diff(self._last, first)
+
+        return result
@@ -3,43 +3,123 @@
 # Extracted from: https://github.com/micropython/micropython-lib/blob/master/urllib.parse/urllib/parse.py
 #
 
-from collections import defaultdict
+# Maximum number of lookup tables cached for different safe sets
+MAX_QUOTE_TABLES = 8
+# (safe, plus) -> lookup table
+_quote_tables = {}
+_ALWAYS_SAFE_BYTES = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ" b"abcdefghijklmnopqrstuvwxyz" b"0123456789" b"_.-"
+_HEX = b"0123456789ABCDEF"
 
-# XXX: Consider replacing with functools.lru_cache
-_safe_quoters = {}
-_ALWAYS_SAFE = frozenset(
-    b"ABCDEFGHIJKLMNOPQRSTUVWXYZ" b"abcdefghijklmnopqrstuvwxyz" b"0123456789" b"_.-"
-)
-_ALWAYS_SAFE_BYTES = bytes(_ALWAYS_SAFE)
 
+def _quote_table(safe, plus=False):
+    # Return a 256-byte lookup table, which maps each byte value to itself, if it is safe, to
+    # b"+" for a space, if plus is true, or to 0 (1 for the null byte), if it has to be
+    # percent-encoded, and the bytes, which can be copied unchanged.
+    key = (safe, plus)
+    entry = _quote_tables.get(key)
 
-class Quoter(defaultdict):
-    """A mapping from bytes (in range(0,256)) to strings.
+    if entry is None:
+        if isinstance(safe, str):
+            # Normalize 'safe' by converting to bytes and removing non-ASCII chars
+            safe = safe.encode("ascii", "ignore")
 
-    String values are percent-encoded byte values, unless the key < 128, and
-    in the "safe" set (either the specified safe set, or default set).
-    """
+        safe = bytes([c for c in _ALWAYS_SAFE_BYTES + safe if 1 < c < 128])
+        table = bytearray(256)
+        table[0] = 1
+
+        for c in safe:
+            table[c] = c
+
+        if plus:
+            table[32] = 43
+            safe = safe.replace(b" ", b"")
+
+        if len(_quote_tables) >= MAX_QUOTE_TABLES:
+            del _quote_tables[next(iter(_quote_tables))]
+
+        entry = _quote_tables[key] = (bytes(table), safe)
+
+    return entry
+
+
+def _quoted_size(bs, table):
+    # Return the length of bs after percent-encoding
+    size = len(bs)
+
+    for c in bs:
+        if table[c] < 2:
+            size += 2
+
+    return size
+
+
+def _quote_into(bs, table, out, pos):
+    # Percent-encode bs into bytearray out starting at pos, copying runs of safe bytes in bulk.
+    # Returns the position after the encoded data.
+    mv = memoryview(bs)
+    # start of the current run of safe bytes
+    run = 0
+    i = 0
+
+    for c in bs:
+        t = table[c]
+
+        if t != c:
+            if i > run:
+                out[pos:pos + i - run] = mv[run:i]
+                pos += i - run
+
+            if t > 1:
+                out[pos] = t
+                pos += 1
+            else:
+                out[pos] = 37
+                out[pos + 1] = _HEX[c >> 4]
+                out[pos + 2] = _HEX[c & 15]
+                pos += 3
+
+            run = i + 1
+
+        i += 1
 
-    # Keeps a cache internally, using defaultdict, for efficiency (lookups
-    # of cached keys don't call Python code at all).
-    def __init__(self, safe):
-        """safe: bytes object."""
-        self.safe = _ALWAYS_SAFE.union(safe)
+    if i > run:
+        out[pos:pos + i - run] = mv[run:i]
+        pos += i - run
 
-    def __repr__(self):
-        # Without this, will just display as a defaultdict
-        return "<Quoter %r>" % dict(self)
+    return pos
 
-    def __missing__(self, b):
-        # Handle a cache miss. Store quoted string in cache and return.
-        res = chr(b) if b in self.safe else "%{:02X}".format(b)
-        self[b] = res
-        return res
+
+def _quote(bs, safe, plus=False):
+    # Return bs percent-encoded as a bytearray or bs itself, if nothing needs to be encoded
+    table, chars = _quote_table(safe, plus)
+
+    if not bs.rstrip(chars):
+        return bs
+
+    out = bytearray(_quoted_size(bs, table))
+    _quote_into(bs, table, out, 0)
+    return out
 
 
 def clear_cache():
-    """Clear the quoters cache."""
-    _safe_quoters.clear()
+    """Clear the cache of lookup tables for quoting."""
+    _quote_tables.clear()
+
+
+def _to_bytes(string, encoding, errors, func):
+    if isinstance(string, str):
+        if encoding is None:
+            encoding = "utf-8"
+        if errors is None:
+            errors = "strict"
+        return bytes(string, encoding, errors)
+
+    if encoding is not None:
+        raise TypeError("%s() doesn't support 'encoding' for bytes" % func)
+    if errors is not None:
+        raise TypeError("%s() doesn't support 'errors' for bytes" % func)
+
+    return string
 
 
 def quote(string, safe="/", encoding=None, errors=None):
@@ -71,21 +151,10 @@ def quote(string, safe="/", encoding=None, errors=None):
     By default, encoding='utf-8' (characters are encoded with UTF-8), and
     errors='strict' (unsupported characters raise a UnicodeEncodeError).
     """
-    if isinstance(string, str):
-        if not string:
-            return string
-        if encoding is None:
-            encoding = "utf-8"
-        if errors is None:
-            errors = "strict"
-        string = bytes(string, encoding, errors)
-    else:
-        if encoding is not None:
-            raise TypeError("quote() doesn't support 'encoding' for bytes")
-        if errors is not None:
-            raise TypeError("quote() doesn't support 'errors' for bytes")
+    if isinstance(string, str) and not string:
+        return string
 
-    return quote_from_bytes(string, safe)
+    return quote_from_bytes(_to_bytes(string, encoding, errors, "quote"), safe)
 
 
 def quote_plus(string, safe="", encoding=None, errors=None):
@@ -93,20 +162,15 @@ def quote_plus(string, safe="", encoding=None, errors=None):
     HTML form values. Plus signs in the original string are escaped unless
     they are included in safe. It also does not have safe default to '/'.
     """
-    # Check if ' ' in string, where string may either be a str or bytes.  If
-    # there are no spaces, the regular quote will produce the right answer.
-    if (isinstance(string, str) and " " not in string) or (
-        isinstance(string, bytes) and b" " not in string
-    ):
-        return quote(string, safe, encoding, errors)
+    if isinstance(string, str) and not string:
+        return string
 
-    if isinstance(safe, str):
-        space = " "
-    else:
-        space = b" "
+    string = _to_bytes(string, encoding, errors, "quote_plus")
 
-    string = quote(string, safe + space, encoding, errors)
-    return string.replace(" ", "+")
+    if not string:
+        return ""
+
+    return str(_quote(string, safe, True), "ascii")
 
 
 def quote_from_bytes(bs, safe="/"):
@@ -120,21 +184,183 @@ def quote_from_bytes(bs, safe="/"):
     if not bs:
         return ""
 
-    if isinstance(safe, str):
-        # Normalize 'safe' by converting to bytes and removing non-ASCII chars
-        safe = safe.encode("ascii", "ignore")
-    else:
-        safe = bytes([c for c in safe if c < 128])
+    return str(_quote(bs, safe), "ascii")
+
+
+def quote_bytes(bs, safe=b"/", plus=False):
+    """Like quote_from_bytes(), but returns the percent-encoded data as bytes.
 
-    if not bs.rstrip(_ALWAYS_SAFE_BYTES + safe):
-        return bs.decode()
+    If plus is true, spaces are replaced with '+', like quote_plus() does.
+    quote_bytes(b'abc def') -> b'abc%20def'
+    """
+    if not isinstance(bs, (bytes, bytearray)):
+        raise TypeError("quote_bytes() expected bytes")
+
+    return bytes(_quote(bs, safe, plus))
+
+
+def _items(query):
+    # Return the (key, value) pairs of a dict or sequence of two-element tuples
+    if hasattr(query, "items"):
+        return query.items()
 
+    # It's a bother at times that strings and string-like objects are
+    # sequences.
     try:
-        quoter = _safe_quoters[safe]
-    except KeyError:
-        _safe_quoters[safe] = quoter = Quoter(safe).__getitem__
+        # non-sequence items should not work with len()
+        # non-empty strings will fail this
+        if len(query) and not isinstance(query[0], tuple):
+            raise TypeError
+        # Zero-length sequences of all types will get here and succeed,
+        # but that's a minor nit.  Since the original implementation
+        # allowed empty dicts that type of behavior probably should be
+        # preserved for consistency
+    except TypeError:
+        raise TypeError("not a valid non-string sequence or mapping object")
+
+    return query
+
+
+def _encode_value(value, encoding, errors):
+    if isinstance(value, (bytes, bytearray)):
+        return value
+
+    if not isinstance(value, str):
+        value = str(value)
+
+    return bytes(value, encoding or "utf-8", errors or "strict")
+
+
+def _iter_pairs(items, doseq, encoding, errors):
+    # Yield keys and values as bytes, with a pair for each element of sequence values, if doseq
+    for k, v in items:
+        k = _encode_value(k, encoding, errors)
+
+        if doseq and not isinstance(v, (bytes, bytearray, str)):
+            try:
+                # Is this a sufficient test for sequence-ness?
+                len(v)
+            except TypeError:
+                # not a sequence
+                pass
+            else:
+                # loop over the sequence
+                for elt in v:
+                    yield k, _encode_value(elt, encoding, errors)
+
+                continue
+
+        yield k, _encode_value(v, encoding, errors)
+
+
+class FormEncoder:
+    """Encode a dict or sequence of two-element tuples as application/x-www-form-urlencoded data.
 
-    return "".join([quoter(char) for char in bs])
+    The encoded data is written directly into the buffer passed to readinto(), so an instance
+    can be passed as the data argument to request() to stream the request body to the socket.
+    The arguments are the same as for urlencode(). The query must not change while the data
+    is read.
+
+    """
+
+    content_type = b"application/x-www-form-urlencoded"
+
+    def __init__(self, query, doseq=False, safe="", encoding=None, errors=None):
+        self.items = _items(query)
+        self.doseq = doseq
+        self.encoding = encoding
+        self.errors = errors
+        self._table = _quote_table(safe, True)[0]
+        self._size = None
+        self.seek(0)
+
+    def _pairs(self):
+        return _iter_pairs(self.items, self.doseq, self.encoding, self.errors)
+
+    def __len__(self):
+        if self._size is None:
+            table = self._table
+            size = -1
+
+            for k, v in self._pairs():
+                size += _quoted_size(k, table) + _quoted_size(v, table) + 2
+
+            self._size = max(0, size)
+
+        return self._size
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        """Rewind the encoder, so the data can be sent again. Only seek(0) is supported."""
+        if offset or whence:
+            raise OSError("FormEncoder can only be rewound to the start.")
+
+        self._iter = self._pairs()
+        # rest of a field, which didn't fit into the buffer passed to readinto
+        self._rest = None
+        self._pos = 0
+        return 0
+
+    def readinto(self, buf):
+        """Encode the next fields into buf and return the number of bytes written."""
+        mv = memoryview(buf)
+        size = len(mv)
+        table = self._table
+        num_read = 0
+
+        while num_read < size:
+            rest = self._rest
+
+            if rest is not None:
+                n = min(len(rest), size - num_read)
+                mv[num_read:num_read + n] = rest[:n]
+                num_read += n
+                self._rest = rest[n:] if n < len(rest) else None
+                continue
+
+            try:
+                k, v = next(self._iter)
+            except StopIteration:
+                break
+
+            sep = 1 if self._pos or num_read else 0
+            field_size = sep + _quoted_size(k, table) + 1 + _quoted_size(v, table)
+
+            if field_size <= size - num_read:
+                out = mv
+                pos = num_read
+            else:
+                out = bytearray(field_size)
+                pos = 0
+
+            if sep:
+                out[pos] = 38  # '&'
+                pos += 1
+
+            pos = _quote_into(k, table, out, pos)
+            out[pos] = 61  # '='
+            pos = _quote_into(v, table, out, pos + 1)
+
+            if out is mv:
+                num_read = pos
+            else:
+                self._rest = memoryview(out)
+
+        self._pos += num_read
+        return num_read
+
+
+def urlencode_bytes(query, doseq=False, safe="", encoding=None, errors=None):
+    """Like urlencode(), but return the encoded query string as a bytearray.
+
+    The data is encoded in a single pass into a bytearray allocated with the exact size.
+    """
+    encoder = FormEncoder(query, doseq, safe, encoding, errors)
+    buf = bytearray(len(encoder))
+    encoder.readinto(buf)
+    return buf
 
 
 def urlencode(query, doseq=False, safe="", encoding=None, errors=None):
@@ -151,70 +377,4 @@ def urlencode(query, doseq=False, safe="", encoding=None, errors=None):
     When a component is a string, the safe, encoding and error parameters are
     sent to the quote_plus function for encoding.
     """
-
-    if hasattr(query, "items"):
-        query = query.items()
-    else:
-        # It's a bother at times that strings and string-like objects are
-        # sequences.
-        try:
-            # non-sequence items should not work with len()
-            # non-empty strings will fail this
-            if len(query) and not isinstance(query[0], tuple):
-                raise TypeError
-            # Zero-length sequences of all types will get here and succeed,
-            # but that's a minor nit.  Since the original implementation
-            # allowed empty dicts that type of behavior probably should be
-            # preserved for consistency
-        except TypeError:
-            # ty, va, tb = sys.exc_info()
-            raise TypeError(
-                "not a valid non-string sequence " "or mapping object"
-            )  # .with_traceback(tb)
-
-    l = []
-    if not doseq:
-        for k, v in query:
-            if isinstance(k, bytes):
-                k = quote_plus(k, safe)
-            else:
-                k = quote_plus(str(k), safe, encoding, errors)
-
-            if isinstance(v, bytes):
-                v = quote_plus(v, safe)
-            else:
-                v = quote_plus(str(v), safe, encoding, errors)
-
-            l.append(k + "=" + v)
-    else:
-        for k, v in query:
-            if isinstance(k, bytes):
-                k = quote_plus(k, safe)
-            else:
-                k = quote_plus(str(k), safe, encoding, errors)
-
-            if isinstance(v, bytes):
-                v = quote_plus(v, safe)
-                l.append(k + "=" + v)
-            elif isinstance(v, str):
-                v = quote_plus(v, safe, encoding, errors)
-                l.append(k + "=" + v)
-            else:
-                try:
-                    # Is this a sufficient test for sequence-ness?
-                    _ = len(v)  # noqa
-                except TypeError:
-                    # not a sequence
-                    v = quote_plus(str(v), safe, encoding, errors)
-                    l.append(k + "=" + v)
-                else:
-                    # loop over the sequence
-                    for elt in v:
-                        if isinstance(elt, bytes):
-                            elt = quote_plus(elt, safe)
-                        else:
-                            elt = quote_plus(str(elt), safe, encoding, errors)
-
-                        l.append(k + "=" + elt)
-
-    return "&".join(l)
+    return str(urlencode_bytes(query, doseq, safe, encoding, errors), "ascii")
@@ -1,4 +1,81 @@
-from urlunquote import unquote
+try:
+    from .urlunquote import unquote_into
+except ImportError:
+    from urlunquote import unquote_into
+
+
+def _decode(qs, start, end, buf, encoding, errors):
+    mv = memoryview(buf)[:unquote_into(qs, buf, start, end, True)]
+    return bytes(mv) if encoding is None else str(mv, encoding, errors)
+
+
+def iter_qsl(
+    qs,
+    keep_blank_values=False,
+    strict_parsing=False,
+    encoding="utf-8",
+    errors="replace",
+    max_num_fields=None,
+    separator=b"&",
+    buf=None,
+):
+    """Parse a query given as a bytes or string argument and yield (name, value) tuples.
+
+    Like parse_qsl(), but the fields are decoded one at a time, as they are requested, with
+    '+' and percent-escapes decoded in a single pass into buf, a bytearray, which is re-used
+    for all fields and replaced by a larger one, if a field doesn't fit. If encoding is None,
+    names and values are returned as bytes.
+
+    """
+    if isinstance(qs, str):
+        qs = qs.encode("utf-8")
+
+    if isinstance(separator, str):
+        separator = separator.encode("utf-8")
+
+    if max_num_fields is not None and qs.count(separator) + 1 > max_num_fields:
+        raise ValueError("Max number of fields exceeded.")
+
+    if buf is None:
+        buf = bytearray(64)
+
+    size = len(qs)
+    start = 0
+
+    while start <= size:
+        end = qs.find(separator, start)
+
+        if end < 0:
+            end = size
+
+        field = start
+        start = end + len(separator)
+
+        if field == end and not strict_parsing:
+            continue
+
+        eq = qs.find(b"=", field, end)
+
+        if eq < 0:
+            if strict_parsing:
+                raise ValueError("bad query field: %r" % qs[field:end])
+            # Handle case of a field with no equal sign
+            if not keep_blank_values:
+                continue
+
+            eq = end
+            value = end
+        else:
+            value = eq + 1
+
+        if value < end or keep_blank_values:
+            if end - field > len(buf):
+                buf = bytearray(end - field)
+
+            yield (
+                _decode(qs, field, eq, buf, encoding, errors),
+                _decode(qs, value, end, buf, encoding, errors),
+            )
 
 
 def parse_qsl(
@@ -36,38 +113,11 @@ def parse_qsl(
     Returns a list of (name, value) tuples.
 
     """
-    if isinstance(qs, str):
-        qs = qs.encode("utf-8")
-
-    res = []
-
-    if max_num_fields is not None and qs.count(separator) + 1 > max_num_fields:
-        raise ValueError("'Max number of fields exceeded.")
-
-    for field in qs.split(separator):
-        if not field and not strict_parsing:
-            continue
-
-        nv = field.split(b"=", 1)
-
-        if len(nv) != 2:
-            if strict_parsing:
-                raise ValueError("bad query field: {}".format(field))
-            # Handle case of a field with no equal sign
-            if keep_blank_values:
-                nv.append(b"")
-            else:
-                continue
-
-        if nv[1] or keep_blank_values:
-            res.append(
-                (
-                    unquote(nv[0].replace(b"+", b" ")).decode(encoding, errors),
-                    unquote(nv[1].replace(b"+", b" ")).decode(encoding, errors),
-                )
-            )
-
-    return res
+    return list(
+        iter_qsl(
+            qs, keep_blank_values, strict_parsing, encoding, errors, max_num_fields, separator
+        )
+    )
 
 
 if __name__ == "__main__":
@@ -1,8 +1,86 @@
+def _hex_table():
+    # Map each byte value to the value of the hex digit it represents or 255
+    table = bytearray(b"\xff" * 256)
+
+    for i, c in enumerate(b"0123456789abcdef"):
+        table[c] = i
+
+    for i, c in enumerate(b"ABCDEF"):
+        table[c] = i + 10
+
+    return bytes(table)
+
+
+_HEXVAL = _hex_table()
+
+
+def unquote_into(string, buf, start=0, end=None, plus=False):
+    """Decode URL percent-escapes in string[start:end] into buf and return the decoded length.
+
+    string must be a bytes object, buf a bytearray (or writable memoryview), which is at least
+    end - start bytes long. Runs of bytes without escapes are copied in bulk. Malformed escapes
+    are copied unchanged. If plus is true, '+' is decoded as a space.
+
+    """
+    if end is None:
+        end = len(string)
+
+    if len(buf) < end - start:
+        raise ValueError("Buffer too small.")
+
+    mv = memoryview(string)
+    hexval = _HEXVAL
+    pos = 0
+    i = start
+    pct = string.find(b"%", i, end)
+    sp = string.find(b"+", i, end) if plus else -1
+
+    while True:
+        if pct < 0 or 0 <= sp < pct:
+            nxt = sp
+        else:
+            nxt = pct
+
+        stop = end if nxt < 0 else nxt
+
+        if stop > i:
+            buf[pos:pos + stop - i] = mv[i:stop]
+            pos += stop - i
+
+        if nxt < 0:
+            return pos
+
+        if nxt == sp:
+            buf[pos] = 32
+            i = nxt + 1
+            sp = string.find(b"+", i, end)
+        else:
+            if nxt + 2 < end:
+                hi = hexval[string[nxt + 1]]
+                lo = hexval[string[nxt + 2]]
+            else:
+                hi = lo = 255
+
+            if hi < 16 and lo < 16:
+                buf[pos] = (hi << 4) | lo
+                i = nxt + 3
+            else:
+                # malformed escape, keep '%'
+                buf[pos] = 37
+                i = nxt + 1
+
+            pct = string.find(b"%", i, end)
+
+        pos += 1
+
+
 def unquote(string):
     """Decode and replace URL percent-escapes in string.
 
         unquote('abc%20def') -> b'abc def'.
 
+    Malformed escapes are left unchanged.
+
     Note: If a string, not a bytes object, is passed, it is encoded as UTF-8.
     This is only an issue if it contains unescaped non-ASCII characters, which
     URIs should not.
@@ -13,21 +91,11 @@ def unquote(string):
 
     if isinstance(string, str):
         string = string.encode('utf-8')
+    elif not isinstance(string, bytes):
+        string = bytes(string)
 
-    bits = string.split(b'%')
-    if len(bits) == 1:
+    if b'%' not in string:
         return string
 
-    res = bytearray(bits[0])
-    append = res.append
-    extend = res.extend
-
-    for item in bits[1:]:
-        try:
-            append(int(item[:2], 16))
-            extend(item[2:])
-        except KeyError:
-            append(b'%')
-            extend(item)
-
-    return bytes(res)
+    buf = bytearray(len(string))
+    return bytes(memoryview(buf)[:unquote_into(string, buf)])
@@ -9,7 +9,6 @@ if [[ -n "$DEVICE" ]]; then
         echo "Please install 'mpremote'."
         exit 1
     fi
-    mpremote connect "$DEVICE" mip install collections-defaultdict
     ./install.py "$DEVICE" || exit 1
 fi
 
@@ -0,0 +1,50 @@
+"""Fake sockets and connections for testing requests without a network."""
+
+from io import BytesIO
+
+from mrequests.session import Session
+
+HOST = ("http", "host", 80)
+
+
+class FakeSocket:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection(BytesIO):
+    """Socket file, which returns canned response data and records what is written to it.
+
+    data is returned as is. Each of the given responses replaces the data to read, when the
+    next request head is written.
+
+    """
+
+    def __init__(self, data=b"", responses=()):
+        super().__init__(data)
+        self.responses = list(responses)
+        self.sent = b""
+
+    def write(self, data):
+        data = bytes(data)
+        self.sent += data
+
+        if self.responses and b" HTTP/1.1\r\n" in data:
+            self.seek(0)
+            self.truncate()
+            super().write(self.responses.pop(0))
+            self.seek(0)
+
+        return len(data)
+
+    def close(self):
+        pass
+
+
+def pooled_session(conn, **defaults):
+    """Return a Session with conn as an idle connection to http://host/ in its pool."""
+    s = Session(**defaults)
+    s.release(HOST, conn, conn)
+    return s
@@ -0,0 +1,158 @@
+from unittest import TestCase, main
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+from mrequests.aio import Response, _read_head
+from mrequests.mrequests import _parse_head
+
+
+CHUNKED_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Transfer-Encoding: chunked\r\n"
+    b"\r\n"
+    b"5;ext=1\r\nhello\r\n"
+    b"1\r\n \r\n"
+    b"10\r\nworld, chunked! \r\n"
+    b"0\r\n"
+    b"\r\n"
+)
+
+
+class FakeReader:
+    """Minimal async stream reader over a bytes object (without readuntil)."""
+
+    def __init__(self, data):
+        self.data = data
+
+    async def read(self, n=-1):
+        if n < 0:
+            n = len(self.data)
+
+        data = self.data[:n]
+        self.data = self.data[n:]
+        return data
+
+    async def readline(self):
+        idx = self.data.find(b"\n")
+        return await self.read(len(self.data) if idx < 0 else idx + 1)
+
+
+async def make_response(data):
+    reader = FakeReader(data)
+    resp = Response(reader, None)
+    _parse_head(resp, await _read_head(reader))
+    resp._init_body("GET")
+    return resp
+
+
+class TestAioResponse(TestCase):
+
+    def test_read_chunked(self):
+        async def run():
+            resp = await make_response(CHUNKED_RESPONSE)
+            return resp.status_code, await resp.content
+
+        self.assertEqual(asyncio.run(run()), (200, b"hello world, chunked! "))
+
+    def test_readinto(self):
+        async def run():
+            resp = await make_response(
+                b"HTTP/1.1 200 OK\r\nContent-Length: 11\r\n\r\nhello worldEXTRA")
+            buf = bytearray(4)
+            data = b""
+
+            while True:
+                n = await resp.readinto(buf)
+
+                if not n:
+                    return data
+
+                data += buf[:n]
+
+        self.assertEqual(asyncio.run(run()), b"hello world")
+
+    def test_read_until_eof(self):
+        # body without Content-Length or chunked encoding ends when the server closes
+        class Hooks:
+            completed = 0
+
+            def body_complete(self, ctx, ts):
+                self.completed += 1
+
+        async def run(readinto):
+            resp = await make_response(b"HTTP/1.1 200 OK\r\n\r\nhello world")
+            resp._trace = hooks = (Hooks(), None)
+            data = b""
+
+            while True:
+                if readinto:
+                    buf = bytearray(4)
+                    n = await resp.readinto(buf)
+                    chunk = bytes(buf[:n])
+                else:
+                    chunk = await resp.read(4)
+
+                if not chunk:
+                    return data, resp._remain, hooks[0].completed
+
+                data += chunk
+
+        self.assertEqual(asyncio.run(run(False)), (b"hello world", 0, 1))
+        self.assertEqual(asyncio.run(run(True)), (b"hello world", 0, 1))
+
+    def test_iter_content(self):
+        async def run(chunk_size, buf=None):
+            resp = await make_response(CHUNKED_RESPONSE)
+            chunks = []
+
+            async for chunk in resp.iter_content(chunk_size, buf):
+                chunks.append(bytes(chunk))
+
+            return chunks
+
+        chunks = asyncio.run(run(4))
+        self.assertTrue(all(len(c) <= 4 for c in chunks))
+        self.assertEqual(b"".join(chunks), b"hello world, chunked! ")
+        chunks = asyncio.run(run(0, bytearray(3)))
+        self.assertTrue(all(len(c) <= 3 for c in chunks))
+        self.assertEqual(b"".join(chunks), b"hello world, chunked! ")
+
+    def test_iter_lines(self):
+        body = b"first\r\nsecond\n\n" + b"x" * 50 + b"\nlast"
+        data = b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+
+        async def run(buf=None):
+            resp = await make_response(data)
+            lines = []
+
+            async for line in resp.iter_lines(buf):
+                lines.append(bytes(line))
+
+            return lines
+
+        expected = [b"first", b"second", b"", b"x" * 50, b"last"]
+        self.assertEqual(asyncio.run(run()), expected)
+        self.assertEqual(asyncio.run(run(bytearray(4))), expected)
+
+    def test_iter_json(self):
+        body = b'{"results": [{"id": 1}, {"id": 2}, {"id": 3}]}'
+        data = b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+
+        async def run(path, buf):
+            resp = await make_response(data)
+            values = []
+
+            async for value in resp.iter_json(path, buf):
+                values.append(value)
+
+            return values
+
+        self.assertEqual(asyncio.run(run("results.item.id", bytearray(5))), [1, 2, 3])
+        self.assertEqual(asyncio.run(run("results.item", None))[1], {"id": 2})
+
+
+if __name__ == '__main__':
+    main()
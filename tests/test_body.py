@@ -0,0 +1,74 @@
+from io import BytesIO
+from unittest import TestCase, main
+
+from mrequests.mrequests import _add_params, _body_size, _prepare_data, _rewind, _tell, _write_body
+
+
+class ReadOnly:
+
+    def __init__(self, data):
+        self._fobj = BytesIO(data)
+
+    def read(self, size):
+        return self._fobj.read(size)
+
+
+class TestRequestBody(TestCase):
+
+    def test_body_size(self):
+        self.assertEqual(_body_size(b"abc"), 3)
+        self.assertEqual(_body_size(bytearray(5)), 5)
+        fobj = BytesIO(b"hello world")
+        fobj.read(6)
+        self.assertEqual(_body_size(fobj), 5)
+        self.assertEqual(fobj.tell(), 6)
+        self.assertIsNone(_body_size(ReadOnly(b"abc")))
+        self.assertIsNone(_body_size(iter([b"abc"])))
+
+    def test_write_sized(self):
+        out = BytesIO()
+        _write_body(out, BytesIO(b"x" * 100), 100, bytearray(16))
+        self.assertEqual(out.getvalue(), b"x" * 100)
+
+    def test_write_sized_short(self):
+        with self.assertRaises(ValueError):
+            _write_body(BytesIO(), BytesIO(b"x" * 10), 100, bytearray(16))
+
+    def test_write_chunked_file(self):
+        out = BytesIO()
+        _write_body(out, ReadOnly(b"x" * 10), None, bytearray(16))
+        self.assertEqual(out.getvalue(), b"6\r\nxxxxxx\r\n4\r\nxxxx\r\n0\r\n\r\n")
+
+    def test_write_chunked_iterable(self):
+        out = BytesIO()
+        _write_body(out, iter([b"hello", "", " world"]), None, bytearray(16))
+        self.assertEqual(out.getvalue(), b"5\r\nhello\r\n6\r\n world\r\n0\r\n\r\n")
+
+    def test_rewind(self):
+        fobj = BytesIO(b"hello")
+        fobj.read(2)
+        pos = _tell(fobj)
+        fobj.read()
+        self.assertTrue(_rewind(fobj, pos))
+        self.assertEqual(fobj.read(), b"llo")
+        self.assertTrue(_rewind(b"hello", None))
+        self.assertFalse(_rewind(ReadOnly(b"hello"), _tell(ReadOnly(b"hello"))))
+
+    def test_form_data(self):
+        data, content_type = _prepare_data({"a b": "c&d", "n": 1})
+        self.assertEqual(bytes(data), b"a+b=c%26d&n=1")
+        self.assertEqual(content_type, b"application/x-www-form-urlencoded")
+        data, _ = _prepare_data({"x": ["1", "2"], "y": ("a", 3)})
+        self.assertEqual(sorted(bytes(data).split(b"&")), [b"x=1", b"x=2", b"y=3", b"y=a"])
+
+    def test_params(self):
+        self.assertEqual(_add_params("http://host/", None), "http://host/")
+        self.assertEqual(_add_params("http://host/", {"q": "a b"}), "http://host/?q=a+b")
+        self.assertEqual(
+            _add_params("http://host/?x=1", [("q", "ä")]), "http://host/?x=1&q=%C3%A4"
+        )
+        self.assertEqual(_add_params("http://host/", [("x", ["1", "2"])]), "http://host/?x=1&x=2")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+from io import BytesIO
+from unittest import TestCase, main
+
+from fakes import FakeConnection, pooled_session
+from mrequests.cache import CacheResponse, MemoryCache
+from mrequests.mrequests import _parse_head, _read_head
+
+
+def make_response(body, extra=b""):
+    data = b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n%s\r\n%s" % (len(body), extra, body)
+    sf = BytesIO(data)
+    resp = CacheResponse(None, sf)
+    head, resp._pending = _read_head(sf, bytearray(1024))
+    _parse_head(resp, head)
+    resp._init_body("GET")
+    return resp
+
+
+def make_meta(size=None):
+    return {
+        "etag": '"x"',
+        "last_modified": None,
+        "expires": None,
+        "encoding": "utf-8",
+        "content_encoding": None,
+        "size": size,
+    }
+
+
+class TestCacheResponse(TestCase):
+
+    def test_headers(self):
+        resp = make_response(
+            b"",
+            b'ETag: W/"abc"\r\n'
+            b"Last-Modified: Sat, 01 Jan 2022 00:00:00 GMT\r\n"
+            b"Cache-Control: public, max-age=60\r\n",
+        )
+        self.assertEqual(resp.etag, 'W/"abc"')
+        self.assertEqual(resp.last_modified, "Sat, 01 Jan 2022 00:00:00 GMT")
+        self.assertEqual(resp.max_age, 60)
+        self.assertFalse(resp.no_store)
+        self.assertFalse(resp.from_cache)
+
+    def test_no_store(self):
+        resp = make_response(b"", b"Cache-Control: no-store\r\n")
+        self.assertTrue(resp.no_store)
+        resp = make_response(b"", b"Cache-Control: no-cache\r\n")
+        self.assertEqual(resp.max_age, 0)
+
+
+class TestMemoryCache(TestCase):
+
+    def test_store_open(self):
+        cache = MemoryCache()
+        resp = cache.store("http://a/", make_meta(), make_response(b"hello"))
+        self.assertEqual(resp.content, b"hello")
+        meta = cache.lookup("http://a/")
+        self.assertEqual(meta["size"], 5)
+        cached = cache.open("http://a/", meta)
+        self.assertTrue(cached.from_cache)
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(cached.read(2), b"he")
+        self.assertEqual(cached.content, b"llo")
+
+    def test_evict_lru(self):
+        cache = MemoryCache(max_size=10)
+        cache.store("http://a/", make_meta(), make_response(b"aaaa"))
+        cache.store("http://b/", make_meta(), make_response(b"bbbb"))
+        cache.lookup("http://a/")
+        cache.store("http://c/", make_meta(), make_response(b"cccc"))
+        self.assertIsNotNone(cache.lookup("http://a/"))
+        self.assertIsNone(cache.lookup("http://b/"))
+        self.assertIsNotNone(cache.lookup("http://c/"))
+        self.assertEqual(cache.size, 8)
+
+    def test_max_item_size(self):
+        cache = MemoryCache(max_size=10)
+        resp = cache.store("http://a/", make_meta(), make_response(b"x" * 11))
+        self.assertEqual(resp.content, b"x" * 11)
+        self.assertIsNone(cache.lookup("http://a/"))
+        self.assertEqual(cache.size, 0)
+
+    def test_params(self):
+        # responses for the same URL with different query parameters are cached separately
+        head = b"HTTP/1.1 200 OK\r\nCache-Control: max-age=60\r\nContent-Length: 1\r\n\r\n"
+        conn = FakeConnection(responses=(head + b"1", head + b"2"))
+        s = pooled_session(conn)
+        cache = MemoryCache()
+        self.assertEqual(cache.get("http://host/", params={"id": 1}, session=s).content, b"1")
+        self.assertEqual(cache.get("http://host/", params={"id": 2}, session=s).content, b"2")
+        resp = cache.get("http://host/", params={"id": 1}, session=s)
+        self.assertTrue(resp.from_cache)
+        self.assertEqual(resp.content, b"1")
+        self.assertIsNotNone(cache.lookup("http://host/?id=2"))
+        self.assertEqual(conn.sent.count(b"GET /?id="), 2)
+
+
+if __name__ == '__main__':
+    main()
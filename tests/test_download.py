@@ -0,0 +1,281 @@
+import json
+import os
+from io import BytesIO
+from unittest import TestCase, main, skipIf
+
+try:
+    from tempfile import mkdtemp
+except ImportError:
+    def mkdtemp():
+        os.mkdir("download-test")
+        return "download-test"
+
+from fakes import FakeConnection, pooled_session
+from mrequests import download as dl
+from mrequests import mrequests
+from mrequests.download import DownloadResponse, _parse_content_range, download
+from mrequests.mrequests import _parse_head, _read_head
+
+
+RESPONSE = (
+    b"HTTP/1.1 206 Partial Content\r\n"
+    b"Content-Range: bytes 100-199/1000\r\n"
+    b"Content-Length: 100\r\n"
+    b'ETag: "abc"\r\n'
+    b"Last-Modified: Sat, 01 Jan 2022 00:00:00 GMT\r\n"
+    b"Accept-Ranges: bytes\r\n"
+    b"\r\n"
+)
+DATA = b"0123456789"
+URL = "http://host/file"
+
+
+def response(status, body, headers=b""):
+    return b"HTTP/1.1 %s\r\n%sContent-Length: %i\r\n\r\n%s" % (status, headers, len(body), body)
+
+
+class RangeConnection(FakeConnection):
+    # Socket and socket file in one, which serves data or the byte range given by a Range header
+
+    def __init__(self, data, etag):
+        super().__init__()
+        self.data = data
+        self.etag = etag
+
+    def makefile(self, mode):
+        return self
+
+    def settimeout(self, timeout):
+        pass
+
+    def write(self, data):
+        head = bytes(data)
+
+        if b" HTTP/1.1\r\n" in head:
+            self.responses.append(self.respond(head))
+
+        return super().write(data)
+
+    def respond(self, head):
+        headers = b'Accept-Ranges: bytes\r\nETag: %s\r\n' % self.etag
+        first, last = 0, len(self.data) - 1
+        status = b"200 OK"
+
+        for line in head.split(b"\r\n"):
+            if line.startswith(b"Range: bytes="):
+                first, last = [int(x) for x in line[13:].split(b"-")]
+                status = b"206 Partial Content"
+                headers += b"Content-Range: bytes %i-%i/%i\r\n" % (first, last, len(self.data))
+
+        body = self.data[first:last + 1]
+
+        if head.startswith(b"HEAD "):
+            return b"HTTP/1.1 %s\r\n%sContent-Length: %i\r\n\r\n" % (status, headers, len(body))
+
+        return response(status, body, headers)
+
+
+class TestDownloadResponse(TestCase):
+
+    def test_parse_content_range(self):
+        self.assertEqual(_parse_content_range(b" bytes 0-99/1000"), (0, 99, 1000))
+        self.assertEqual(_parse_content_range(b"bytes 0-99/*"), (0, 99, None))
+        self.assertEqual(_parse_content_range(b"bytes */1000"), (None, None, 1000))
+        self.assertIsNone(_parse_content_range(b"bytes"))
+
+    def test_response_headers(self):
+        sf = BytesIO(RESPONSE)
+        resp = DownloadResponse(None, sf)
+        head, resp._pending = _read_head(sf, bytearray(1024))
+        _parse_head(resp, head)
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.content_range, (100, 199, 1000))
+        self.assertEqual(resp.etag, '"abc"')
+        self.assertEqual(resp.validator, '"abc"')
+        self.assertTrue(resp.accept_ranges)
+        self.assertEqual(resp._content_size, 100)
+
+    def test_weak_etag(self):
+        sf = BytesIO(RESPONSE.replace(b'"abc"', b'W/"abc"'))
+        resp = DownloadResponse(None, sf)
+        head, resp._pending = _read_head(sf, bytearray(1024))
+        _parse_head(resp, head)
+        self.assertIsNone(resp.etag)
+        self.assertEqual(resp.validator, "Sat, 01 Jan 2022 00:00:00 GMT")
+
+
+class DownloadTestCase(TestCase):
+
+    def setUp(self):
+        self.dir = mkdtemp()
+        self.fn = self.dir + "/file"
+
+    def tearDown(self):
+        for fn in os.listdir(self.dir):
+            os.remove(self.dir + "/" + fn)
+
+        os.rmdir(self.dir)
+
+    def read(self, suffix=""):
+        with open(self.fn + suffix, "rb") as fobj:
+            return fobj.read()
+
+    def exists(self, suffix=""):
+        return ("file" + suffix) in os.listdir(self.dir)
+
+    def partial(self, data, length=len(DATA), url=URL, validator='"v1"'):
+        # Create the files left behind by an interrupted download
+        with open(self.fn + ".part", "wb") as fobj:
+            fobj.write(data)
+
+        with open(self.fn + ".meta", "w") as fobj:
+            fobj.write(json.dumps({"url": url, "length": length, "validator": validator}))
+
+
+class TestDownload(DownloadTestCase):
+
+    def test_download(self):
+        conn = FakeConnection(responses=(response(b"200 OK", DATA, b'ETag: "v1"\r\n'),))
+        self.assertEqual(download(URL, self.fn, session=pooled_session(conn)), len(DATA))
+        self.assertEqual(self.read(), DATA)
+        self.assertFalse(self.exists(".part"))
+        self.assertFalse(self.exists(".meta"))
+        self.assertFalse(b"Range:" in conn.sent)
+
+    def test_resume(self):
+        self.partial(DATA[:4])
+        conn = FakeConnection(responses=(
+            response(b"206 Partial Content", DATA[4:], b"Content-Range: bytes 4-9/10\r\n"),
+        ))
+        self.assertEqual(download(URL, self.fn, session=pooled_session(conn)), len(DATA))
+        self.assertEqual(self.read(), DATA)
+        self.assertTrue(b"\r\nRange: bytes=4-\r\n" in conn.sent)
+        self.assertTrue(b'\r\nIf-Range: "v1"\r\n' in conn.sent)
+        self.assertFalse(self.exists(".part"))
+        self.assertFalse(self.exists(".meta"))
+
+    def test_resume_params(self):
+        # the URL in the meta data includes the query parameters
+        self.partial(DATA[:4], url=URL + "?id=1")
+        conn = FakeConnection(responses=(
+            response(b"206 Partial Content", DATA[4:], b"Content-Range: bytes 4-9/10\r\n"),
+        ))
+        download(URL, self.fn, session=pooled_session(conn), params={"id": 1})
+        self.assertEqual(self.read(), DATA)
+        self.assertTrue(conn.sent.startswith(b"GET /file?id=1 HTTP/1.1\r\n"))
+        self.assertTrue(b"\r\nRange: bytes=4-\r\n" in conn.sent)
+
+    def test_no_resume(self):
+        self.partial(DATA[:4], url=URL + "?id=1")
+        conn = FakeConnection(responses=(response(b"200 OK", DATA),))
+        download(URL, self.fn, session=pooled_session(conn))
+        self.assertEqual(self.read(), DATA)
+        self.assertFalse(b"Range:" in conn.sent)
+
+    def test_range_mismatch(self):
+        self.partial(DATA[:4])
+        conn = FakeConnection(responses=(
+            response(b"206 Partial Content", DATA[2:], b"Content-Range: bytes 2-9/10\r\n"),
+        ))
+
+        with self.assertRaises(OSError):
+            download(URL, self.fn, session=pooled_session(conn))
+
+        # partial data is kept, but not resumed again
+        self.assertEqual(self.read(".part"), DATA[:4])
+        self.assertFalse(self.exists(".meta"))
+        self.assertFalse(self.exists())
+
+    def test_complete(self):
+        # server rejects the range, since the partial file is already complete
+        self.partial(DATA)
+        conn = FakeConnection(responses=(
+            response(b"416 Range Not Satisfiable", b"", b"Content-Range: bytes */10\r\n"),
+        ))
+        self.assertEqual(download(URL, self.fn, session=pooled_session(conn)), len(DATA))
+        self.assertTrue(b"\r\nRange: bytes=10-\r\n" in conn.sent)
+        self.assertEqual(self.read(), DATA)
+        self.assertFalse(self.exists(".part"))
+        self.assertFalse(self.exists(".meta"))
+
+    def test_range_not_satisfiable(self):
+        self.partial(DATA)
+        conn = FakeConnection(responses=(
+            response(b"416 Range Not Satisfiable", b"", b"Content-Range: bytes */8\r\n"),
+        ))
+
+        with self.assertRaises(OSError):
+            download(URL, self.fn, session=pooled_session(conn))
+
+        self.assertFalse(self.exists(".meta"))
+        self.assertFalse(self.exists())
+
+    def test_changed(self):
+        # file changed on the server, so it sends the whole file, which replaces the partial one
+        self.partial(b"abcd")
+        conn = FakeConnection(responses=(response(b"200 OK", DATA, b'ETag: "v2"\r\n'),))
+        self.assertEqual(download(URL, self.fn, session=pooled_session(conn)), len(DATA))
+        self.assertTrue(b'\r\nIf-Range: "v1"\r\n' in conn.sent)
+        self.assertEqual(self.read(), DATA)
+
+    def test_incomplete(self):
+        conn = FakeConnection(
+            b"HTTP/1.1 200 OK\r\nETag: \"v1\"\r\nContent-Length: 10\r\n\r\n01234"
+        )
+
+        with self.assertRaises(OSError):
+            download(URL, self.fn, session=pooled_session(conn))
+
+        self.assertEqual(self.read(".part"), DATA[:5])
+        self.assertEqual(json.loads(self.read(".meta"))["validator"], '"v1"')
+
+
+@skipIf(dl.ThreadPoolExecutor is None, "no concurrent.futures")
+class TestDownloadParallel(DownloadTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.connect = mrequests._connect
+        self.min_range_size = dl.MIN_RANGE_SIZE
+        self.conns = []
+        dl.MIN_RANGE_SIZE = 10
+
+        def connect(ctx, timeout=None, ssl_context=None, resolver=None, hooks=None):
+            conn = RangeConnection(self.data, b'"v1"')
+            self.conns.append(conn)
+            return conn
+
+        mrequests._connect = connect
+
+    def tearDown(self):
+        mrequests._connect = self.connect
+        dl.MIN_RANGE_SIZE = self.min_range_size
+        super().tearDown()
+
+    def test_parallel(self):
+        self.data = bytes(range(256)) * 4
+        self.assertEqual(download(URL, self.fn, parts=3), len(self.data))
+        self.assertEqual(self.read(), self.data)
+        self.assertFalse(self.exists(".part"))
+        sent = sorted(conn.sent.split(b"\r\n")[0] for conn in self.conns)
+        self.assertEqual(sent, [b"GET /file HTTP/1.1"] * 3 + [b"HEAD /file HTTP/1.1"])
+        ranges = sorted(
+            line for conn in self.conns for line in conn.sent.split(b"\r\n")
+            if line.startswith(b"Range:")
+        )
+        self.assertEqual(
+            ranges, [b"Range: bytes=0-341", b"Range: bytes=342-683", b"Range: bytes=684-1023"]
+        )
+        self.assertTrue(all(b'If-Range: "v1"' in conn.sent for conn in self.conns[1:]))
+
+    def test_small_file(self):
+        # files smaller than two ranges are downloaded with a single request
+        self.data = DATA
+        self.assertEqual(download(URL, self.fn, parts=3), len(DATA))
+        self.assertEqual(self.read(), DATA)
+        self.assertEqual(len(self.conns), 2)
+        self.assertFalse(b"Range:" in self.conns[1].sent)
+
+
+if __name__ == '__main__':
+    main()
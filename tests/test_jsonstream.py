@@ -0,0 +1,61 @@
+import json
+from io import BytesIO
+from unittest import TestCase, main
+
+from mrequests.jsonstream import JSONStreamParser, iter_json
+
+
+DOC = {
+    "meta": {"tags": [1, 2], 'k"ey': "v"},
+    "items": [
+        {"i": i, "s": 'a"b]}{\\', "n": None, "f": [1.5, True, {"z": []}]} for i in range(20)
+    ] + [1, "x", -2e5, False, None, []],
+    "z": None,
+    "ü": 3,
+}
+
+
+class TestJSONStream(TestCase):
+
+    def check(self, path, expected):
+        for indent in (None, 2):
+            data = json.dumps(DOC, indent=indent).encode()
+
+            for bufsize in (1, 7, 4096):
+                self.assertEqual(list(iter_json(BytesIO(data), path, bytearray(bufsize))), expected)
+
+    def test_array_items(self):
+        self.check("items.item", DOC["items"])
+
+    def test_nested(self):
+        self.check("items.item.i", list(range(20)))
+        self.check("items.item.f.item", [v for item in DOC["items"][:20] for v in item["f"]])
+
+    def test_object_members(self):
+        self.check("meta", [DOC["meta"]])
+        self.check('meta.k"ey', ["v"])
+        self.check("ü", [3])
+        self.check("z", [None])
+
+    def test_whole_document(self):
+        self.check("", [DOC])
+
+    def test_no_match(self):
+        self.check("missing", [])
+
+    def test_top_level_scalar(self):
+        self.assertEqual(list(iter_json(BytesIO(b" 42"), "", bytearray(2))), [42])
+        self.assertEqual(list(iter_json(BytesIO(b"[1, -2.5e3]"), "item", bytearray(2))), [1, -2500])
+
+    def test_feed(self):
+        parser = JSONStreamParser("item.id")
+        values = []
+
+        for chunk in (b'[{"id": 1}, {"i', b'd": 2}', b"]"):
+            values.extend(parser.feed(chunk))
+
+        self.assertEqual(values, [1, 2])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+from unittest import TestCase, main
+
+from fakes import FakeConnection, pooled_session
+from mrequests.memprof import MemoryProfiler
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\n0123456789"
+
+
+class TestMemoryProfiler(TestCase):
+
+    def get(self, prof):
+        s = pooled_session(FakeConnection(RESPONSE))
+        return prof.track(s.get("http://host/", hooks=prof))
+
+    def test_phases(self):
+        with MemoryProfiler() as prof:
+            resp = self.get(prof)
+            self.assertEqual(resp.read(4), b"0123")
+            self.assertEqual(resp.content, b"456789")
+
+        self.assertEqual(
+            [record[0] for record in prof.records],
+            ["prepare", "serialize", "send", "read head", "parse head", "read", "read"]
+        )
+
+        for name, allocated, high in prof.records:
+            self.assertTrue(allocated >= 0)
+            self.assertTrue(high >= allocated)
+
+    def test_not_started(self):
+        prof = MemoryProfiler()
+        resp = self.get(prof)
+        self.assertEqual(resp.content, b"0123456789")
+        self.assertEqual(prof.records, [])
+
+    def test_summary(self):
+        prof = MemoryProfiler()
+        prof.records = [("read", 10, 100), ("send", 5, 50), ("read", 30, 80)]
+        self.assertEqual(prof.summary(), [("read", 2, 40, 30, 100), ("send", 1, 5, 5, 50)])
+        prof.clear()
+        self.assertEqual(prof.summary(), [])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+from unittest import TestCase, main, skipIf
+
+from mrequests import multi
+
+
+class Items:
+    # Iterable over request items, which records how many were taken
+
+    def __init__(self, items, results):
+        self.items = items
+        self.results = results
+        self.taken = 0
+        # maximum number of items taken, but not returned as a result yet
+        self.max_open = 0
+
+    def __iter__(self):
+        for item in self.items:
+            self.taken += 1
+            self.max_open = max(self.max_open, self.taken - len(self.results))
+            yield item
+
+
+class FakeResponse:
+    def __init__(self, url):
+        self.url = url
+
+    @property
+    def content(self):
+        return self.url.encode()
+
+
+class FakePollRequest:
+    def __init__(self, url):
+        self.url = url
+        self.response = None
+        self.error = None
+
+
+class FakePollClient:
+    # Stand-in for PollClient, which completes the oldest active request with each poll
+
+    def __init__(self):
+        self.active = []
+        self.max_active = 0
+        FakePollClient.last = self
+
+    def __len__(self):
+        return len(self.active)
+
+    def add(self, method, url, **kw):
+        if url.startswith("ftp:"):
+            raise ValueError("Protocol scheme ftp not supported.")
+
+        req = FakePollRequest(url)
+        self.active.append(req)
+        self.max_active = max(self.max_active, len(self.active))
+        return req
+
+    def poll(self, timeout=0):
+        req = self.active.pop(0)
+
+        if "fail" in req.url:
+            req.error = OSError("failed")
+        else:
+            req.response = FakeResponse(req.url)
+
+        return [req]
+
+
+def check_results(test, results, urls):
+    test.assertEqual(sorted(item for item, _ in results), sorted(urls))
+
+    for item, result in results:
+        if "fail" in item:
+            test.assertIsInstance(result, OSError)
+        elif item.startswith("ftp:"):
+            test.assertIsInstance(result, ValueError)
+        else:
+            test.assertEqual(result.content, item.encode())
+
+
+URLS = ["http://host/%i" % i for i in range(10)] + ["http://host/fail", "ftp://host/"]
+
+
+class TestFetchPoll(TestCase):
+
+    def setUp(self):
+        self.client_class = multi.PollClient
+        multi.PollClient = FakePollClient
+
+    def tearDown(self):
+        multi.PollClient = self.client_class
+
+    def test_results(self):
+        results = []
+        items = Items(URLS, results)
+
+        for result in multi._fetch_poll(items, 3, {}):
+            results.append(result)
+
+        check_results(self, results, URLS)
+        self.assertEqual(FakePollClient.last.max_active, 3)
+        self.assertTrue(items.max_open <= 4)
+
+    def test_add_raises(self):
+        # requests, which fail when they are added, are yielded right away
+        gen = multi._fetch_poll(["ftp://host/", "http://host/1"], 2, {})
+        item, result = next(gen)
+        self.assertEqual(item, "ftp://host/")
+        self.assertIsInstance(result, ValueError)
+        self.assertEqual(next(gen)[0], "http://host/1")
+
+    def test_add_raises_poll_client(self):
+        multi.PollClient = self.client_class
+        results = list(multi._fetch_poll(["ftp://host/1", ("GET", "ftp://host/2")], 2, {}))
+        self.assertEqual([item for item, _ in results], ["ftp://host/1", ("GET", "ftp://host/2")])
+        self.assertTrue(all(isinstance(result, ValueError) for _, result in results))
+
+
+@skipIf(multi.ThreadPoolExecutor is None, "no concurrent.futures")
+class TestFetchThreaded(TestCase):
+
+    def setUp(self):
+        import threading
+        import time
+
+        self.request = multi.request
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+        def request(method, url, **kw):
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+
+            time.sleep(0.01)
+
+            with self.lock:
+                self.active -= 1
+
+            if "fail" in url:
+                raise OSError("failed")
+
+            if url.startswith("ftp:"):
+                raise ValueError("Protocol scheme ftp not supported.")
+
+            return FakeResponse(url)
+
+        multi.request = request
+
+    def tearDown(self):
+        multi.request = self.request
+
+    def test_results(self):
+        results = []
+        items = Items(URLS, results)
+
+        for result in multi._fetch_threaded(items, 3, {}):
+            results.append(result)
+
+        check_results(self, results, URLS)
+        self.assertTrue(self.max_active <= 3)
+        # items are only taken from the iterable, when a worker is free for them
+        self.assertTrue(items.max_open <= 3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+from io import BytesIO
+from unittest import TestCase, main
+
+from mrequests.multipart import MultipartEncoder
+
+
+EXPECTED = (
+    b"--xyz\r\n"
+    b'Content-Disposition: form-data; name="foo"\r\n'
+    b"\r\n"
+    b"bar\r\n"
+    b"--xyz\r\n"
+    b'Content-Disposition: form-data; name="file"; filename="a%22b.txt"\r\n'
+    b"Content-Type: text/plain\r\n"
+    b"\r\n"
+    b"hello world\r\n"
+    b"--xyz--\r\n"
+)
+
+
+def read_all(encoder, bufsize):
+    buf = bytearray(bufsize)
+    data = b""
+
+    while True:
+        n = encoder.readinto(buf)
+
+        if not n:
+            return data
+
+        data += buf[:n]
+
+
+class TestMultipartEncoder(TestCase):
+
+    def make_encoder(self):
+        encoder = MultipartEncoder(boundary="xyz")
+        encoder.add_field("foo", "bar")
+        fobj = BytesIO(b"...hello world")
+        fobj.seek(3)
+        encoder.add_file("file", fobj, filename='a"b.txt', content_type="text/plain")
+        return encoder
+
+    def test_encode(self):
+        for bufsize in (1, 7, 64, 1024):
+            encoder = self.make_encoder()
+            self.assertEqual(len(encoder), len(EXPECTED))
+            self.assertEqual(read_all(encoder, bufsize), EXPECTED)
+
+    def test_rewind(self):
+        encoder = self.make_encoder()
+        read_all(encoder, 16)
+        self.assertEqual(encoder.tell(), len(EXPECTED))
+        encoder.seek(0)
+        self.assertEqual(read_all(encoder, 16), EXPECTED)
+
+    def test_content_type(self):
+        self.assertEqual(self.make_encoder().content_type, b"multipart/form-data; boundary=xyz")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+import errno
+from unittest import TestCase, main, skipIf
+
+from mrequests.mrequests import socket, ticks_diff, ticks_ms
+from mrequests.pollclient import PollClient, PollRequest
+
+
+def receive(req, data, size=7):
+    # Feed data to the request in pieces as received from the socket. Returns True, when the
+    # response body is complete.
+    for i in range(0, len(data), size):
+        piece = data[i:i + size]
+
+        if req.resp is None:
+            req.receive_head(piece)
+        else:
+            req.body += piece
+
+        if req.resp is not None and req.body_complete():
+            return True
+
+    return False
+
+
+class TestPollRequest(TestCase):
+
+    def request(self, method="GET", **kw):
+        req = PollRequest(method, "http://example.com/", kw)
+        req.head = b""
+        req.resp = None
+        return req
+
+    def test_content_length(self):
+        req = self.request()
+        data = b"HTTP/1.1 200 OK\r\nContent-Length: 11\r\n\r\nhello world"
+        self.assertFalse(receive(req, data[:-1]))
+        self.assertTrue(receive(req, data[-1:]))
+        self.assertTrue(req.finish())
+        self.assertEqual(req.response.status_code, 200)
+        self.assertEqual(req.response.content, b"hello world")
+        self.assertTrue(req.done)
+
+    def test_chunked(self):
+        req = self.request()
+        data = (
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"5;ext=1\r\nhello\r\n1\r\n \r\n10\r\nworld, chunked! \r\n0\r\n\r\n"
+        )
+
+        for size in (1, 3, len(data)):
+            req = self.request()
+            self.assertFalse(receive(req, data[:-1], size))
+            self.assertTrue(receive(req, data[-1:]))
+
+        req.finish()
+        self.assertEqual(req.response.content, b"hello world, chunked! ")
+
+    def test_chunked_trailer(self):
+        req = self.request()
+        data = (
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"3\r\none\r\n0\r\nX-Checksum: 42\r\n\r\n"
+        )
+        self.assertFalse(receive(req, data[:-2]))
+        self.assertTrue(receive(req, data[-2:]))
+        req.finish()
+        self.assertEqual(req.response.content, b"one")
+
+    def test_until_close(self):
+        req = self.request()
+        self.assertFalse(receive(req, b"HTTP/1.0 200 OK\r\n\r\nsome data"))
+        req.finish()
+        self.assertEqual(req.response.content, b"some data")
+
+    def test_head(self):
+        req = self.request("HEAD")
+        self.assertTrue(receive(req, b"HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\n"))
+
+    def test_no_content(self):
+        req = self.request()
+        self.assertTrue(receive(req, b"HTTP/1.1 204 No Content\r\n\r\n"))
+
+    def test_unsupported_scheme(self):
+        client = PollClient()
+
+        with self.assertRaises(ValueError):
+            client.add("GET", "ftp://example.com/")
+
+        self.assertEqual(len(client), 0)
+        self.assertEqual(client.poll(), [])
+
+
+class LoopbackServer:
+    """Non-blocking HTTP server on 127.0.0.1, which is advanced by calling step().
+
+    routes maps request paths to the response data or to None, for requests which are never
+    answered. Responses are sent a few bytes per step and the connection is closed afterwards.
+    Request data is read in blocks of at most 64 KB per step, so large request bodies can not
+    be sent at once.
+
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(8)
+        self.sock.setblocking(False)
+        self.port = self.sock.getsockname()[1]
+        # [socket, data received, response data to send or None]
+        self.conns = []
+
+    def close(self):
+        for conn in self.conns:
+            conn[0].close()
+
+        self.sock.close()
+
+    def step(self):
+        try:
+            sock, _ = self.sock.accept()
+        except OSError:
+            pass
+        else:
+            sock.setblocking(False)
+            self.conns.append([sock, b"", None])
+
+        for conn in self.conns[:]:
+            sock, received, out = conn
+
+            if out is None:
+                try:
+                    data = sock.recv(65536)
+                except OSError:
+                    continue
+
+                received += data
+                conn[1] = received
+                end = received.find(b"\r\n\r\n")
+
+                if end < 0:
+                    continue
+
+                size = 0
+
+                for line in received[:end].split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        size = int(line[15:])
+
+                if len(received) < end + 4 + size:
+                    continue
+
+                self.requests.append(received)
+                conn[2] = self.routes[received.split(b" ", 2)[1]]
+            elif out:
+                try:
+                    conn[2] = out[sock.send(out[:5]):]
+                except OSError:
+                    pass
+            else:
+                sock.close()
+                self.conns.remove(conn)
+
+
+def response(body, headers=b""):
+    return b"HTTP/1.1 200 OK\r\n%sContent-Length: %i\r\n\r\n%s" % (headers, len(body), body)
+
+
+@skipIf(not hasattr(socket.socket, "getsockname"), "no socket.getsockname")
+class TestPollClient(TestCase):
+
+    def setUp(self):
+        self.server = LoopbackServer({
+            b"/one": response(b"one"),
+            b"/chunked": (
+                b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+                b"3\r\ntwo\r\n0\r\n\r\n"
+            ),
+            b"/old": b"HTTP/1.1 302 Found\r\nLocation: /one\r\nContent-Length: 0\r\n\r\n",
+            b"/upload": response(b"ok"),
+            b"/slow": None,
+        })
+        self.url = "http://127.0.0.1:%i" % self.server.port
+
+    def tearDown(self):
+        self.server.close()
+
+    def run_client(self, client):
+        # Drive client and server until all requests are done and return them in order done
+        done = []
+        start = ticks_ms()
+
+        while len(client):
+            if ticks_diff(ticks_ms(), start) > 10000:
+                client.close()
+                self.fail("Requests did not complete.")
+
+            self.server.step()
+            done.extend(client.poll(0.005))
+
+        return done
+
+    def test_requests(self):
+        client = PollClient(timeout=5)
+        body = b"x" * (4 * 1024 * 1024)
+        one = client.add("GET", self.url + "/one")
+        chunked = client.add("GET", self.url + "/chunked")
+        redirect = client.add("GET", self.url + "/old")
+        upload = client.add("PUT", self.url + "/upload", data=body)
+        done = self.run_client(client)
+        self.assertEqual(len(done), 4)
+        self.assertTrue(all(req.error is None for req in done))
+        self.assertEqual(one.response.content, b"one")
+        self.assertEqual(chunked.response.content, b"two")
+        self.assertEqual(redirect.response.status_code, 200)
+        self.assertEqual(redirect.response.content, b"one")
+        self.assertEqual(upload.response.content, b"ok")
+        # the upload is larger than the socket buffers, so it was sent in parts
+        self.assertTrue(any(req.endswith(body) for req in self.server.requests))
+        self.assertEqual(
+            sorted(req.split(b"\r\n", 1)[0] for req in self.server.requests),
+            [b"GET /chunked HTTP/1.1", b"GET /old HTTP/1.1", b"GET /one HTTP/1.1",
+             b"GET /one HTTP/1.1", b"PUT /upload HTTP/1.1"]
+        )
+
+    def test_timeout(self):
+        client = PollClient()
+        slow = client.add("GET", self.url + "/slow", timeout=0.2)
+        one = client.add("GET", self.url + "/one")
+        done = self.run_client(client)
+        self.assertEqual(done, [one, slow])
+        self.assertEqual(one.response.content, b"one")
+        self.assertIsNone(slow.response)
+        self.assertIsInstance(slow.error, OSError)
+        self.assertEqual(slow.error.args[0], errno.ETIMEDOUT)
+        self.assertIsNone(slow.sock)
+
+    def test_connect_error(self):
+        # connecting to a port nobody listens on fails
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        client = PollClient()
+
+        try:
+            req = client.add("GET", "http://127.0.0.1:%i/" % port)
+        except OSError:
+            return
+
+        self.assertEqual(self.run_client(client), [req])
+        self.assertIsInstance(req.error, OSError)
+        self.assertIsNone(req.response)
+        self.assertEqual(len(client), 0)
+
+
+if __name__ == '__main__':
+    main()
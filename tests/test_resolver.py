@@ -0,0 +1,74 @@
+from unittest import TestCase, main
+
+from mrequests.resolver import Resolver
+
+
+class CountingResolve:
+    def __init__(self, address="127.0.0.1"):
+        self.address = address
+        self.calls = 0
+
+    def __call__(self, host):
+        self.calls += 1
+        return self.address
+
+
+class TestResolver(TestCase):
+
+    def test_cache(self):
+        resolve = CountingResolve()
+        r = Resolver(resolve=resolve)
+        ai = r("example.invalid", 80)
+        self.assertEqual(ai[-1], ("127.0.0.1", 80))
+        self.assertEqual(r("example.invalid", 80), ai)
+        self.assertEqual(resolve.calls, 1)
+        r("example.invalid", 8080)
+        self.assertEqual(resolve.calls, 2)
+
+    def test_ttl(self):
+        resolve = CountingResolve()
+        r = Resolver(ttl=0, resolve=resolve)
+        r("example.invalid", 80)
+        r._cache[("example.invalid", 80)][0] -= 10
+        r("example.invalid", 80)
+        self.assertEqual(resolve.calls, 2)
+
+    def test_negative_cache(self):
+        resolve = CountingResolve(None)
+        r = Resolver(resolve=resolve)
+
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                r("example.invalid", 80)
+
+        self.assertEqual(resolve.calls, 1)
+
+    def test_static(self):
+        resolve = CountingResolve(None)
+        r = Resolver(resolve=resolve)
+        r.add("example.invalid", "127.0.0.1")
+        self.assertEqual(r("example.invalid", 80)[-1], ("127.0.0.1", 80))
+        self.assertEqual(resolve.calls, 0)
+
+    def test_max_entries(self):
+        r = Resolver(max_entries=2, resolve=CountingResolve())
+
+        for i in range(5):
+            r("host%i.invalid" % i, 80)
+
+        self.assertEqual(len(r._cache), 2)
+        self.assertIn(("host4.invalid", 80), r._cache)
+
+    def test_no_cache(self):
+        resolve = CountingResolve()
+        r = Resolver(max_entries=0, resolve=resolve)
+
+        for _ in range(2):
+            self.assertEqual(r("example.invalid", 80)[-1], ("127.0.0.1", 80))
+
+        self.assertEqual(resolve.calls, 2)
+        self.assertEqual(r._cache, {})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+import zlib
+from io import BytesIO
+from unittest import TestCase, main
+
+from mrequests import Response
+from mrequests.mrequests import _parse_head, _read_head
+
+
+RESPONSE = (
+    b"HTTP/1.1 301 Moved Permanently\r\n"
+    b"Content-Length: 11\r\n"
+    b"location: /new\r\n"
+    b"X-Foo: bar\r\n"
+    b"\r\n"
+    b"hello world"
+)
+
+CHUNKED_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Transfer-Encoding: chunked\r\n"
+    b"\r\n"
+    b"5;ext=1\r\nhello\r\n"
+    b"1\r\n \r\n"
+    b"10\r\nworld, chunked! \r\n"
+    b"0\r\n"
+    b"X-Trailer: foo\r\n"
+    b"\r\n"
+)
+CHUNKED_BODY = b"hello world, chunked! "
+
+
+def make_response(data, save_headers=False, bufsize=1024):
+    sf = BytesIO(data)
+    resp = Response(None, sf, save_headers=save_headers)
+    head, resp._pending = _read_head(sf, bytearray(bufsize))
+    location = _parse_head(resp, head)
+    resp._init_body("GET")
+    return resp, location
+
+
+class TestResponseHead(TestCase):
+
+    def test_read_head(self):
+        head, rest = _read_head(BytesIO(RESPONSE), bytearray(1024))
+        self.assertTrue(head.startswith(b"HTTP/1.1 301"))
+        self.assertTrue(head.endswith(b"X-Foo: bar\r\n\r\n"))
+        self.assertEqual(head + rest, RESPONSE[:len(head) + len(rest)])
+
+    def test_read_head_grow_buffer(self):
+        head, rest = _read_head(BytesIO(RESPONSE), bytearray(8))
+        self.assertTrue(head.endswith(b"X-Foo: bar\r\n\r\n"))
+
+    def test_read_head_pending(self):
+        head, rest = _read_head(BytesIO(b""), bytearray(8), RESPONSE + RESPONSE)
+        self.assertTrue(head.endswith(b"X-Foo: bar\r\n\r\n"))
+        self.assertEqual(rest, b"hello world" + RESPONSE)
+        head, rest = _read_head(BytesIO(RESPONSE[20:]), bytearray(8), RESPONSE[:20])
+        self.assertEqual(head + rest, RESPONSE)
+
+    def test_read_head_eof(self):
+        with self.assertRaises(OSError):
+            _read_head(BytesIO(b"HTTP/1.1 200 OK\r\n"), bytearray(1024))
+
+    def test_parse_head(self):
+        resp, location = make_response(RESPONSE, save_headers=True)
+        self.assertEqual(resp.status_code, 301)
+        self.assertEqual(resp.reason, b"Moved Permanently")
+        self.assertEqual(location, "/new")
+        self.assertEqual(
+            list(resp.headers), [b"Content-Length: 11", b"location: /new", b"X-Foo: bar"]
+        )
+        self.assertEqual(resp._content_size, 11)
+
+    def test_parse_head_no_headers(self):
+        resp, location = make_response(b"HTTP/1.0 204 No Content\r\n\r\n", save_headers=True)
+        self.assertEqual(resp.status_code, 204)
+        self.assertIsNone(location)
+        self.assertEqual(list(resp.headers), [])
+        self.assertFalse(resp._keep_alive)
+
+    def test_read_pending(self):
+        resp, _ = make_response(RESPONSE)
+        self.assertEqual(resp.read(5), b"hello")
+        self.assertEqual(resp.read(), b" world")
+        self.assertEqual(resp.read(), b"")
+
+    def test_readinto_pending(self):
+        resp, _ = make_response(RESPONSE)
+        buf = bytearray(4)
+        data = b""
+
+        while True:
+            n = resp.readinto(buf)
+
+            if not n:
+                break
+
+            data += buf[:n]
+
+        self.assertEqual(data, b"hello world")
+
+    def test_read_chunked(self):
+        resp, _ = make_response(CHUNKED_RESPONSE)
+        self.assertEqual(resp.read(3), b"hel")
+        self.assertEqual(resp.read(100), b"lo")
+        self.assertEqual(resp.read(None), b" world, chunked! ")
+        self.assertEqual(resp._remain, 0)
+        self.assertEqual(resp.read(), b"")
+
+    def test_content_chunked(self):
+        resp, _ = make_response(CHUNKED_RESPONSE)
+        self.assertEqual(resp.content, CHUNKED_BODY)
+
+    def test_readinto_chunked(self):
+        for size in (1, 3, 5, 16, 100):
+            resp, _ = make_response(CHUNKED_RESPONSE)
+            buf = bytearray(size)
+            data = b""
+
+            while True:
+                n = resp.readinto(buf)
+
+                if not n:
+                    break
+
+                data += buf[:n]
+
+            self.assertEqual(data, CHUNKED_BODY)
+            self.assertEqual(resp._remain, 0)
+
+    def test_saveinto_chunked_buffer(self):
+        resp, _ = make_response(CHUNKED_RESPONSE)
+        fobj = BytesIO()
+        resp.saveinto(fobj, buf=bytearray(4))
+        self.assertEqual(fobj.getvalue(), CHUNKED_BODY)
+
+
+class TestHeaderMap(TestCase):
+
+    HEAD = (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: text/plain; charset=latin-1\r\n"
+        b"ETag: \"abc\"\r\n"
+        b"Set-Cookie: a=1\r\n"
+        b"X-RateLimit-Remaining:  42 \r\n"
+        b"set-cookie: b=2\r\n"
+        b"Connection: close\r\n"
+        b"Content-Length: 0\r\n"
+        b"\r\n"
+    )
+
+    def test_get(self):
+        resp, _ = make_response(self.HEAD, save_headers=True)
+        headers = resp.headers
+        self.assertEqual(len(headers), 7)
+        self.assertEqual(headers.get("etag"), '"abc"')
+        self.assertEqual(headers.get(b"X-RATELIMIT-REMAINING"), "42")
+        self.assertEqual(headers.get_all("Set-Cookie"), ["a=1", "b=2"])
+        self.assertIsNone(headers.get("Date"))
+        self.assertEqual(headers.get("Date", "never"), "never")
+        self.assertTrue("content-length" in headers)
+        self.assertFalse("content" in headers)
+        self.assertEqual(next(headers.items()), ("Content-Type", "text/plain; charset=latin-1"))
+        # headers handled by Response are still parsed
+        self.assertEqual(resp.encoding, "latin-1")
+        self.assertFalse(resp._keep_alive)
+        self.assertEqual(resp._content_size, 0)
+
+    def test_whitelist(self):
+        resp, _ = make_response(self.HEAD, save_headers=("ETag", b"set-cookie"))
+        headers = resp.headers
+        self.assertEqual(list(headers), [b'ETag: "abc"', b"Set-Cookie: a=1", b"set-cookie: b=2"])
+        self.assertEqual(headers.get_all("set-cookie"), ["a=1", "b=2"])
+        self.assertIsNone(headers.get("Content-Type"))
+        self.assertEqual(resp.encoding, "latin-1")
+
+    def test_add_header_override(self):
+        lines = []
+
+        class MyResponse(Response):
+            def add_header(self, data):
+                super().add_header(data)
+                lines.append(data)
+
+        resp = MyResponse(None, None, save_headers=True)
+        _parse_head(resp, self.HEAD)
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(lines[0], b"Content-Type: text/plain; charset=latin-1\r\n")
+        self.assertEqual(resp.encoding, "latin-1")
+        self.assertEqual(resp.headers.get("etag"), '"abc"')
+
+
+class TestResponseIter(TestCase):
+
+    def test_iter_content(self):
+        resp, _ = make_response(CHUNKED_RESPONSE)
+        chunks = list(resp.iter_content(4))
+        self.assertTrue(all(len(c) <= 4 for c in chunks))
+        self.assertEqual(b"".join(chunks), CHUNKED_BODY)
+
+    def test_iter_content_buffer(self):
+        resp, _ = make_response(RESPONSE)
+        buf = bytearray(3)
+        data = b""
+
+        for chunk in resp.iter_content(buf=buf):
+            self.assertIsInstance(chunk, memoryview)
+            data += chunk
+
+        self.assertEqual(data, b"hello world")
+
+    def test_iter_lines(self):
+        body = b"first\r\nsecond\n\n" + b"x" * 50 + b"\nlast"
+        data = b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+        expected = [b"first", b"second", b"", b"x" * 50, b"last"]
+
+        resp, _ = make_response(data)
+        self.assertEqual(list(resp.iter_lines()), expected)
+
+        resp, _ = make_response(data)
+        self.assertEqual([bytes(l) for l in resp.iter_lines(bytearray(4))], expected)
+
+        resp, _ = make_response(data)
+        self.assertEqual(b"".join(resp.iter_lines(keepends=True)), body)
+
+    def test_iter_lines_chunked(self):
+        resp, _ = make_response(CHUNKED_RESPONSE)
+        self.assertEqual(list(resp.iter_lines()), [CHUNKED_BODY])
+
+
+class TestResponseDecompress(TestCase):
+
+    def make_response(self, encoding, chunked=False):
+        body = b"".join(b'{"n": %d}\n' % i for i in range(500))
+        zobj = zlib.compressobj(wbits=31 if encoding == b"gzip" else 15)
+        data = zobj.compress(body) + zobj.flush()
+        head = b"HTTP/1.1 200 OK\r\nContent-Encoding: %s\r\n" % encoding
+
+        if chunked:
+            head += b"Transfer-Encoding: chunked\r\n\r\n"
+            head += b"".join(
+                b"%x\r\n%s\r\n" % (len(data[i:i + 100]), data[i:i + 100])
+                for i in range(0, len(data), 100)
+            ) + b"0\r\n\r\n"
+        else:
+            head += b"Content-Length: %d\r\n\r\n" % len(data) + data
+
+        resp, _ = make_response(head)
+        resp._init_decoder()
+        return resp, body
+
+    def test_content(self):
+        for encoding in (b"gzip", b"deflate"):
+            for chunked in (False, True):
+                resp, body = self.make_response(encoding, chunked)
+                self.assertEqual(resp.content_encoding, encoding.decode())
+                self.assertEqual(resp.content, body)
+                self.assertEqual(resp._remain, 0)
+
+    def test_read_size(self):
+        resp, body = self.make_response(b"gzip", True)
+        data = b""
+
+        while True:
+            chunk = resp.read(50)
+
+            if not chunk:
+                break
+
+            self.assertTrue(len(chunk) <= 50)
+            data += chunk
+
+        self.assertEqual(data, body)
+
+    def test_saveinto_buffer(self):
+        resp, body = self.make_response(b"deflate")
+        fobj = BytesIO()
+        resp.saveinto(fobj, buf=bytearray(64))
+        self.assertEqual(fobj.getvalue(), body)
+
+    def test_charset(self):
+        resp, _ = make_response(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; charset=\"latin-1\"\r\n"
+            b"Content-Length: 1\r\n\r\n\xe4"
+        )
+        self.assertIsNone(resp.content_encoding)
+        self.assertEqual(resp.encoding, "latin-1")
+        self.assertEqual(resp.text, "\xe4")
+
+
+if __name__ == '__main__':
+    main()
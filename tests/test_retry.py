@@ -0,0 +1,158 @@
+from io import BytesIO
+from unittest import TestCase, main
+
+from fakes import FakeConnection, pooled_session
+from mrequests.retry import Retry, parse_http_date, retry_after
+
+
+class NoWaitRetry(Retry):
+    # Records delays instead of sleeping
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.delays = []
+
+    def wait(self, seconds):
+        self.delays.append(seconds)
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Responder:
+    # Callable, which returns or raises the given results one by one, like request()
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def __call__(self, method, url, **kw):
+        self.calls.append(kw)
+        result = self.results.pop(0)
+
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+
+class TestRetry(TestCase):
+
+    def test_status(self):
+        failed = FakeResponse(503)
+        func = Responder(failed, FakeResponse(200))
+        retry = NoWaitRetry(jitter=0)
+        resp = retry.call(func, "GET", "http://host/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(failed.closed)
+        self.assertEqual(retry.delays, [0.5])
+
+    def test_attempts(self):
+        func = Responder(FakeResponse(502), FakeResponse(502), FakeResponse(502))
+        retry = NoWaitRetry(jitter=0, backoff=1)
+        resp = retry.call(func, "GET", "http://host/")
+        self.assertEqual(resp.status_code, 502)
+        self.assertFalse(resp.closed)
+        self.assertEqual(retry.delays, [1, 2])
+
+    def test_exceptions(self):
+        func = Responder(OSError(), OSError(), FakeResponse(200))
+        retry = NoWaitRetry()
+        self.assertEqual(retry.call(func, "GET", "http://host/").status_code, 200)
+        self.assertEqual(len(retry.delays), 2)
+
+        func = Responder(OSError(1), OSError(2))
+        retry = NoWaitRetry(attempts=2)
+
+        try:
+            retry.call(func, "GET", "http://host/")
+        except OSError as exc:
+            self.assertEqual(exc.args, (2,))
+        else:
+            self.fail("OSError not raised")
+
+        with self.assertRaises(ValueError):
+            retry.call(Responder(ValueError()), "GET", "http://host/")
+
+    def test_methods(self):
+        retry = NoWaitRetry()
+
+        with self.assertRaises(OSError):
+            retry.call(Responder(OSError(), FakeResponse(200)), "POST", "http://host/")
+
+        retry = NoWaitRetry(methods=None)
+        func = Responder(OSError(), FakeResponse(200))
+        self.assertEqual(retry.call(func, "POST", "http://host/").status_code, 200)
+
+    def test_body(self):
+        data = BytesIO(b"xxdata")
+        data.seek(2)
+        func = Responder(OSError(), FakeResponse(200))
+        retry = NoWaitRetry()
+        data.read()
+        data.seek(2)
+        retry.call(func, "PUT", "http://host/", data=data)
+        self.assertEqual(data.tell(), 2)
+
+        def chunks():
+            yield b"data"
+
+        with self.assertRaises(OSError):
+            retry.call(Responder(OSError()), "PUT", "http://host/", data=chunks())
+
+    def test_backoff(self):
+        retry = Retry(backoff=1, max_backoff=5, jitter=0.5)
+
+        for i in range(100):
+            self.assertTrue(0.5 <= retry.delay(1) <= 1)
+            self.assertTrue(2.5 <= retry.delay(10) <= 5)
+
+    def test_retry_after(self):
+        func = Responder(FakeResponse(429, {"retry-after": "7"}), FakeResponse(200))
+        retry = NoWaitRetry()
+        retry.call(func, "GET", "http://host/")
+        self.assertEqual(retry.delays, [7])
+        self.assertEqual(func.calls[0]["save_headers"], ("Retry-After", "Date"))
+
+        func = Responder(FakeResponse(503, {"retry-after": "3600"}), FakeResponse(200))
+        self.assertEqual(retry.call(func, "GET", "http://host/").status_code, 503)
+
+    def test_retry_after_date(self):
+        resp = FakeResponse(503, {
+            "retry-after": "Thu, 01 Jan 2026 00:00:20 GMT",
+            "date": "Wed, 31 Dec 2025 23:59:50 GMT",
+        })
+        self.assertEqual(retry_after(resp), 30)
+        resp.headers["date"] = None
+        self.assertIsNone(retry_after(resp))
+        self.assertIsNone(retry_after(FakeResponse(503)))
+
+    def test_parse_http_date(self):
+        self.assertEqual(parse_http_date("Sun, 06 Nov 1994 08:49:37 GMT"), 784111777)
+        self.assertEqual(parse_http_date("Thu, 29 Feb 2024 00:00:00 GMT"), 1709164800)
+        self.assertIsNone(parse_http_date("Sunday, 06-Nov-94 08:49:37 GMT"))
+        self.assertIsNone(parse_http_date(""))
+
+    def test_session(self):
+        conn = FakeConnection(responses=(
+            b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 0\r\nContent-Length: 0\r\n\r\n",
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok",
+        ))
+        s = pooled_session(conn, retry=NoWaitRetry(jitter=0))
+        resp = s.put("http://host/", data=b"body")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content, b"ok")
+        self.assertIsNone(resp.headers)
+        self.assertEqual(conn.sent.count(b"PUT / HTTP/1.1"), 2)
+        self.assertEqual(conn.sent.count(b"body"), 2)
+
+
+if __name__ == '__main__':
+    main()
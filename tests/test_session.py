@@ -0,0 +1,249 @@
+import errno
+from unittest import TestCase, main
+
+from fakes import HOST, FakeConnection, FakeSocket, pooled_session
+from mrequests.session import Session
+
+
+class BrokenConnection(FakeConnection):
+    # Connection, which raises the given exception when written to
+
+    def __init__(self, exc):
+        super().__init__()
+        self.exc = exc
+
+    def write(self, data):
+        raise self.exc
+
+
+class TimeoutConnection(FakeConnection):
+    # Connection, which times out while waiting for the response
+
+    def readinto1(self, buf):
+        raise OSError(errno.ETIMEDOUT)
+
+
+RESPONSES = (
+    b"HTTP/1.1 200 OK\r\nContent-Length: 3\r\n\r\none"
+    b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n3\r\ntwo\r\n0\r\n\r\n"
+    b"HTTP/1.1 404 Not Found\r\nContent-Length: 5\r\n\r\nthree"
+)
+
+
+class CountingConnection(FakeConnection):
+    # Connection, which records how many requests were written before each read
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def readinto1(self, buf):
+        self.reads.append(self.sent.count(b" HTTP/1.1\r\n"))
+        return super().readinto1(buf)
+
+
+def response(body, headers=b""):
+    return b"HTTP/1.1 200 OK\r\n%sContent-Length: %i\r\n\r\n%s" % (headers, len(body), body)
+
+
+class TestSession(TestCase):
+
+    def test_acquire_release(self):
+        s = Session()
+        key = ("http", "host", 80)
+        self.assertIsNone(s.acquire(key))
+        sock = FakeSocket()
+        s.release(key, sock, sock)
+        self.assertEqual(s.acquire(("http", "otherhost", 80)), None)
+        self.assertEqual(s.acquire(key), (sock, sock))
+        self.assertIsNone(s.acquire(key))
+
+    def test_max_per_host(self):
+        s = Session(max_per_host=2)
+        key = ("http", "host", 80)
+        socks = [FakeSocket() for _ in range(3)]
+
+        for sock in socks:
+            s.release(key, sock, sock)
+
+        self.assertTrue(socks[0].closed)
+        self.assertFalse(socks[1].closed)
+        self.assertFalse(socks[2].closed)
+        # most recently used connection is returned first
+        self.assertIs(s.acquire(key)[0], socks[2])
+
+    def test_lru_eviction(self):
+        s = Session(max_connections=2)
+        socks = [FakeSocket() for _ in range(3)]
+
+        for i, sock in enumerate(socks):
+            s.release(("http", "host%i" % i, 80), sock, sock)
+
+        self.assertTrue(socks[0].closed)
+        self.assertIsNone(s.acquire(("http", "host0", 80)))
+        self.assertIs(s.acquire(("http", "host1", 80))[0], socks[1])
+
+    def test_idle_timeout(self):
+        s = Session(idle_timeout=0)
+        key = ("http", "host", 80)
+        sock = FakeSocket()
+        s.release(key, sock, sock)
+        s._pool[0][3] -= 10
+        self.assertIsNone(s.acquire(key))
+        self.assertTrue(sock.closed)
+
+    def test_close(self):
+        s = Session()
+        sock = FakeSocket()
+        s.release(("http", "host", 80), sock, sock)
+        s.close()
+        self.assertTrue(sock.closed)
+        self.assertEqual(s._pool, [])
+
+
+class TestStaleConnection(TestCase):
+
+    OK = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"
+
+    def session(self, stale):
+        # Session with a working connection and a stale one, which is tried first
+        good = FakeConnection(self.OK)
+        s = pooled_session(good)
+        s.release(HOST, stale, stale)
+        return s, good
+
+    def test_closed(self):
+        s, good = self.session(FakeConnection())
+        self.assertEqual(s.get("http://host/").content, b"ok")
+        self.assertTrue(good.sent.startswith(b"GET / HTTP/1.1\r\n"))
+
+    def test_closed_unsafe(self):
+        s, good = self.session(FakeConnection())
+
+        with self.assertRaises(OSError):
+            s.post("http://host/charge", data=b"x")
+
+        self.assertEqual(good.sent, b"")
+
+    def test_closed_after_partial_response(self):
+        s, good = self.session(FakeConnection(b"HTTP/1.1 200"))
+
+        with self.assertRaises(OSError):
+            s.get("http://host/")
+
+        self.assertEqual(good.sent, b"")
+
+    def test_timeout(self):
+        s, good = self.session(TimeoutConnection())
+
+        with self.assertRaises(OSError):
+            s.get("http://host/", timeout=1)
+
+        self.assertEqual(good.sent, b"")
+
+        s, good = self.session(BrokenConnection(OSError(errno.ETIMEDOUT)))
+
+        with self.assertRaises(OSError):
+            s.get("http://host/", timeout=1)
+
+        self.assertEqual(good.sent, b"")
+
+    def test_write_error(self):
+        s, good = self.session(BrokenConnection(OSError(32, "Broken pipe")))
+        self.assertEqual(s.post("http://host/").content, b"ok")
+        self.assertTrue(good.sent.startswith(b"POST / HTTP/1.1\r\n"))
+
+        s, good = self.session(BrokenConnection(OSError(32, "Broken pipe")))
+        self.assertEqual(s.put("http://host/", data=b"x").content, b"ok")
+        self.assertTrue(good.sent.endswith(b"\r\n\r\nx"))
+
+        # request body may have been received partially
+        s, good = self.session(BrokenConnection(OSError(32, "Broken pipe")))
+
+        with self.assertRaises(OSError):
+            s.post("http://host/", data=b"x")
+
+
+class TestPipeline(TestCase):
+
+    def test_pipeline(self):
+        conn = FakeConnection(RESPONSES)
+        s = pooled_session(conn)
+        urls = ["http://host/1", ("GET", "http://host/2"), ("PUT", "http://host/3", {"data": b"x"})]
+        results = [(r.status_code, r.content) for r in s.pipeline(urls, depth=2)]
+        self.assertEqual(results, [(200, b"one"), (200, b"two"), (404, b"three")])
+        self.assertEqual(conn.sent.count(b"Connection: close"), 0)
+        self.assertTrue(conn.sent.startswith(b"GET /1 HTTP/1.1\r\n"))
+        self.assertTrue(conn.sent.endswith(b"Content-Length: 1\r\n\r\nx"))
+        # connection was handed back to the pool
+        self.assertEqual(s.acquire(HOST), (conn, conn))
+
+    def connections(self, first, second):
+        # Session, which opens connection first and then connection second from its pool
+        s = pooled_session(second)
+        s.release(HOST, first, first)
+        return s
+
+    def test_server_closes(self):
+        # server answers two requests and then closes the connection
+        first = FakeConnection(response(b"1") + response(b"2"))
+        # serves one response per request written, so this would fail if requests sent again
+        # were still pipelined
+        second = FakeConnection(responses=(response(b"3"), response(b"4")))
+        s = self.connections(first, second)
+        urls = ["http://host/%i" % i for i in range(1, 5)]
+        results = [r.content for r in s.pipeline(urls, depth=4)]
+        self.assertEqual(results, [b"1", b"2", b"3", b"4"])
+        self.assertEqual(first.sent.count(b"GET /"), 4)
+        self.assertEqual(second.sent, b"GET /3 HTTP/1.1\r\nHost: host\r\n\r\n"
+                                      b"GET /4 HTTP/1.1\r\nHost: host\r\n\r\n")
+        self.assertEqual(s.acquire(HOST), (second, second))
+        self.assertIsNone(s.acquire(HOST))
+
+    def test_connection_close(self):
+        first = FakeConnection(
+            response(b"1") + response(b"2", b"Connection: close\r\n") + response(b"x")
+        )
+        second = FakeConnection(responses=(response(b"3"), response(b"4")))
+        s = self.connections(first, second)
+        urls = ["http://host/%i" % i for i in range(1, 5)]
+        results = [r.content for r in s.pipeline(urls, depth=4)]
+        self.assertEqual(results, [b"1", b"2", b"3", b"4"])
+        self.assertEqual(second.sent.count(b"GET /"), 2)
+        # first connection was not put back into the pool
+        self.assertEqual(s.acquire(HOST), (second, second))
+        self.assertIsNone(s.acquire(HOST))
+
+    def test_stale_connection(self):
+        # a stale pooled connection is replaced without reducing the pipeline depth
+        second = CountingConnection(response(b"1") + response(b"2") + response(b"3"))
+        s = self.connections(FakeConnection(), second)
+        urls = ["http://host/%i" % i for i in range(1, 4)]
+        results = [r.content for r in s.pipeline(urls, depth=3)]
+        self.assertEqual(results, [b"1", b"2", b"3"])
+        self.assertEqual(second.reads[0], 3)
+
+    def test_timeout(self):
+        # unanswered requests are not sent again after a timeout
+        first = TimeoutConnection()
+        second = FakeConnection(response(b"1"))
+        s = self.connections(first, second)
+
+        with self.assertRaises(OSError):
+            list(s.pipeline(["http://host/1", ("POST", "http://host/2")], allow_unsafe=True))
+
+        self.assertEqual(first.sent.count(b" HTTP/1.1\r\n"), 2)
+        self.assertEqual(second.sent, b"")
+        # timed out connection was not put back into the pool
+        self.assertEqual(s.acquire(HOST), (second, second))
+        self.assertIsNone(s.acquire(HOST))
+
+    def test_unsafe_method(self):
+        s = Session()
+
+        with self.assertRaises(ValueError):
+            list(s.pipeline([("POST", "http://host/")]))
+
+
+if __name__ == '__main__':
+    main()
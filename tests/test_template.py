@@ -0,0 +1,47 @@
+from unittest import TestCase, main
+
+from fakes import FakeConnection, pooled_session
+from mrequests import RequestContext, RequestTemplate
+from mrequests.mrequests import _encode_head, _join_into
+
+
+class TestRequestHead(TestCase):
+
+    def test_encode_head(self):
+        ctx = RequestContext("http://host:8080/foo?bar=1", "GET")
+        parts = _encode_head(ctx, {b"Accept": b"*/*", "X-Foo": "bar", b"host": b"ignored"})
+        self.assertEqual(
+            b"".join(parts),
+            b"GET /foo?bar=1 HTTP/1.1\r\nHost: host\r\nAccept: */*\r\nX-Foo: bar\r\n"
+        )
+
+    def test_encode_head_host(self):
+        ctx = RequestContext("http://1.2.3.4/", "GET")
+        parts = _encode_head(ctx, {b"Host": b"example.com"})
+        self.assertEqual(b"".join(parts), b"GET / HTTP/1.1\r\nHost: example.com\r\n")
+
+    def test_join_into(self):
+        buf = bytearray(8)
+        self.assertEqual(bytes(_join_into(buf, [b"abc", b"de"])), b"abcde")
+        self.assertEqual(buf[:5], b"abcde")
+        self.assertEqual(bytes(_join_into(buf, [b"abcdef", b"ghijk"])), b"abcdefghijk")
+
+    def test_template(self):
+        tpl = RequestTemplate("POST", "http://host/telemetry", headers={b"X-Id": b"42"},
+                              auth=(b"user", b"secret"))
+        self.assertTrue(tpl.head.startswith(b"POST /telemetry HTTP/1.1\r\nHost: host\r\n"))
+        self.assertIn(b"X-Id: 42\r\n", tpl.head)
+        self.assertIn(b"Authorization: Basic dXNlcjpzZWNyZXQ=\r\n", tpl.head)
+
+    def test_template_params(self):
+        tpl = RequestTemplate("GET", "http://host/q?a=b", params={"x": "1 2"})
+        self.assertTrue(tpl.head.startswith(b"GET /q?a=b&x=1+2 HTTP/1.1\r\n"))
+        self.assertEqual(tpl.kw, {})
+        conn = FakeConnection(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        resp = tpl.send(session=pooled_session(conn))
+        self.assertEqual(resp.content, b"ok")
+        self.assertTrue(conn.sent.startswith(b"GET /q?a=b&x=1+2 HTTP/1.1\r\n"))
+
+
+if __name__ == '__main__':
+    main()
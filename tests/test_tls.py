@@ -0,0 +1,68 @@
+from unittest import TestCase, main
+
+from fakes import FakeConnection
+from mrequests import mrequests
+
+
+class FakeTLSSocket(FakeConnection):
+    # Socket and socket file in one, with a TLS session for the host it is connected to
+
+    def __init__(self, data, host, context):
+        super().__init__(data)
+        self.session = "session-of-" + host
+        self.context = context
+
+    def makefile(self, mode):
+        return self
+
+    def settimeout(self, timeout):
+        pass
+
+
+class TestTLSSessions(TestCase):
+
+    def setUp(self):
+        self.connect = mrequests._connect
+        self.offered = []
+        mrequests._tls_sessions.clear()
+
+        def connect(ctx, timeout=None, ssl_context=None, resolver=None, hooks=None):
+            self.offered.append(
+                (ctx.host, mrequests._tls_sessions.get((ssl_context, ctx.host, ctx.port)))
+            )
+            return FakeTLSSocket(self.responses.pop(0), ctx.host, ssl_context)
+
+        mrequests._connect = connect
+
+    def tearDown(self):
+        mrequests._connect = self.connect
+        mrequests._tls_sessions.clear()
+
+    def test_save(self):
+        ssl_context = object()
+        self.responses = [
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok",
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok",
+        ]
+        mrequests.request("GET", "https://a.example/", ssl_context=ssl_context).close()
+        mrequests.request("GET", "https://a.example/", ssl_context=ssl_context).close()
+        self.assertEqual(self.offered, [("a.example", None), ("a.example", "session-of-a.example")])
+
+    def test_redirect(self):
+        # the session is saved for the host which sent the redirect, not the redirect target
+        ssl_context = object()
+        self.responses = [
+            b"HTTP/1.1 302 Found\r\nLocation: https://b.example/\r\nContent-Length: 0\r\n\r\n",
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok",
+        ]
+        resp = mrequests.request("GET", "https://a.example/", ssl_context=ssl_context)
+        self.assertEqual(resp.content, b"ok")
+        self.assertEqual(self.offered, [("a.example", None), ("b.example", None)])
+        self.assertEqual(
+            sorted(key[1:] + (value,) for key, value in mrequests._tls_sessions.items()),
+            [("a.example", 443, "session-of-a.example"), ("b.example", 443, "session-of-b.example")]
+        )
+
+
+if __name__ == '__main__':
+    main()
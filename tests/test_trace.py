@@ -0,0 +1,74 @@
+from io import BytesIO
+from unittest import TestCase, main
+
+from fakes import FakeConnection, pooled_session
+from mrequests.mrequests import Response
+from mrequests.trace import Tracer, TimingTracer
+
+
+class Recorder(Tracer):
+    def __init__(self):
+        self.events = []
+
+    def event(self, name, ctx, ts):
+        self.events.append(name)
+
+
+class TestTrace(TestCase):
+
+    def test_events(self):
+        hooks = Recorder()
+        s = pooled_session(FakeConnection(b"HTTP/1.1 200 OK\r\nContent-Length: 3\r\n\r\none"))
+        resp = s.get("http://host/", hooks=hooks)
+        self.assertEqual(
+            hooks.events,
+            ["connection_reused", "headers_sent", "request_sent", "status_received",
+             "headers_parsed"]
+        )
+        self.assertEqual(resp.content, b"one")
+        self.assertEqual(hooks.events[-1], "body_complete")
+        resp.close()
+        self.assertEqual(hooks.events.count("body_complete"), 1)
+
+    def test_head_body_complete(self):
+        hooks = Recorder()
+        s = pooled_session(FakeConnection(b"HTTP/1.1 200 OK\r\nContent-Length: 3\r\n\r\n"))
+        s.head("http://host/", hooks=hooks)
+        self.assertEqual(hooks.events[-1], "body_complete")
+
+    def test_read_until_eof(self):
+        hooks = Recorder()
+        resp = Response(None, BytesIO(b"data"))
+        resp._trace = (hooks, None)
+        self.assertEqual(resp.read(2), b"da")
+        self.assertEqual(resp.read(), b"ta")
+        self.assertEqual(hooks.events, [])
+        self.assertEqual(resp.read(), b"")
+        self.assertEqual(hooks.events, ["body_complete"])
+
+    def test_breakdown(self):
+        results = []
+        tracer = TimingTracer(lambda ctx, timings: results.append(timings))
+        events = ("resolve_start", "resolve_end", "connect_start", "connect_end",
+                  "headers_sent", "request_sent", "status_received", "headers_parsed")
+
+        for ts, name in enumerate(events):
+            getattr(tracer, name)(None, ts * 10)
+
+        self.assertEqual(
+            tracer.breakdown(),
+            {"resolve": 10, "connect": 10, "send": 20, "wait": 10, "headers": 10, "total": 70},
+        )
+        tracer.body_complete(None, 100)
+        self.assertEqual(results[0]["body"], 30)
+        self.assertEqual(results[0]["total"], 100)
+        self.assertFalse(tracer.reused)
+
+        tracer.connection_reused(None, 200)
+        tracer.request_sent(None, 210)
+        self.assertEqual(tracer.breakdown(), {"send": 10, "total": 10})
+        self.assertTrue(tracer.reused)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+from unittest import TestCase, main
+
+from mrequests import urlencode
+from mrequests.urlencode import (
+    FormEncoder,
+    quote,
+    quote_bytes,
+    quote_from_bytes,
+    quote_plus,
+    urlencode_bytes,
+)
+
+
+class TestQuote(TestCase):
+
+    def test_quote(self):
+        self.assertEqual(quote("abc def"), "abc%20def")
+        self.assertEqual(quote("/path/to file"), "/path/to%20file")
+        self.assertEqual(quote("/path/to file", safe=""), "%2Fpath%2Fto%20file")
+        self.assertEqual(quote("a&b=c", safe="&="), "a&b=c")
+        self.assertEqual(quote(""), "")
+        self.assertEqual(quote("äöü"), "%C3%A4%C3%B6%C3%BC")
+        self.assertEqual(quote("äöü", encoding="latin-1"), "%E4%F6%FC")
+
+    def test_quote_from_bytes(self):
+        self.assertEqual(quote_from_bytes(b"abc def\x3f"), "abc%20def%3F")
+        self.assertEqual(quote_from_bytes(b"\x00\x01\xff"), "%00%01%FF")
+        self.assertEqual(quote_from_bytes(bytearray(b"a b")), "a%20b")
+        self.assertEqual(quote_from_bytes(b"safe_chars-only.txt"), "safe_chars-only.txt")
+        self.assertEqual(quote_from_bytes(b""), "")
+
+        with self.assertRaises(TypeError):
+            quote_from_bytes("abc")
+
+    def test_quote_plus(self):
+        self.assertEqual(quote_plus("a b+c/d"), "a+b%2Bc%2Fd")
+        self.assertEqual(quote_plus(b"a b"), "a+b")
+        self.assertEqual(quote_plus("a b/c", safe="/"), "a+b/c")
+        self.assertEqual(quote_plus("ab"), "ab")
+        self.assertEqual(quote_plus(""), "")
+
+    def test_quote_bytes(self):
+        self.assertEqual(quote_bytes(b"abc def"), b"abc%20def")
+        self.assertEqual(quote_bytes(b"a b&c", safe=b"&", plus=True), b"a+b&c")
+        self.assertEqual(quote_bytes(b"/a/b", safe=""), b"%2Fa%2Fb")
+        self.assertEqual(quote_bytes(b"unchanged"), b"unchanged")
+        self.assertEqual(quote_bytes(bytearray(b"x y")), b"x%20y")
+
+    def test_all_bytes(self):
+        data = bytes(range(256))
+        quoted = quote_bytes(data, safe=b"")
+        self.assertEqual(len(quoted), 3 * 256 - 2 * 65)
+        self.assertEqual(quoted[:6], b"%00%01")
+        self.assertEqual(quoted[-3:], b"%FF")
+        self.assertTrue(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ" in quoted)
+
+    def test_cache_bounded(self):
+        urlencode.clear_cache()
+
+        for i in range(urlencode.MAX_QUOTE_TABLES + 4):
+            quote("a b", safe=chr(33 + i))
+
+        self.assertEqual(len(urlencode._quote_tables), urlencode.MAX_QUOTE_TABLES)
+        urlencode.clear_cache()
+        self.assertEqual(len(urlencode._quote_tables), 0)
+
+    def test_urlencode(self):
+        self.assertEqual(
+            urlencode.urlencode([("q", "a b"), (b"x", b"1&2"), ("n", 42)]), "q=a+b&x=1%262&n=42"
+        )
+        self.assertEqual(
+            urlencode.urlencode({"tag": ["a", "b c"]}, doseq=True), "tag=a&tag=b+c"
+        )
+
+    def test_urlencode_invalid(self):
+        with self.assertRaises(TypeError):
+            urlencode.urlencode("a=b")
+
+    def test_urlencode_bytes(self):
+        data = urlencode_bytes([("a", "1 2"), ("b", b"\xff"), ("c", [1, 2])], doseq=True)
+        self.assertEqual(data, b"a=1+2&b=%FF&c=1&c=2")
+        self.assertEqual(urlencode_bytes({}), b"")
+
+
+class TestFormEncoder(TestCase):
+
+    def read(self, encoder, size):
+        buf = bytearray(size)
+        data = b""
+
+        while True:
+            num_read = encoder.readinto(buf)
+
+            if not num_read:
+                return data
+
+            data += buf[:num_read]
+
+    def test_readinto(self):
+        query = [("key %i" % i, "välue&%i" % i) for i in range(20)]
+        expected = urlencode.urlencode(query).encode()
+        encoder = FormEncoder(query)
+        self.assertEqual(len(encoder), len(expected))
+
+        for size in (1, 5, 64, 1024):
+            encoder.seek(0)
+            self.assertEqual(self.read(encoder, size), expected)
+            self.assertEqual(encoder.tell(), len(expected))
+
+    def test_seek(self):
+        encoder = FormEncoder({"a": "b"})
+
+        with self.assertRaises(OSError):
+            encoder.seek(1)
+
+    def test_content_type(self):
+        self.assertEqual(FormEncoder({}).content_type, b"application/x-www-form-urlencoded")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+from unittest import TestCase, main
+
+from mrequests.urlparseqs import iter_qsl, parse_qsl
+from mrequests.urlunquote import unquote, unquote_into
+
+
+class TestUnquote(TestCase):
+
+    def test_unquote(self):
+        self.assertEqual(unquote("abc%20def"), b"abc def")
+        self.assertEqual(unquote(b"%C3%A4%c3%b6"), "äö".encode())
+        self.assertEqual(unquote(b"no escapes"), b"no escapes")
+        self.assertEqual(unquote(bytearray(b"a%2Fb")), b"a/b")
+        self.assertEqual(unquote(""), b"")
+
+    def test_malformed(self):
+        self.assertEqual(unquote("%zz%4"), b"%zz%4")
+        self.assertEqual(unquote("%41%4"), b"A%4")
+        self.assertEqual(unquote("100%"), b"100%")
+        self.assertEqual(unquote("%%41"), b"%A")
+
+    def test_unquote_into(self):
+        buf = bytearray(16)
+        size = unquote_into(b"xx%41+b%2Bxx", buf, 2, 10, plus=True)
+        self.assertEqual(buf[:size], b"A b+")
+
+        with self.assertRaises(ValueError):
+            unquote_into(b"%41%42", bytearray(2))
+
+
+class TestParseQsl(TestCase):
+
+    def test_parse_qsl(self):
+        self.assertEqual(
+            parse_qsl("a=1&b=x+y%26z&c=%C3%A4"), [("a", "1"), ("b", "x y&z"), ("c", "ä")]
+        )
+        self.assertEqual(parse_qsl("a=1&&b&c="), [("a", "1")])
+        self.assertEqual(
+            parse_qsl("a=1&&b&c=", keep_blank_values=True), [("a", "1"), ("b", ""), ("c", "")]
+        )
+        self.assertEqual(parse_qsl("a=1;b=2", separator=";"), [("a", "1"), ("b", "2")])
+        self.assertEqual(parse_qsl(""), [])
+
+    def test_strict_parsing(self):
+        with self.assertRaises(ValueError):
+            parse_qsl("a=1&b", strict_parsing=True)
+
+    def test_max_num_fields(self):
+        self.assertEqual(len(parse_qsl("a=1&b=2", max_num_fields=2)), 2)
+
+        with self.assertRaises(ValueError):
+            parse_qsl("a=1&b=2&c=3", max_num_fields=2)
+
+    def test_iter_qsl(self):
+        it = iter_qsl(b"x=%C3%A4+1&y=" + b"z" * 100, encoding=None, buf=bytearray(4))
+        self.assertEqual(next(it), (b"x", b"\xc3\xa4 1"))
+        self.assertEqual(next(it), (b"y", b"z" * 100))
+
+        with self.assertRaises(StopIteration):
+            next(it)
+
+
+if __name__ == '__main__':
+    main()